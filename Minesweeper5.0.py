@@ -0,0 +1,1506 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import messagebox
+import asyncio
+import itertools
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from minesweeper_core import HIDDEN, OPENED, FLAGGED, MINE, board_stats
+from minesweeper_daily import get_challenge, open_board
+from minesweeper_endless import EndlessBoard
+from minesweeper_history import History
+from minesweeper_journal import GameJournal, unfinished_games
+from minesweeper_preflight import MODES, OverBudget, build_board, measure_canvas, plan, resident_bytes
+from minesweeper_render import COLOR_SCHEME, TilePainter
+from minesweeper_session import SessionStats
+from minesweeper_solver import FrontierAnalyzer, HintSearch, ProbabilitySearch, player_moves
+from minesweeper_stats import StatsStore
+
+# 对局结束后在后台统计大棋盘3BV的线程名
+STATS_THREAD = "result-stats"
+
+class CellStyles:
+    # 共享字体对象，同一个Tk解释器下的所有窗口共用
+    FONT_SPECS = {
+        "status": ("微软雅黑", 12, "bold"),
+        "timer": ("微软雅黑", 12),
+    }
+    _instances = {}
+
+    @classmethod
+    def get(cls, widget):
+        # 每个Tk根窗口只创建一次字体
+        root = widget._root()
+        styles = cls._instances.get(root)
+        if styles is None:
+            styles = cls(root)
+            cls._instances[root] = styles
+        return styles
+
+    def __init__(self, root):
+        self.fonts = {
+            name: tkfont.Font(root=root, family=spec[0], size=spec[1],
+                              weight=spec[2] if len(spec) > 2 else "normal")
+            for name, spec in self.FONT_SPECS.items()
+        }
+
+    def apply_theme(self, size=None, family=None):
+        # 修改共享字体即可让所有窗口同时生效，无需逐个更新控件
+        for font in self.fonts.values():
+            options = {}
+            if size is not None:
+                options["size"] = size
+            if family is not None:
+                options["family"] = family
+            if options:
+                font.configure(**options)
+
+class TileAtlas(TilePainter):
+    # 每种格子外观只渲染一次为PhotoImage，按(根窗口, 格子尺寸)缓存，所有格子和窗口共用
+    # 像素图案由TilePainter绘制，与无界面导出的图片完全相同
+    _instances = {}
+
+    @classmethod
+    def get(cls, widget, size, color_scheme):
+        key = (widget._root(), size)
+        atlas = cls._instances.get(key)
+        if atlas is None:
+            atlas = cls(widget._root(), size, color_scheme)
+            cls._instances[key] = atlas
+        return atlas
+
+    def __init__(self, root, size, color_scheme):
+        super().__init__(size, color_scheme)
+        self.root = root
+        self._tiles = {}
+        self._styles = {}
+
+        # 预先计算好的按钮配置，格子更新时直接传入
+        self.hidden = {"image": self.tile("hidden")}
+        self.hover = {"image": self.tile("hover")}
+        self.revealed = {value: {"image": self.tile("revealed", value)}
+                         for value in range(9)}
+        self.flagged = {"image": self.tile("flag")}
+        self.mine = {"image": self.tile("mine")}
+        self.exploded = {"image": self.tile("exploded")}
+
+    def tile(self, kind, value=0, face=None):
+        key = (kind, value, face)
+        image = self._tiles.get(key)
+        if image is None:
+            image = self._render(kind, value, face)
+            self._tiles[key] = image
+        return image
+
+    def tinted(self, kind, value=0, face=None):
+        # 动画和热力图用的变色版本，同样只渲染一次；配置字典也缓存，调用方可以按身份比较
+        key = (kind, value, face)
+        style = self._styles.get(key)
+        if style is None:
+            style = self._styles[key] = {"image": self.tile(kind, value, face)}
+        return style
+
+    def heat(self, probability):
+        # 概率热力图：按10%分档，从绿色(安全)渐变到红色(必雷)
+        level = round(probability * 10)
+        low, high = (0x66, 0xbb, 0x6a), (0xe5, 0x39, 0x35)
+        face = "#" + "".join(f"{round(a + (b - a) * level / 10):02x}" for a, b in zip(low, high))
+        return self.tinted("hidden", face=face)
+
+    def _render(self, kind, value, face):
+        pixels = self.pixels(kind, value, face)
+        image = tk.PhotoImage(master=self.root, width=self.size, height=self.size)
+        image.put(" ".join("{" + " ".join(row) + "}" for row in pixels))
+        return image
+
+class Minesweeper:
+    COLOR_SCHEME = COLOR_SCHEME
+    # 提示格子的高亮颜色和后台分析的时间预算(秒)
+    HINT_SAFE_FACE = "#fff59d"
+    HINT_GUESS_FACE = "#ffcc80"
+    HINT_SECONDS = 1.0
+    # 游戏结束揭示棋盘时每个空闲回调最多检查的格子数，大棋盘分多次绘制不卡界面
+    REVEAL_SLICE = 2000
+    WRONG_FLAG_FACE = "#ffcdd2"
+    LEFTOVER_FACE = "#f5f5f5"
+    # 自动游玩的速度档位(步/秒)，None为尽可能快；每帧间隔和最快档每帧用于走棋的时间上限
+    AUTOPLAY_SPEEDS = (5, 20, 100, 1000, None)
+    FRAME_MS = 16
+    FRAME_SECONDS = 0.012
+
+    def __init__(self, master, rows=10, cols=10, mines=10, on_result=None, interactive=True,
+                 board=None, journal=None, elapsed=0.0, history=None, mode=None):
+        self.master = master
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        # 每局结束时回调，参数为结果字典
+        self.on_result = on_result
+        # 非交互模式下结束时不弹对话框，也不记录对局日志，供脚本和机器人使用
+        self.interactive = interactive
+        # 棋盘存储方式(资源预估选出的MODES之一)，没有传入棋盘和重新开始时按它建棋盘
+        self.mode = mode
+        # 从对局日志恢复时传入重放好的棋盘、原日志、已用时间和悔棋历史
+        self.board = board
+        self.journal = journal
+        self.elapsed = elapsed
+        self.history = history
+        self.cells = []
+        self.hover_cell = None
+        self.heat_enabled = False
+        self.heat = {}
+        self.probabilities = {}
+        # 不在任何约束中的未知格共用一个概率和颜色
+        self.interior_probability = None
+        self.interior_heat = None
+        self.heat_search = None
+        self.hint = None
+        self.hint_cell = None
+        self.hint_style = None
+        self.reveal_cells = None
+        self.reveal_job = None
+        # 爆炸闪烁和胜利动画的定时器，悔棋回到对局中或关闭窗口时和揭示一起取消
+        self.effect_jobs = []
+        self.victory_cells = None
+        self.victory_job = None
+        self.autoplay_job = None
+        self.autoplay_speed = 1
+        self.autoplay_moves = []
+        # 用过自动游玩或悔棋的对局算作练习，不计入成绩
+        self.practice = False
+        self.start_time = None
+        self.styles = CellStyles.get(master)
+        self.cell_size = 28 if self.cols <= 15 else 24
+        self.tiles = TileAtlas.get(master, self.cell_size, self.COLOR_SCHEME)
+        
+        master.configure(bg="#f5f5f5")
+        self.create_widgets()
+        self.init_grid()
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def create_widgets(self):
+        self.master.title("🎯 趣味扫雷 🎯")
+        # 顶部状态栏
+        status_bar = tk.Frame(self.master, bg="#f5f5f5")
+        status_bar.grid(row=0, columnspan=self.cols, sticky="ew")
+        
+        self.flag_label = tk.Label(status_bar, 
+                                 text=f"🚩 {self.mines}",
+                                 font=self.styles.fonts["status"],
+                                 bg="#f5f5f5",
+                                 fg="#d32f2f")
+        self.flag_label.pack(side=tk.LEFT, padx=10)
+        
+        self.timer_label = tk.Label(status_bar, 
+                                  text="⏳ 00:00",
+                                  font=self.styles.fonts["timer"],
+                                  bg="#f5f5f5")
+        self.timer_label.pack(side=tk.RIGHT, padx=10)
+
+        # 地雷概率热力图开关，悬停时显示该格的精确概率
+        self.heat_button = tk.Button(status_bar,
+                                     text="🔥",
+                                     font=self.styles.fonts["timer"],
+                                     relief="flat",
+                                     bg="#f5f5f5",
+                                     command=self.toggle_heatmap)
+        self.heat_button.pack(side=tk.RIGHT)
+
+        # 提示按钮：高亮一个安全格子，没有时高亮风险最低的格子
+        self.hint_button = tk.Button(status_bar,
+                                     text="💡",
+                                     font=self.styles.fonts["timer"],
+                                     relief="flat",
+                                     bg="#f5f5f5",
+                                     command=self.show_hint)
+        self.hint_button.pack(side=tk.RIGHT)
+
+        # 自动游玩：内置的推理玩家按所选速度走棋，速度按钮循环切换档位
+        self.autoplay_button = tk.Button(status_bar,
+                                         text="🤖",
+                                         font=self.styles.fonts["timer"],
+                                         relief="flat",
+                                         bg="#f5f5f5",
+                                         command=self.toggle_autoplay)
+        self.autoplay_button.pack(side=tk.RIGHT)
+        self.speed_button = tk.Button(status_bar,
+                                      text=self.speed_text(),
+                                      font=self.styles.fonts["timer"],
+                                      relief="flat",
+                                      bg="#f5f5f5",
+                                      command=self.cycle_speed)
+        self.speed_button.pack(side=tk.RIGHT)
+        self.prob_label = tk.Label(status_bar,
+                                   text="",
+                                   font=self.styles.fonts["timer"],
+                                   bg="#f5f5f5",
+                                   fg="#616161")
+        self.prob_label.pack(side=tk.RIGHT, padx=5)
+
+        # 游戏网格：整个棋盘是一个Canvas，每个格子是一个图片项
+        # 事件只在Canvas上绑定一次，根据坐标计算格子位置
+        self.pitch = self.cell_size + 1
+        self.canvas = tk.Canvas(self.master,
+                               width=self.cols * self.pitch - 1,
+                               height=self.rows * self.pitch - 1,
+                               bg="#bdbdbd",
+                               highlightthickness=0)
+        self.canvas.grid(row=1, columnspan=self.cols, padx=5, pady=5)
+
+        for r in range(self.rows):
+            row_cells = []
+            for c in range(self.cols):
+                item = self.canvas.create_image(c * self.pitch, r * self.pitch,
+                                               anchor="nw", **self.tiles.hidden)
+                row_cells.append(item)
+            self.cells.append(row_cells)
+
+        self.canvas.bind("<Button-1>", self.on_board_left)
+        self.canvas.bind("<Button-3>", self.on_board_right)
+        self.canvas.bind("<Motion>", self.on_board_motion)
+        self.canvas.bind("<Leave>", self.on_board_leave)
+        # 悔棋/重做，Ctrl+Home回到开局，Ctrl+End回到最新一步
+        for key, move in (("<Control-z>", "U"), ("<Control-y>", "Y"), ("<Control-Z>", "Y"),
+                          ("<Control-Home>", "G0"), ("<Control-End>", "G")):
+            self.master.bind(key, lambda e, move=move: self.step_history(move))
+        
+        self.start_timer()
+
+    def cell_at(self, event):
+        # 把鼠标坐标换算成格子行列，落在棋盘外时返回None
+        x = int(self.canvas.canvasx(event.x))
+        y = int(self.canvas.canvasy(event.y))
+        if x < 0 or y < 0:
+            return None
+        r, c = y // self.pitch, x // self.pitch
+        if r >= self.rows or c >= self.cols:
+            return None
+        return r, c
+
+    def on_board_left(self, event):
+        cell = self.cell_at(event)
+        if cell is not None:
+            self.stop_autoplay()
+            self.left_click(*cell)
+
+    def on_board_right(self, event):
+        cell = self.cell_at(event)
+        if cell is not None:
+            self.stop_autoplay()
+            self.right_click(*cell)
+
+    def on_board_motion(self, event):
+        self.set_hover(self.cell_at(event))
+
+    def on_board_leave(self, event):
+        self.set_hover(None)
+
+    def set_hover(self, cell):
+        # 只重绘离开和进入的两个格子
+        previous = self.hover_cell
+        if cell == previous:
+            return
+        self.hover_cell = cell
+        state = self.board.state
+        if previous is not None and state[previous[0]][previous[1]] == HIDDEN:
+            self.paint(*previous, self.hidden_style(*previous))
+        if cell is not None and state[cell[0]][cell[1]] == HIDDEN:
+            self.paint(*cell, self.tiles.hover)
+        if self.heat_enabled:
+            probability = self.probabilities.get(cell)
+            if probability is None and cell is not None and self.analyzer.is_interior(*cell):
+                probability = self.interior_probability
+            self.prob_label.config(text="" if probability is None else f"🎲 {probability:.1%}")
+
+    def hidden_style(self, r, c):
+        if self.hover_cell == (r, c):
+            return self.tiles.hover
+        if self.hint_cell == (r, c):
+            return self.hint_style
+        style = self.heat.get((r, c))
+        if style is not None:
+            return style
+        if self.interior_heat is not None and self.analyzer.is_interior(r, c):
+            return self.interior_heat
+        return self.tiles.hidden
+
+    def toggle_heatmap(self):
+        self.heat_enabled = not self.heat_enabled
+        self.heat_button.config(relief="sunken" if self.heat_enabled else "flat")
+        self.prob_label.config(text="")
+        self.update_heatmap()
+
+    def show_hint(self):
+        if self.board.status != "playing":
+            return
+        self.cancel_hint()
+        # 首次点击必定安全；已能推理出安全格时直接给出，不启动后台分析
+        if self.board.first_click:
+            self.highlight_hint((self.rows // 2, self.cols // 2), 0.0)
+            return
+        safe, _ = self.analyzer.deductions()
+        if safe:
+            self.highlight_hint(min(safe), 0.0)
+            return
+        self.prob_label.config(text="💡 分析中…")
+        self.hint = HintSearch(self.board.view(), self.mines, self.HINT_SECONDS).start()
+        self.poll_hint(self.hint)
+
+    def poll_hint(self, search):
+        # 分析线程不碰Tk，这里定期读取结果；超出预算就取消并显示目前最好的答案
+        if search is not self.hint:
+            return
+        if not search.done and time.monotonic() < search.budget.deadline:
+            self.master.after(30, self.poll_hint, search)
+            return
+        search.cancel()
+        self.hint = None
+        if search.best is not None:
+            self.highlight_hint(*search.best)
+        else:
+            self.prob_label.config(text="")
+
+    def highlight_hint(self, cell, probability):
+        self.hint_cell = cell
+        face = self.HINT_SAFE_FACE if probability == 0 else self.HINT_GUESS_FACE
+        self.hint_style = self.tiles.tinted("hidden", face=face)
+        self.paint(*cell, self.hidden_style(*cell))
+        self.prob_label.config(text="💡 安全" if probability == 0 else f"💡 {probability:.1%}")
+
+    def cancel_hint(self):
+        # 玩家一有操作就立即取消正在进行的分析并清除高亮
+        if self.hint is not None:
+            self.hint.cancel()
+            self.hint = None
+        cell, self.hint_cell = self.hint_cell, None
+        if cell is not None:
+            if self.board.state[cell[0]][cell[1]] == HIDDEN:
+                self.paint(*cell, self.hidden_style(*cell))
+            self.prob_label.config(text="")
+
+    def speed_text(self):
+        speed = self.AUTOPLAY_SPEEDS[self.autoplay_speed]
+        return "⏩" if speed is None else f"×{speed}"
+
+    def cycle_speed(self):
+        self.autoplay_speed = (self.autoplay_speed + 1) % len(self.AUTOPLAY_SPEEDS)
+        self.speed_button.config(text=self.speed_text())
+        self.autoplay_credit = 0.0
+
+    def toggle_autoplay(self):
+        if self.autoplay_job is not None:
+            self.stop_autoplay()
+        elif self.board.status == "playing":
+            self.start_autoplay()
+
+    def start_autoplay(self):
+        self.cancel_hint()
+        self.practice = True
+        self.autoplay_moves = []
+        self.autoplay_count = 0
+        self.autoplay_credit = 0.0
+        self.autoplay_started = self.autoplay_last = time.monotonic()
+        self.autoplay_button.config(relief="sunken")
+        self.autoplay_job = self.master.after(self.FRAME_MS, self.autoplay_frame)
+
+    def stop_autoplay(self):
+        if self.autoplay_job is not None:
+            self.master.after_cancel(self.autoplay_job)
+            self.autoplay_job = None
+            self.autoplay_button.config(relief="flat")
+
+    def autoplay_frame(self):
+        # 每帧先在棋盘上走完这一帧的所有步，记下变化的格子，最后统一重绘一次
+        self.autoplay_job = None
+        board = self.board
+        now = time.monotonic()
+        speed = self.AUTOPLAY_SPEEDS[self.autoplay_speed]
+        if speed is None:
+            quota = float("inf")
+            deadline = time.perf_counter() + self.FRAME_SECONDS
+        else:
+            self.autoplay_credit += speed * (now - self.autoplay_last)
+            quota = int(self.autoplay_credit)
+            self.autoplay_credit -= quota
+            deadline = float("inf")
+        self.autoplay_last = now
+
+        changed = set()
+        applied = 0
+        stuck = False
+        while applied < quota and board.status == "playing" and time.perf_counter() < deadline:
+            if not self.autoplay_moves:
+                # 每批操作出手前都按棋盘核对一遍分析器(见player_moves)
+                self.autoplay_moves = player_moves(board, self.analyzer)[::-1]
+                if not self.autoplay_moves:
+                    stuck = True
+                    break
+            move, r, c = self.autoplay_moves.pop()
+            # 前面的步骤展开空白区域时可能已经揭开了这个格子
+            if board.state[r][c] != HIDDEN:
+                continue
+            if move == "L":
+                cells = self.history.left_click(r, c)
+                self.analyzer.observe_board(board, cells)
+                changed.update(cells)
+            elif self.history.right_click(r, c):
+                self.analyzer.observe_board(board, [(r, c)])
+                changed.add((r, c))
+            self.log_move(move, r, c)
+            applied += 1
+
+        self.autoplay_count += applied
+        self.paint_cells(changed)
+        self.flag_label.config(text=f"🚩 剩余雷数: {self.mines - board.flags}")
+        if self.heat_enabled:
+            self.update_heatmap()
+        elapsed = time.monotonic() - self.autoplay_started
+        if elapsed > 0:
+            self.prob_label.config(text=f"🤖 {self.autoplay_count / elapsed:,.0f} 步/秒")
+
+        if board.status == "lost":
+            self.stop_autoplay()
+            self.game_over()
+        elif board.status == "won":
+            self.stop_autoplay()
+            self.check_win()
+        elif stuck:
+            self.stop_autoplay()
+        else:
+            self.autoplay_job = self.master.after(self.FRAME_MS, self.autoplay_frame)
+
+    def paint_cells(self, cells):
+        board = self.board
+        for r, c in cells:
+            state = board.state[r][c]
+            if state == OPENED:
+                self.paint(r, c, self.tiles.revealed[board.grid[r][c]])
+            elif state == FLAGGED:
+                self.paint(r, c, self.tiles.flagged)
+            else:
+                self.paint(r, c, self.hidden_style(r, c))
+
+    def update_heatmap(self):
+        # 概率和提示一样在后台线程按时间预算计算，界面线程只更新约束索引；每次操作都取消上一次计算
+        self.cancel_heatmap()
+        if self.heat_enabled and self.board.status == "playing":
+            task = self.analyzer.probability_task()
+            self.heat_search = ProbabilitySearch(task, self.HINT_SECONDS).start()
+            self.poll_heatmap(self.heat_search)
+        else:
+            self.apply_heatmap({}, None)
+
+    def poll_heatmap(self, search):
+        if search is not self.heat_search:
+            return
+        if not search.done and time.monotonic() < search.budget.deadline:
+            self.master.after(30, self.poll_heatmap, search)
+            return
+        search.cancel()
+        self.heat_search = None
+        if not search.done:
+            # 超时：线程可能还在写结果，不取回分量，清掉已经过期的颜色
+            self.apply_heatmap({}, None)
+            self.prob_label.config(text="🎲 超时")
+            return
+        self.analyzer.install(search.task)
+        if search.finished:
+            self.apply_heatmap(search.task.probabilities, search.task.interior_probability)
+        else:
+            self.apply_heatmap({}, None)
+
+    def cancel_heatmap(self):
+        if self.heat_search is not None:
+            self.heat_search.cancel()
+            self.heat_search = None
+
+    def apply_heatmap(self, probabilities, interior):
+        # 只重绘颜色档位发生变化的格子；内部格的档位变化时才扫描一遍全盘
+        self.probabilities = probabilities
+        self.interior_probability = interior
+        heat = {cell: self.tiles.heat(p) for cell, p in probabilities.items()}
+        previous, self.heat = self.heat, heat
+        interior_heat = None if interior is None else self.tiles.heat(interior)
+        previous_interior, self.interior_heat = self.interior_heat, interior_heat
+        state = self.board.state
+        for cell in previous.keys() | heat.keys():
+            if previous.get(cell) is not heat.get(cell) and state[cell[0]][cell[1]] == HIDDEN:
+                self.paint(*cell, self.hidden_style(*cell))
+        if previous_interior is not interior_heat:
+            for r in range(self.rows):
+                row = state[r]
+                for c in range(self.cols):
+                    if row[c] == HIDDEN and (r, c) not in heat and self.analyzer.is_interior(r, c):
+                        self.paint(r, c, self.hidden_style(r, c))
+
+    def paint(self, r, c, style):
+        self.canvas.itemconfig(self.cells[r][c], **style)
+
+    def start_timer(self):
+        self.start_time = time.time() - self.elapsed
+        self.update_timer()
+
+    def update_timer(self):
+        elapsed = int(time.time() - self.start_time)
+        self.timer_label.config(text=f"⏳ {elapsed//60:02d}:{elapsed%60:02d}")
+        self.timer_job = self.master.after(1000, self.update_timer)
+
+    def init_grid(self):
+        resumed = self.board is not None
+        if not resumed:
+            self.board = build_board(self.mode, self.rows, self.cols, self.mines)
+        if self.journal is None and self.interactive:
+            self.journal = GameJournal.start(self.board)
+        if self.history is None:
+            self.history = History(self.board)
+        # 增量分析器跟随每一步更新，分析时只重算受影响的部分
+        self.analyzer = FrontierAnalyzer(self.rows, self.cols, self.mines)
+        if resumed:
+            self.repaint_board()
+
+    def repaint_board(self):
+        # 恢复的对局：按重放后的状态一次性画出整个棋盘
+        board = self.board
+        opened = []
+        for r in range(self.rows):
+            for c in range(self.cols):
+                state = board.state[r][c]
+                if state == OPENED:
+                    opened.append((r, c))
+                    self.paint(r, c, self.tiles.revealed[board.grid[r][c]])
+                elif state == FLAGGED:
+                    self.paint(r, c, self.tiles.flagged)
+        self.analyzer.observe_board(board, opened)
+        self.flag_label.config(text=f"🚩 剩余雷数: {self.mines - board.flags}")
+
+    def log_move(self, move, r, c):
+        # 只是一次队列put，写盘和fsync在后台线程分批进行
+        if self.journal is not None:
+            self.journal.log(move, r, c, time.time() - self.start_time)
+
+    @property
+    def status(self):
+        return self.board.status
+
+    def left_click(self, r, c):
+        self.cancel_hint()
+        opened = self.history.left_click(r, c)
+        self.log_move("L", r, c)
+        self.analyzer.observe_board(self.board, opened)
+        for cell in opened:
+            self.paint(*cell, self.tiles.revealed[self.board.grid[cell[0]][cell[1]]])
+
+        if self.heat_enabled:
+            self.update_heatmap()
+        if self.board.status == "lost":
+            self.game_over()
+        elif opened:
+            self.check_win()
+
+    def right_click(self, r, c):
+        self.cancel_hint()
+        changed = self.history.right_click(r, c)
+        self.log_move("R", r, c)
+        if changed:
+            self.analyzer.observe_board(self.board, [(r, c)])
+            if self.board.state[r][c] == FLAGGED:
+                self.paint(r, c, self.tiles.flagged)
+            else:
+                self.paint(r, c, self.hidden_style(r, c))
+            if self.heat_enabled:
+                self.update_heatmap()
+        self.flag_label.config(text=f"🚩 剩余雷数: {self.mines - self.board.flags}")
+
+    def step_history(self, move):
+        # 悔棋(U)、重做(Y)、回到开局(G0)、回到最新一步(G)：只重绘这几步涉及的格子，一次批量完成
+        history = self.history
+        board = self.board
+        position = 0
+        if move == "G":
+            position = len(history.steps)
+        elif move == "G0":
+            move = "G"
+        ended = board.status != "playing"
+        changed = history.play(move, position, 0)
+        if not changed:
+            return
+        self.stop_autoplay()
+        self.cancel_hint()
+        self.practice = True
+        if ended:
+            self.resume_play()
+        self.analyzer.retract(board, changed)
+        self.paint_cells(changed)
+        self.flag_label.config(text=f"🚩 剩余雷数: {self.mines - board.flags}")
+        if self.heat_enabled:
+            self.update_heatmap()
+        self.log_move(move, position, 0)
+        if board.status == "lost":
+            self.game_over()
+        elif board.status == "won":
+            self.check_win()
+
+    def resume_play(self):
+        # 结束后悔棋回到对局中：停止揭示，盖回所有未揭开的格子；日志已在结束时删除，按历史重新写一份
+        self.stop_reveal()
+        board = self.board
+        self.paint_cells([(r, c) for r in range(self.rows) for c in range(self.cols)
+                          if board.state[r][c] != OPENED])
+        if self.interactive:
+            self.journal = GameJournal.start(board)
+            for move, r, c in self.history.moves():
+                self.log_move(move, r, c)
+
+    def check_win(self):
+        if self.board.status == "won":
+            self.report_result(True)
+            self.start_reveal(True)
+            self.show_victory_animation()
+            if not self.interactive:
+                return
+            if messagebox.askyesno("🎉 胜利！", "恭喜扫雷成功！\n\n再玩一局吗？", 
+                                  icon="info", parent=self.master):
+                self.restart_game()
+            else:
+                self.close_window()
+
+    def game_over(self):
+        self.show_mine_explosion()
+        if not self.interactive:
+            self.report_result(False)
+            return
+        # 揭示在空闲回调中分片进行，对话框立即弹出，绘制在对话框后面继续
+        answer = messagebox.askyesnocancel("💥 游戏结束",
+                                           "很遗憾踩到地雷了！\n\n再试一次吗？\n(取消：悔一步继续练习)",
+                                           icon="warning", parent=self.master)
+        # 悔一步继续练习时这一局不计入战绩，日志照常归档
+        if answer is None:
+            self.practice = True
+        self.report_result(False)
+        if answer:
+            self.restart_game()
+        elif answer is None:
+            self.step_history("U")
+        else:
+            self.close_window()
+
+    def end_styles(self, won):
+        # 逐格给出结束时的样式：未标记的雷、插错的旗子和剩余的数字；无需重绘的格子给出None
+        board = self.board
+        tiles = self.tiles
+        for r in range(self.rows):
+            for c in range(self.cols):
+                state = board.state[r][c]
+                if state == OPENED or (r, c) == board.exploded:
+                    yield None
+                    continue
+                mine = board.grid[r][c] == MINE
+                if state == FLAGGED:
+                    style = None if mine else tiles.tinted("flag", face=self.WRONG_FLAG_FACE)
+                elif mine:
+                    style = tiles.flagged if won else tiles.mine
+                else:
+                    style = tiles.tinted("revealed", board.value(r, c), self.LEFTOVER_FACE)
+                yield None if style is None else (r, c, style)
+
+    def start_reveal(self, won):
+        self.stop_reveal()
+        self.reveal_cells = self.end_styles(won)
+        self.reveal_step()
+
+    def reveal_step(self):
+        self.reveal_job = None
+        checked = 0
+        for item in itertools.islice(self.reveal_cells, self.REVEAL_SLICE):
+            checked += 1
+            if item is not None:
+                self.paint(*item)
+        if checked == self.REVEAL_SLICE:
+            self.reveal_job = self.master.after_idle(self.reveal_step)
+        else:
+            self.reveal_cells = None
+
+    def stop_reveal(self):
+        if self.reveal_job is not None:
+            self.master.after_cancel(self.reveal_job)
+            self.reveal_job = None
+        self.reveal_cells = None
+        for job in self.effect_jobs:
+            self.master.after_cancel(job)
+        self.effect_jobs = []
+        if self.victory_job is not None:
+            self.master.after_cancel(self.victory_job)
+            self.victory_job = None
+        self.victory_cells = None
+
+    def close_window(self):
+        self.cancel_heatmap()
+        self.stop_autoplay()
+        self.stop_reveal()
+        self.master.destroy()
+
+    def report_result(self, won):
+        if self.journal is not None:
+            self.journal.finish()
+            self.journal = None
+        if self.on_result is None or self.practice:
+            return
+        board = self.board
+        result = {
+            "rows": self.rows,
+            "cols": self.cols,
+            "mines": self.mines,
+            "seed": board.seed,
+            "won": won,
+            "time": round(time.time() - self.start_time, 3),
+            "clicks": board.clicks,
+            "bbbv": None,
+            "openings": None,
+            "finished_at": time.time(),
+        }
+        if board.labels_ready():
+            result["bbbv"], result["openings"] = board.bbbv(), board.openings()
+        else:
+            # 延迟计数的大棋盘要补齐所有数字才能统计3BV：界面线程只复制数字表，统计在后台线程进行，
+            # 算完再交给on_result(队列put/写管道，可在任意线程调用)；稀疏棋盘不统计
+            grid = board.grid_copy()
+            if grid is not None:
+                threading.Thread(target=self.report_stats, args=(result, grid), name=STATS_THREAD,
+                                 daemon=True).start()
+                return
+        self.on_result(result)
+
+    def report_stats(self, result, grid):
+        result["bbbv"], result["openings"] = board_stats(self.rows, self.cols, grid)
+        self.on_result(result)
+
+    def view(self):
+        return self.board.view()
+
+    async def click(self, r, c):
+        return await self.apply_async(self.left_click, r, c)
+
+    async def flag(self, r, c):
+        return await self.apply_async(self.right_click, r, c)
+
+    async def apply_async(self, move, r, c):
+        # 操作交给Tk事件处理执行，执行完成后才完成Future，与玩家输入严格串行
+        future = asyncio.get_running_loop().create_future()
+
+        def apply():
+            if future.done():
+                return
+            try:
+                move(r, c)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(self.status)
+
+        self.master.after_idle(apply)
+        return await future
+
+    def show_mine_explosion(self):
+        # 踩中的雷立即显示并闪烁，其余的雷交给分片揭示
+        colors = ["#ff0000", "#ff4444", "#ff8888"]
+        r, c = self.board.exploded
+        self.paint(r, c, self.tiles.exploded)
+        self.start_reveal(False)
+        for i, color in enumerate(colors):
+            self.effect_jobs.append(self.master.after(100*i, lambda color=color:
+                                    self.paint(r, c, self.tiles.tinted("exploded", face=color))))
+
+    def show_victory_animation(self):
+        # 胜利动画效果：已揭开的格子轮流换色，每次换色与揭示一样在空闲回调中按REVEAL_SLICE分片重绘
+        colors = ["#4CAF50", "#81C784", "#A5D6A7"]
+        for i, color in enumerate(colors * 2):
+            self.effect_jobs.append(self.master.after(200*i, self.victory_frame, color))
+
+    def victory_frame(self, color):
+        # 上一种颜色还没画完时直接改画新的颜色
+        board = self.board
+        self.victory_cells = ((r, c, self.tiles.tinted("revealed", board.grid[r][c], color))
+                              for r in range(self.rows) for c in range(self.cols)
+                              if board.state[r][c] == OPENED)
+        if self.victory_job is None:
+            self.victory_step()
+
+    def victory_step(self):
+        self.victory_job = None
+        painted = 0
+        for item in itertools.islice(self.victory_cells, self.REVEAL_SLICE):
+            painted += 1
+            self.paint(*item)
+        if painted == self.REVEAL_SLICE:
+            self.victory_job = self.master.after_idle(self.victory_step)
+        else:
+            self.victory_cells = None
+
+    def restart_game(self):
+        self.close_window()
+        new_window = tk.Toplevel()
+        Minesweeper(new_window, self.rows, self.cols, self.mines, self.on_result,
+                    interactive=self.interactive, mode=self.mode)
+
+    def on_close(self):
+        if messagebox.askokcancel("退出", "确定要退出游戏吗？", parent=self.master):
+            # 主动退出的对局不再提供恢复
+            if self.journal is not None:
+                self.journal.discard()
+                self.journal = None
+            self.close_window()
+
+class EndlessGame:
+    # 无尽模式：固定大小的视口在无限棋盘上滚动，画布上始终只有视口内的格子
+    VIEW_ROWS = 20
+    VIEW_COLS = 30
+    CELL_SIZE = 24
+    SCROLL_STEP = 4
+
+    def __init__(self, master, seed=None):
+        self.master = master
+        self.board = EndlessBoard(seed)
+        self.styles = CellStyles.get(master)
+        self.tiles = TileAtlas.get(master, self.CELL_SIZE, Minesweeper.COLOR_SCHEME)
+        self.pitch = self.CELL_SIZE + 1
+        # 视口左上角在棋盘上的坐标，起点(0, 0)放在视口中央
+        self.top = -(self.VIEW_ROWS // 2)
+        self.left = -(self.VIEW_COLS // 2)
+        self.cells = []
+        # 每个图片项当前显示的样式，滚动时只重绘发生变化的项
+        self.shown = {}
+        self.drag_origin = None
+        master.configure(bg="#f5f5f5")
+        self.create_widgets()
+        self.board.left_click(0, 0)
+        self.refresh()
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def create_widgets(self):
+        self.master.title("♾️ 无尽扫雷")
+        status_bar = tk.Frame(self.master, bg="#f5f5f5")
+        status_bar.pack(fill=tk.X)
+        self.score_label = tk.Label(status_bar, text="", font=self.styles.fonts["status"],
+                                    bg="#f5f5f5", fg="#388e3c")
+        self.score_label.pack(side=tk.LEFT, padx=10)
+        self.position_label = tk.Label(status_bar, text="", font=self.styles.fonts["timer"],
+                                       bg="#f5f5f5", fg="#616161")
+        self.position_label.pack(side=tk.RIGHT, padx=10)
+
+        self.canvas = tk.Canvas(self.master,
+                                width=self.VIEW_COLS * self.pitch - 1,
+                                height=self.VIEW_ROWS * self.pitch - 1,
+                                bg="#bdbdbd",
+                                highlightthickness=0)
+        self.canvas.pack(padx=5, pady=5)
+        for r in range(self.VIEW_ROWS):
+            self.cells.append([self.canvas.create_image(c * self.pitch, r * self.pitch,
+                                                        anchor="nw", **self.tiles.hidden)
+                               for c in range(self.VIEW_COLS)])
+
+        self.canvas.bind("<Button-1>", self.on_board_left)
+        self.canvas.bind("<Button-3>", self.on_board_right)
+        # 中键拖动或方向键/WASD滚动视口
+        self.canvas.bind("<Button-2>", self.on_drag_start)
+        self.canvas.bind("<B2-Motion>", self.on_drag)
+        for keys, dr, dc in ((("<Up>", "w"), -1, 0), (("<Down>", "s"), 1, 0),
+                             (("<Left>", "a"), 0, -1), (("<Right>", "d"), 0, 1)):
+            for key in keys:
+                self.master.bind(key, lambda e, dr=dr, dc=dc: self.scroll(dr * self.SCROLL_STEP,
+                                                                          dc * self.SCROLL_STEP))
+
+    def cell_at(self, event):
+        r, c = event.y // self.pitch, event.x // self.pitch
+        if 0 <= r < self.VIEW_ROWS and 0 <= c < self.VIEW_COLS:
+            return self.top + r, self.left + c
+        return None
+
+    def on_board_left(self, event):
+        cell = self.cell_at(event)
+        if cell is not None and self.board.status == "playing":
+            self.board.left_click(*cell)
+            self.refresh()
+            if self.board.status == "lost":
+                self.game_over()
+
+    def on_board_right(self, event):
+        cell = self.cell_at(event)
+        if cell is not None and self.board.right_click(*cell):
+            self.refresh()
+
+    def on_drag_start(self, event):
+        self.drag_origin = (event.x, event.y)
+
+    def on_drag(self, event):
+        # 拖过整格才滚动，余下的像素留到下次
+        x, y = self.drag_origin
+        dc, dr = (x - event.x) // self.pitch, (y - event.y) // self.pitch
+        if dr or dc:
+            self.drag_origin = (x - dc * self.pitch, y - dr * self.pitch)
+            self.scroll(dr, dc)
+
+    def scroll(self, dr, dc):
+        self.top += dr
+        self.left += dc
+        self.refresh()
+
+    def style(self, value):
+        if value is None:
+            return self.tiles.hidden
+        if value == "F":
+            return self.tiles.flagged
+        if value == MINE:
+            return self.tiles.mine
+        return self.tiles.revealed[value]
+
+    def refresh(self, reveal_mines=False):
+        view = self.board.view(self.top, self.left, self.VIEW_ROWS, self.VIEW_COLS)
+        for r, row in enumerate(view):
+            for c, value in enumerate(row):
+                cell = (self.top + r, self.left + c)
+                if cell == self.board.exploded:
+                    style = self.tiles.exploded
+                elif reveal_mines and value is None and self.board.is_mine(*cell):
+                    style = self.tiles.mine
+                else:
+                    style = self.style(value)
+                item = self.cells[r][c]
+                if self.shown.get(item) is not style:
+                    self.shown[item] = style
+                    self.canvas.itemconfig(item, **style)
+        # 视口以外的区块压缩或落盘，内存占用不随探索范围增长
+        self.board.focus(self.top, self.left, self.VIEW_ROWS, self.VIEW_COLS)
+        self.score_label.config(text=f"✅ 已揭开 {self.board.opened}  🚩 {self.board.flags}")
+        self.position_label.config(text=f"📍 ({self.top + self.VIEW_ROWS // 2}, "
+                                        f"{self.left + self.VIEW_COLS // 2})")
+
+    def game_over(self):
+        self.refresh(reveal_mines=True)
+        if messagebox.askyesno("💥 游戏结束",
+                               f"踩到地雷了！本次共揭开 {self.board.opened} 格。\n\n再来一局吗？",
+                               icon="warning", parent=self.master):
+            self.board.close()
+            self.master.destroy()
+            EndlessGame(tk.Toplevel())
+        else:
+            self.on_close()
+
+    def on_close(self):
+        self.board.close()
+        self.master.destroy()
+
+class DifficultySelector:
+    THEME_COLORS = {
+        "background": "#f0f2f5",
+        "button_bg": "#ffffff",
+        "button_fg": "#2d3436",
+        "hover_bg": "#dfe6e9"
+    }
+
+    def __init__(self, master):
+        self.master = master
+        self.master.title("⚙️ 扫雷 - 难度选择")
+        self.master.geometry("400x680")
+        self.master.resizable(False, False)
+        self.master.configure(bg=self.THEME_COLORS["background"])
+        self.isolated = tk.BooleanVar(master, value=False)
+        self.processes = []
+        self.results = queue.Queue()
+        self.played = 0
+        self.won = 0
+        self.last_difficulty = None
+        self.stats_store = StatsStore()
+        # 本次运行的流式统计，不随对局数增长
+        self.session = SessionStats()
+        # 每个Canvas图片项的(创建耗时, 字节数)，第一次开自定义棋盘时实测
+        self.canvas_costs = None
+        self.create_widgets()
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_results()
+        self.master.after_idle(self.offer_resume)
+
+    def create_widgets(self):
+        header = tk.Label(self.master, 
+                         text="选择游戏难度",
+                         font=("微软雅黑", 14, "bold"),
+                         bg=self.THEME_COLORS["background"],
+                         fg="#2d3436")
+        header.pack(pady=15)
+
+        difficulties = [
+            ("🍀 简单模式 (9×9, 10雷)", 9, 9, 10, "#4CAF50"),
+            ("🎯 中等模式 (16×16, 40雷)", 16, 16, 40, "#FF9800"),
+            ("💣 困难模式 (30×16, 99雷)", 16, 30, 99, "#D32F2F")
+        ]
+
+        for text, r, c, m, color in difficulties:
+            btn = tk.Button(self.master,
+                           text=text,
+                           width=25,
+                           font=("微软雅黑", 11),
+                           bg=self.THEME_COLORS["button_bg"],
+                           fg=color,  # 初始文字颜色
+                           activebackground=color,
+                           activeforeground="white",
+                           relief="groove",
+                           borderwidth=2,
+                           padx=10,
+                           pady=5)
+            
+            # 保存原始颜色到按钮属性
+            btn.original_bg = self.THEME_COLORS["button_bg"]
+            btn.original_fg = color
+            
+            btn.config(command=lambda r=r, c=c, m=m: self.start_game(r, c, m))
+            btn.pack(pady=6, ipady=3)
+            
+            # 修改事件绑定
+            btn.bind("<Enter>", lambda e, btn=btn: btn.config(
+                bg=btn.original_fg,  # 使用按钮保存的原始前景色作为悬停背景
+                fg="white"
+            ))
+            btn.bind("<Leave>", lambda e, btn=btn: btn.config(
+                bg=btn.original_bg,  # 恢复原始背景色
+                fg=btn.original_fg    # 恢复原始文字颜色
+            ))
+
+        endless_btn = tk.Button(self.master,
+                                text="♾️ 无尽模式",
+                                width=25,
+                                font=("微软雅黑", 11),
+                                bg=self.THEME_COLORS["button_bg"],
+                                fg="#00796b",
+                                relief="groove",
+                                borderwidth=2,
+                                padx=10,
+                                pady=5,
+                                command=lambda: EndlessGame(tk.Toplevel(self.master)))
+        endless_btn.pack(pady=6, ipady=3)
+        self.add_hover_effect(endless_btn, "#00796b")
+
+        daily_btn = tk.Button(self.master,
+                              text="📅 每日挑战",
+                              width=25,
+                              font=("微软雅黑", 11),
+                              bg=self.THEME_COLORS["button_bg"],
+                              fg="#6a1b9a",
+                              relief="groove",
+                              borderwidth=2,
+                              padx=10,
+                              pady=5,
+                              command=self.start_daily)
+        daily_btn.pack(pady=6, ipady=3)
+        self.add_hover_effect(daily_btn, "#6a1b9a")
+
+        # 自定义设置区域
+        custom_frame = tk.Frame(self.master, bg=self.THEME_COLORS["background"])
+        custom_frame.pack(pady=15, padx=20)
+
+        entries = [
+            ("📏 行数:", "rows_entry", 10),
+            ("📐 列数:", "cols_entry", 10),
+            ("💥 地雷数:", "mines_entry", 10)
+        ]
+
+        for label_text, entry_name, default in entries:
+            frame = tk.Frame(custom_frame, bg=self.THEME_COLORS["background"])
+            frame.pack(fill=tk.X, pady=4)
+            
+            tk.Label(frame, 
+                    text=label_text,
+                    font=("微软雅黑", 10),
+                    bg=self.THEME_COLORS["background"],
+                    fg="#2d3436").pack(side=tk.LEFT, padx=5)
+            
+            entry = tk.Entry(frame, 
+                            width=8,
+                            font=("Arial", 10),
+                            relief="solid",
+                            borderwidth=1)
+            entry.insert(0, str(default))
+            entry.pack(side=tk.RIGHT)
+            setattr(self, entry_name, entry)
+
+        # 自定义游戏按钮
+        custom_btn = tk.Button(self.master,
+                              text="🎮 开始自定义游戏",
+                              font=("微软雅黑", 11, "bold"),
+                              bg="#2196F3",
+                              fg="white",
+                              activebackground="#1976D2",
+                              relief="groove",
+                              command=self.start_custom_game)
+        custom_btn.pack(pady=15, ipadx=10, ipady=5)
+        
+        # 为自定义按钮添加悬停效果
+        custom_btn.original_bg = "#2196F3"
+        custom_btn.original_fg = "white"
+        custom_btn.bind("<Enter>", lambda e: custom_btn.config(bg="#1976D2"))
+        custom_btn.bind("<Leave>", lambda e: custom_btn.config(bg=custom_btn.original_bg))
+
+        # 独立进程选项：每局游戏运行在自己的解释器里，互不阻塞
+        tk.Checkbutton(self.master,
+                       text="🧩 每局游戏使用独立进程",
+                       variable=self.isolated,
+                       font=("微软雅黑", 10),
+                       bg=self.THEME_COLORS["background"],
+                       activebackground=self.THEME_COLORS["background"]).pack()
+
+        self.stats_label = tk.Label(self.master,
+                                    text="📊 已完成 0 局 | 胜利 0 局",
+                                    font=("微软雅黑", 10),
+                                    bg=self.THEME_COLORS["background"],
+                                    fg="#636e72")
+        self.stats_label.pack(pady=4)
+
+        tk.Button(self.master,
+                  text="🏆 最佳成绩",
+                  font=("微软雅黑", 10),
+                  bg=self.THEME_COLORS["button_bg"],
+                  fg="#2d3436",
+                  relief="groove",
+                  command=self.show_records).pack(pady=4)
+
+    def add_hover_effect(self, widget, hover_color):
+        original_bg = widget.cget("bg")
+        widget.bind("<Enter>", lambda e: widget.config(bg=hover_color, fg="white"))
+        widget.bind("<Leave>", lambda e: widget.config(bg=original_bg, fg=hover_color))
+
+    def validate_input(self, rows, cols, mines):
+        # 棋盘大小不设上限，能否打开由资源预估决定
+        if rows < 1 or cols < 1:
+            raise ValueError("行数和列数必须大于0")
+        if mines <= 0:
+            raise ValueError("地雷数必须大于0")
+        if mines >= rows * cols:
+            raise ValueError("地雷数不能超过总格子数")
+        return True
+
+    def start_game(self, rows, cols, mines, mode=None):
+        # mode为资源预估选出的存储方式；独立进程模式下交给子进程去建棋盘
+        if self.isolated.get():
+            self.start_game_process(rows, cols, mines, mode)
+            return
+        game_window = tk.Toplevel(self.master)
+        Minesweeper(game_window, rows=rows, cols=cols, mines=mines, on_result=self.results.put,
+                    mode=mode)
+
+    def start_daily(self):
+        # 当天的布局已缓存时直接载入；开局格子替玩家点开，并照常写入对局日志
+        entry = get_challenge()
+        game_window = tk.Toplevel(self.master)
+        game = Minesweeper(game_window, entry["rows"], entry["cols"], entry["mines"],
+                           on_result=self.results.put, board=open_board(entry))
+        game.left_click(*entry["opening"])
+        game_window.title(f"📅 每日挑战 {entry['date']} (3BV {entry['bbbv']})")
+
+    def offer_resume(self):
+        # 上次异常退出时未完成的对局：重放日志恢复局面，或者放弃并删除日志
+        games = unfinished_games()
+        if not games:
+            return
+        if messagebox.askyesno("♻️ 恢复对局",
+                               f"发现 {len(games)} 局上次未完成的游戏，是否继续？",
+                               parent=self.master):
+            for journal, history, elapsed in games:
+                board = history.board
+                Minesweeper(tk.Toplevel(self.master), board.rows, board.cols, board.mines,
+                            on_result=self.results.put, board=board,
+                            journal=journal, elapsed=elapsed, history=history)
+        else:
+            for journal, _, _ in games:
+                journal.discard()
+
+    def start_game_process(self, rows, cols, mines, mode=None):
+        # 子进程通过stdout逐行发送JSON结果，stdin关闭即通知子进程退出
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__),
+             "--game", str(rows), str(cols), str(mines)] + ([mode] if mode else []),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.processes.append(proc)
+        threading.Thread(target=self.read_child, args=(proc,), daemon=True).start()
+
+    def read_child(self, proc):
+        # 后台线程只负责读管道，结果交给Tk线程处理
+        for line in proc.stdout:
+            try:
+                self.results.put(json.loads(line))
+            except ValueError:
+                continue
+        proc.wait()
+
+    def poll_results(self):
+        changed = False
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.played += 1
+            self.won += bool(result.get("won"))
+            self.stats_store.record(result)
+            self.session.record(result)
+            self.last_difficulty = (result["rows"], result["cols"], result["mines"])
+            changed = True
+        self.processes = [proc for proc in self.processes if proc.poll() is None]
+        if changed:
+            self.stats_label.config(text=self.stats_text())
+        self.master.after(200, self.poll_results)
+
+    def stats_text(self):
+        # 总局数之下是最近一局所在难度的本次会话流式统计，每批结果到达时更新
+        text = f"📊 已完成 {self.played} 局 | 胜利 {self.won} 局"
+        if self.last_difficulty is None:
+            return text
+        rows, cols, mines = self.last_difficulty
+        summary = self.session.difficulties[self.last_difficulty].summary()
+        parts = [f"{rows}×{cols} {mines}雷  本次 {summary['games']}局  胜率 {summary['win_rate']:.0%}"]
+        if summary["median_time"] is not None:
+            parts.append(f"中位 {summary['median_time']:.1f}秒")
+        if summary["bbbv_per_second"] is not None:
+            parts.append(f"3BV/s {summary['bbbv_per_second']:.2f}")
+        return text + "\n" + "  ".join(parts)
+
+    def show_records(self):
+        lines = []
+        for name, rows, cols, mines in (("简单", 9, 9, 10), ("中等", 16, 16, 40), ("困难", 16, 30, 99)):
+            best = self.stats_store.best_times(rows, cols, mines, limit=3)
+            times = "、".join(f"{duration:.1f}秒" for duration, *_ in best) or "暂无"
+            lines.append(f"{name}: {times}")
+        lines.append("")
+        lines.append("最近对局:")
+        for _, rows, cols, mines, _, duration, clicks, bbbv, won, openings in self.stats_store.recent(5):
+            lines.append(f"{rows}×{cols} {mines}雷  {'胜利' if won else '失败'}  "
+                         f"{duration:.1f}秒  {clicks}次点击  3BV {bbbv}  空白区 {openings}")
+        if self.session.games:
+            lines.append("")
+            lines.append("本次会话:")
+            for (rows, cols, mines), summary in self.session.summary().items():
+                lines.append(f"{rows}×{cols} {mines}雷  {summary['games']}局  "
+                             f"胜率 {summary['win_rate']:.0%}  {self.format_times(summary)}")
+        messagebox.showinfo("🏆 最佳成绩", "\n".join(lines), parent=self.master)
+
+    @staticmethod
+    def format_times(summary):
+        parts = []
+        if summary["mean_time"] is not None:
+            parts.append(f"平均 {summary['mean_time']:.1f}秒  中位 {summary['median_time']:.1f}秒  "
+                         f"p90 {summary['p90_time']:.1f}秒")
+        if summary["bbbv_per_second"] is not None:
+            parts.append(f"3BV/s {summary['bbbv_per_second']:.2f}")
+        if summary["clicks_per_second"] is not None:
+            parts.append(f"点击/s {summary['clicks_per_second']:.2f}")
+        return "  ".join(parts)
+
+    def on_close(self):
+        self.stop_children()
+        self.stats_store.close()
+        self.master.destroy()
+
+    def stop_children(self, timeout=1.0):
+        # 先关闭stdin让子进程自行退出，超时再终止
+        for proc in self.processes:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+        deadline = time.time() + timeout
+        for proc in self.processes:
+            try:
+                proc.wait(max(0.0, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                proc.terminate()
+                try:
+                    proc.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        self.processes = []
+
+    def canvas_cost(self):
+        # 用一个不显示的Canvas实测创建格子图片项的耗时和内存，之后的预估直接复用
+        if self.canvas_costs is None:
+            canvas = tk.Canvas(self.master)
+            tiles = TileAtlas.get(self.master, 24, Minesweeper.COLOR_SCHEME)
+            self.canvas_costs = measure_canvas(canvas, tiles.hidden)
+            canvas.destroy()
+        return self.canvas_costs
+
+    def start_custom_game(self):
+        try:
+            rows = int(self.rows_entry.get())
+            cols = int(self.cols_entry.get())
+            mines = int(self.mines_entry.get())
+            
+            self.validate_input(rows, cols, mines)
+            seconds, size = self.canvas_cost()
+            estimate = plan(rows, cols, mines, canvas_seconds=seconds, canvas_bytes=size)
+            self.start_game(rows, cols, mines, estimate.mode)
+            
+        except OverBudget as e:
+            messagebox.showerror("棋盘太大",
+                                 f"{e}\n\n可以改用终端模式游玩:\n"
+                                 f"python minesweeper_tui.py --rows {rows} --cols {cols} --mines {mines}",
+                                 parent=self.master)
+        except ValueError as e:
+            messagebox.showerror("输入错误", 
+                               f"无效设置:\n{str(e)}",
+                               parent=self.master)
+
+
+async def pump_tk(root, interval=0.01):
+    # 每隔interval秒处理一次Tk事件，asyncio任务在间隙中运行，两边延迟都有上限
+    try:
+        while True:
+            root.update()
+            await asyncio.sleep(interval)
+    except tk.TclError:
+        # 根窗口已销毁
+        pass
+
+
+def run_with_asyncio(root, main, interval=0.01):
+    # 在asyncio中同时运行Tk和协程main，main结束或窗口关闭时返回
+    async def runner():
+        pump = asyncio.ensure_future(pump_tk(root, interval))
+        task = asyncio.ensure_future(main)
+        done, _ = await asyncio.wait({pump, task}, return_when=asyncio.FIRST_COMPLETED)
+        for pending in (pump, task):
+            if pending not in done:
+                pending.cancel()
+        return task.result() if task in done else None
+
+    return asyncio.run(runner())
+
+
+async def random_bot(game, delay=0.05):
+    # 示例机器人：随机点击未揭开的格子直到游戏结束
+    while game.status == "playing":
+        view = game.view()
+        hidden = [(r, c) for r in range(game.rows) for c in range(game.cols) if view[r][c] is None]
+        await game.click(*random.choice(hidden))
+        await asyncio.sleep(delay)
+    return game.status
+
+
+def run_game_process(rows, cols, mines, mode=None):
+    # 独立进程中的游戏入口：隐藏根窗口，所有游戏窗口关闭或父进程退出后结束
+    # mode为父进程资源预估选出的存储方式，棋盘只在子进程里建
+    root = tk.Tk()
+    root.withdraw()
+    parent_gone = threading.Event()
+    # 大棋盘的结果由统计线程发送，与界面线程的写入互斥
+    output = threading.Lock()
+
+    def send_result(result):
+        try:
+            with output:
+                sys.stdout.write(json.dumps(result) + "\n")
+                sys.stdout.flush()
+        except (OSError, ValueError):
+            parent_gone.set()
+
+    def watch_parent():
+        sys.stdin.read()
+        parent_gone.set()
+
+    def check_alive():
+        if parent_gone.is_set() or not root.winfo_children():
+            root.destroy()
+        else:
+            root.after(200, check_alive)
+
+    threading.Thread(target=watch_parent, daemon=True).start()
+    Minesweeper(tk.Toplevel(root), rows, cols, mines, on_result=send_result, mode=mode)
+    check_alive()
+    root.mainloop()
+    # 窗口关闭时还没算完的统计也要发给父进程
+    if not parent_gone.is_set():
+        for thread in threading.enumerate():
+            if thread.name == STATS_THREAD:
+                thread.join()
+
+
+def benchmark_board(rows=30, cols=30):
+    # 对比旧版(每格一个Button+两个lambda绑定)和Canvas单绑定棋盘的构建耗时与内存
+    # Python内存由tracemalloc统计；Tk控件在C层分配，另看进程常驻内存的增长(读不到时为None)
+    root = tk.Tk()
+    root.withdraw()
+    tiles = TileAtlas.get(root, 24, Minesweeper.COLOR_SCHEME)
+
+    def measure(build):
+        window = tk.Toplevel(root)
+        commands_before = len(root.tk.call("info", "commands"))
+        resident = resident_bytes()
+        tracemalloc.start()
+        start = time.perf_counter()
+        build(window)
+        window.update_idletasks()
+        elapsed = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        if resident is not None:
+            resident = resident_bytes() - resident
+        commands = len(root.tk.call("info", "commands")) - commands_before
+        window.destroy()
+        return elapsed, memory, resident, commands
+
+    def legacy(window):
+        frame = tk.Frame(window, bg="#bdbdbd")
+        frame.grid()
+        for r in range(rows):
+            for c in range(cols):
+                btn = tk.Button(frame, width=24, height=24, borderwidth=0,
+                                highlightthickness=0, **tiles.hidden)
+                btn.grid(row=r, column=c, padx=1, pady=1)
+                btn.bind("<Button-1>", lambda e, r=r, c=c: None)
+                btn.bind("<Button-3>", lambda e, r=r, c=c: None)
+                btn.bind("<Enter>", lambda e, btn=btn: btn.config(**tiles.hover))
+                btn.bind("<Leave>", lambda e, btn=btn: btn.config(**tiles.hidden))
+
+    def canvas(window):
+        # 非交互模式：不写对局日志，结束时不弹对话框
+        game = Minesweeper(window, rows, cols, max(1, rows * cols // 5), interactive=False)
+        game.master.after_cancel(game.timer_job)
+
+    results = {"按钮网格": measure(legacy), "Canvas棋盘": measure(canvas)}
+    root.destroy()
+    print(f"{rows}x{cols} 棋盘构建对比:")
+    for name, (elapsed, memory, resident, commands) in results.items():
+        print(f"  {name}: {elapsed * 1000:.1f} ms, Python内存 {memory / 1024:.0f} KiB, "
+              f"常驻内存增长 {'未知' if resident is None else f'{resident / 1024:.0f} KiB'}, "
+              f"新增Tcl命令 {commands}")
+    (old_elapsed, old_memory, old_resident, _), (new_elapsed, new_memory, new_resident, _) = results.values()
+    print(f"  Canvas相比按钮网格: 构建耗时 {old_elapsed * 1000:.1f} -> {new_elapsed * 1000:.1f} ms "
+          f"({new_elapsed / old_elapsed:.0%}), "
+          f"Python内存 {old_memory / 1024:.0f} -> {new_memory / 1024:.0f} KiB")
+    if old_resident is not None:
+        print(f"  常驻内存增长 {old_resident / 1024:.0f} -> {new_resident / 1024:.0f} KiB")
+    return results
+
+
+if __name__ == "__main__":
+    if "--bench-board" in sys.argv:
+        benchmark_board()
+    elif "--async-demo" in sys.argv:
+        root = tk.Tk()
+        game = Minesweeper(root, interactive=False)
+        print(run_with_asyncio(root, random_bot(game)))
+    elif "--game" in sys.argv:
+        index = sys.argv.index("--game")
+        values = sys.argv[index + 1:index + 5]
+        mode = values[3] if len(values) > 3 and values[3] in MODES else None
+        run_game_process(*(int(value) for value in values[:3]), mode)
+    else:
+        root = tk.Tk()
+        DifficultySelector(root)
+        root.mainloop()
\ No newline at end of file
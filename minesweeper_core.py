@@ -0,0 +1,350 @@
+import os
+import random
+import sys
+import time
+from array import array
+
+# 扫雷规则核心：不依赖Tk，图形界面、服务器和各种工具共用同一套规则
+
+HIDDEN, OPENED, FLAGGED = 0, 1, 2
+MINE = -1
+
+# 超过这个格子数的棋盘使用延迟计数，首次点击不必为每个格子计算数字和标记空白区域
+LAZY_CELLS = 100000
+
+# 本地数据（统计、存档等）保存位置
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".minesweeper")
+
+
+def data_path(name):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+
+def board_stats(rows, cols, grid):
+    # 按grid_copy()的数字表统计(3BV, 空白区域数)；不引用原棋盘，可以在后台线程运行
+    board = Board(rows, cols, 0, seed=0, lazy=True)
+    board.grid = grid
+    board.first_click = False
+    board.ensure_labels()
+    return board.bbbv(), board.openings()
+
+
+class Board:
+    def __init__(self, rows=10, cols=10, mines=10, seed=None, lazy=False):
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        # 记录种子，同一种子和首次点击位置可以复现整局
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        # 延迟计数模式：首次点击只放雷，数字在格子第一次揭开或显示时才计算(grid中为None表示未计算)，
+        # 首次点击的开销与雷数成正比，适合大部分格子永远不会被揭开的超大棋盘
+        self.lazy = lazy
+        self.grid = [[None if lazy else 0 for _ in range(cols)] for _ in range(rows)]
+        self.state = [[HIDDEN for _ in range(cols)] for _ in range(rows)]
+        self.opened = 0
+        self.flags = 0
+        self.first_click = True
+        self.status = "playing"
+        self.exploded = None
+        self.clicks = 0
+        self._bbbv = None
+        # 空白区域标记，生成雷时一次算好：labels[行*列数+列]为空白格所属区域编号(非空白格为-1)，
+        # 每个区域由若干行内连续的空白段组成，区域k的段为 runs[region_offsets[k]:region_offsets[k+1]]，
+        # 段号i对应 第run_rows[i]行的第run_starts[i]~run_ends[i]列；都是array，每格只占labels的4字节
+        self.labels = None
+        self.region_offsets = None
+
+    def neighbors(self, r, c):
+        for nr in range(max(0, r - 1), min(self.rows, r + 2)):
+            for nc in range(max(0, c - 1), min(self.cols, c + 2)):
+                if nr != r or nc != c:
+                    yield nr, nc
+
+    def generate_mines(self, exclude_r, exclude_c):
+        grid = self.grid
+        placed = []
+        while len(placed) < self.mines:
+            r = self.rng.randint(0, self.rows-1)
+            c = self.rng.randint(0, self.cols-1)
+            if (r != exclude_r or c != exclude_c) and grid[r][c] != MINE:
+                grid[r][c] = MINE
+                placed.append((r, c))
+        if self.lazy:
+            return
+
+        # 从每个雷出发给周围格子计数，开销与雷数成正比而不是格子数；按行内联展开，不经过neighbors生成器
+        rows, cols = self.rows, self.cols
+        for r, c in placed:
+            low, high = max(0, c - 1), min(cols, c + 2)
+            for nr in range(max(0, r - 1), min(rows, r + 2)):
+                line = grid[nr]
+                for nc in range(low, high):
+                    if line[nc] != MINE:
+                        line[nc] += 1
+        self.label_regions()
+
+    def label_regions(self):
+        # 逐行扫描一次，把每行连续的空白格记为一段，用并查集合并上下相邻(含斜向)的段；按段而不是按格合并。
+        # 每行先转成0/1字节掩码，找段用bytes.find在C层完成；只保存每格的区域编号和各段的位置，
+        # 区域的格子列表在揭开时由段现算(region_cells)，不为每个区域常驻一份元组列表
+        rows, cols, grid = self.rows, self.cols, self.grid
+        run_rows, run_starts, run_ends = array("i"), array("i"), array("i")
+        parent = array("i")
+        blank = (0).__eq__
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        masks = []
+        previous = []
+        for r in range(rows):
+            mask = bytes(map(blank, grid[r]))
+            masks.append(mask)
+            current = []
+            k = 0
+            start = mask.find(1)
+            while start >= 0:
+                end = mask.find(0, start)
+                if end < 0:
+                    end = cols
+                index = len(run_starts)
+                run_rows.append(r)
+                run_starts.append(start)
+                run_ends.append(end - 1)
+                parent.append(index)
+                # 上一行中与[start-1, end]有重叠的段都与本段相连；两行的段都按列有序，指针只进不退
+                while k < len(previous) and run_ends[previous[k]] < start - 1:
+                    k += 1
+                j = k
+                while j < len(previous) and run_starts[previous[j]] <= end:
+                    a, b = find(index), find(previous[j])
+                    if a != b:
+                        parent[a] = b
+                    j += 1
+                current.append(index)
+                start = mask.find(1, end)
+            previous = current
+
+        # 按根节点编号，计数排序把同一区域的段排在一起
+        count = len(run_starts)
+        numbering = {}
+        run_labels = array("i", [numbering.setdefault(find(i), len(numbering)) for i in range(count)])
+        offsets = array("i", [0]) * (len(numbering) + 1)
+        for label in run_labels:
+            offsets[label + 1] += 1
+        for label in range(len(numbering)):
+            offsets[label + 1] += offsets[label]
+        runs = array("i", [0]) * count
+        filled = offsets[:-1]
+        labels = array("i", [-1]) * (rows * cols)
+        for i in range(count):
+            label = run_labels[i]
+            runs[filled[label]] = i
+            filled[label] += 1
+            start, end = run_rows[i] * cols + run_starts[i], run_rows[i] * cols + run_ends[i] + 1
+            labels[start:end] = array("i", [label]) * (end - start)
+        self.labels = labels
+        self.region_offsets = offsets
+        self.runs = runs
+        self.run_rows, self.run_starts, self.run_ends = run_rows, run_starts, run_ends
+
+        # 3BV = 空白区域数 + 不与任何空白格相邻的数字格数
+        # 掩码按每格一个字节转成大整数，左右各移一格再与上下两行相或即为与空白格相邻的格子，按位计数在C层完成
+        full = int.from_bytes(b"\x01" * cols, "big")
+        spread = [0] * (rows + 2)
+        for r, mask in enumerate(masks):
+            z = int.from_bytes(mask, "big")
+            spread[r + 1] = (z | z << 8 | z >> 8) & full
+        numbered = (0).__lt__
+        isolated = 0
+        for r in range(rows):
+            numbers = bytes(map(numbered, grid[r]))
+            near = (spread[r] | spread[r + 1] | spread[r + 2]) & int.from_bytes(numbers, "big")
+            isolated += numbers.count(1) - bin(near).count("1")
+        self._bbbv = len(numbering) + isolated
+
+    def region_cells(self, label):
+        # 区域label的空白格及其周围一圈数字格(去重)，开销与区域大小成正比
+        rows, cols, grid = self.rows, self.cols, self.grid
+        run_rows, run_starts, run_ends = self.run_rows, self.run_starts, self.run_ends
+        cells = []
+        border = set()
+        for i in self.runs[self.region_offsets[label]:self.region_offsets[label + 1]]:
+            r, start, end = run_rows[i], run_starts[i], run_ends[i]
+            cells.extend((r, c) for c in range(start, end + 1))
+            # 空白格周围不会有雷：同一行只有段两端可能是数字，上下两行对应范围内的非空白格都是边界
+            # (上下两行的空白格与本段相连，属于同一区域，由它们自己的段计入)
+            low, high = max(0, start - 1), min(cols, end + 2)
+            line = grid[r]
+            if start > 0 and line[start - 1] > 0:
+                border.add(r * cols + start - 1)
+            if end + 1 < cols and line[end + 1] > 0:
+                border.add(r * cols + end + 1)
+            for nr in (r - 1, r + 1):
+                if 0 <= nr < rows:
+                    base = nr * cols
+                    border.update(base + c for c, value in enumerate(grid[nr][low:high], low) if value > 0)
+        cells.extend(divmod(index, cols) for index in border)
+        return cells
+
+    def count_mines(self, r, c):
+        return sum(1 for nr, nc in self.neighbors(r, c) if self.grid[nr][nc] == MINE)
+
+    def value(self, r, c):
+        # 格子的数字(雷为MINE)；延迟计数模式下第一次读取时计算并缓存到grid
+        value = self.grid[r][c]
+        if value is None:
+            value = self.grid[r][c] = self.count_mines(r, c)
+        return value
+
+    def ensure_labels(self):
+        # 延迟计数模式下，需要统计时才补齐所有数字并标记空白区域
+        if self.region_offsets is None and not self.first_click:
+            for r in range(self.rows):
+                for c in range(self.cols):
+                    self.value(r, c)
+            self.label_regions()
+
+    def labels_ready(self):
+        # bbbv()和openings()可以直接读取，不需要先遍历整张棋盘
+        return self.first_click or self.region_offsets is not None
+
+    def grid_copy(self):
+        # 数字表的副本(延迟计数时未计算的格子为None)，交给board_stats在其他线程统计
+        return [row[:] for row in self.grid]
+
+    def bbbv(self):
+        # 3BV：揭开所有安全格所需的最少左键次数，生成雷时已算好
+        self.ensure_labels()
+        return self._bbbv
+
+    def openings(self):
+        # 空白区域(开局)数
+        self.ensure_labels()
+        return None if self.region_offsets is None else len(self.region_offsets) - 1
+
+    def left_click(self, r, c):
+        # 返回本次新揭开的格子列表；踩雷时返回空列表并把状态置为lost
+        if self.status != "playing":
+            return []
+        self.clicks += 1
+        if self.state[r][c] != HIDDEN:
+            return []
+
+        if self.first_click:
+            self.generate_mines(r, c)
+            self.first_click = False
+
+        if self.grid[r][c] == MINE:
+            self.status = "lost"
+            self.exploded = (r, c)
+            return []
+        opened = self.reveal(r, c)
+        self.check_win()
+        return opened
+
+    def right_click(self, r, c):
+        # 切换旗子，返回格子是否发生变化
+        if self.status != "playing":
+            return False
+        self.clicks += 1
+        if self.state[r][c] == OPENED:
+            return False
+
+        if self.state[r][c] == FLAGGED:
+            self.state[r][c] = HIDDEN
+            self.flags -= 1
+            return True
+        if self.flags < self.mines:
+            self.state[r][c] = FLAGGED
+            self.flags += 1
+            return True
+        return False
+
+    def reveal(self, r, c):
+        # 点到空白格时直接按预先标记的区域揭开，开销只与区域大小有关
+        if self.labels is not None and self.labels[r * self.cols + c] >= 0:
+            opened = self.reveal_region(self.region_cells(self.labels[r * self.cols + c]))
+            if opened is not None:
+                return opened
+        return self.walk(r, c)
+
+    def reveal_region(self, region):
+        # 区域里有旗子或已揭开的空白格时(旗子挡住过展开)，交给walk按原规则逐格展开
+        state, grid = self.state, self.grid
+        hidden = []
+        for r, c in region:
+            cell = state[r][c]
+            if cell == HIDDEN:
+                hidden.append((r, c))
+            elif cell == FLAGGED or grid[r][c] == 0:
+                return None
+        for r, c in hidden:
+            state[r][c] = OPENED
+        self.opened += len(hidden)
+        return hidden
+
+    def walk(self, r, c):
+        # 用显式栈展开空白区域，避免大棋盘上递归过深
+        opened = []
+        stack = [(r, c)]
+        while stack:
+            r, c = stack.pop()
+            if self.state[r][c] != HIDDEN:
+                continue
+            self.state[r][c] = OPENED
+            self.opened += 1
+            opened.append((r, c))
+            if self.value(r, c) == 0:
+                stack.extend(self.neighbors(r, c))
+        return opened
+
+    def check_win(self):
+        if self.opened == self.rows * self.cols - self.mines:
+            self.status = "won"
+        return self.status == "won"
+
+    def layout(self):
+        # 布局的文本形式：按行每格一个字符，"*"为雷，其余为数字
+        return "".join("*" if value == MINE else str(value) for row in self.grid for value in row)
+
+    def load_layout(self, layout):
+        # 载入layout()导出的布局，跳过生成雷；之后的第一次点击不再重新生成
+        for r in range(self.rows):
+            row = self.grid[r]
+            for c in range(self.cols):
+                char = layout[r * self.cols + c]
+                row[c] = MINE if char == "*" else int(char)
+        self.first_click = False
+        self.label_regions()
+
+    def view(self):
+        # 玩家可见的棋盘：None为未揭开，"F"为旗子，数字为已揭开格子
+        symbols = {HIDDEN: None, FLAGGED: "F"}
+        return [[self.grid[r][c] if self.state[r][c] == OPENED else symbols[self.state[r][c]]
+                 for c in range(self.cols)] for r in range(self.rows)]
+
+
+def benchmark():
+    # 首次点击耗时：完整计数(含空白区域标记)与延迟计数对比，雷数固定时延迟计数几乎不随格子数增长
+    for rows, cols, mines in ((100, 100, 1500), (1000, 1000, 1500), (1000, 1000, 150000),
+                              (3000, 3000, 1500)):
+        line = f"{rows}x{cols} {mines}雷:"
+        for name, lazy in (("完整计数", False), ("延迟计数", True)):
+            board = Board(rows, cols, mines, seed=1, lazy=lazy)
+            # 点在一个数字格上，只比较生成雷和计数的开销，不含展开
+            start = time.perf_counter()
+            board.generate_mines(0, 0)
+            elapsed = time.perf_counter() - start
+            line += f"  {name} {elapsed * 1000:.1f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
@@ -0,0 +1,155 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper_core import Board, HIDDEN, data_path
+from minesweeper_solver import AnalysisStopped, Budget, FrontierAnalyzer, mine_probabilities
+
+# 每日挑战：由日期得到种子，所有人同一天玩到的是同一张棋盘
+# 按 (日期, 尝试次数) 依次生成候选棋盘，选第一张满足条件的：
+#   固定的开局格子是空白格(第一下能展开一片)，且从开局出发只靠确定推理就能解完，不需要猜
+# 选好的布局、开局格子、3BV和可解性缓存在本地，打开挑战时直接载入，不再生成和验证
+
+DAILY_CONFIG = (16, 30, 99)
+MAX_ATTEMPTS = 200
+# 单张候选棋盘验证的时间上限(秒)，超时视为无法确认可解
+SOLVE_SECONDS = 2.0
+
+
+def daily_seed(day, attempt=0):
+    digest = hashlib.blake2b(f"daily:{day}:{attempt}".encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "big")
+
+
+def solve_without_guessing(board, seconds=SOLVE_SECONDS):
+    # 从当前局面出发，每步只揭开能确定安全的格子；局部推理没有结果时再用全局精确概率(含剩余雷数)
+    budget = Budget(seconds)
+    analyzer = FrontierAnalyzer(board.rows, board.cols, board.mines)
+    analyzer.observe_board(board, [(r, c) for r in range(board.rows) for c in range(board.cols)
+                                   if board.state[r][c] != HIDDEN])
+    try:
+        while board.status == "playing":
+            budget.check()
+            safe, _ = analyzer.deductions()
+            moves = [cell for cell in safe if board.state[cell[0]][cell[1]] == HIDDEN]
+            if not moves:
+                probabilities = mine_probabilities(board.view(), board.mines, budget)
+                moves = [cell for cell, probability in probabilities.items() if probability == 0]
+            if not moves:
+                return False
+            for cell in moves:
+                analyzer.observe_board(board, board.left_click(*cell))
+    except AnalysisStopped:
+        return False
+    return board.status == "won"
+
+
+def build_challenge(day):
+    # day为ISO格式日期字符串，返回可缓存的挑战信息
+    rows, cols, mines = DAILY_CONFIG
+    start = time.perf_counter()
+    fallback = None
+    for attempt in range(MAX_ATTEMPTS):
+        seed = daily_seed(day, attempt)
+        board = Board(rows, cols, mines, seed)
+        # 开局格子用单独的随机数，不消耗棋盘的rng：按种子重放对局日志时，第一次点击生成的雷与这里相同
+        opening = divmod(random.Random(seed).randrange(rows * cols), cols)
+        board.generate_mines(*opening)
+        board.first_click = False
+        if board.grid[opening[0]][opening[1]] != 0:
+            continue
+        entry = {"date": day, "rows": rows, "cols": cols, "mines": mines, "seed": seed,
+                 "attempts": attempt + 1, "opening": list(opening), "layout": board.layout(),
+                 "bbbv": board.bbbv(), "solvable": False}
+        trial = Board(rows, cols, mines, seed)
+        trial.load_layout(entry["layout"])
+        trial.left_click(*opening)
+        if solve_without_guessing(trial):
+            entry["solvable"] = True
+            break
+        fallback = fallback or entry
+    else:
+        # 极少数日期找不到免猜的棋盘，退而使用第一张开局为空白的棋盘
+        entry = fallback
+    entry["build_seconds"] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def cache_path():
+    return data_path("daily.json")
+
+
+def load_cache():
+    try:
+        with open(cache_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    # 先写临时文件再替换，中途退出不会留下损坏的缓存
+    path = cache_path()
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(cache, f, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+
+def get_challenge(day=None):
+    day = (day or datetime.date.today()).isoformat()
+    cache = load_cache()
+    entry = cache.get(day)
+    if entry is None:
+        entry = cache[day] = build_challenge(day)
+        save_cache(cache)
+    return entry
+
+
+def open_board(entry):
+    # 按缓存的布局直接建出棋盘，开局格子由调用方点击(这样对局日志按种子重放时结果一致)
+    board = Board(entry["rows"], entry["cols"], entry["mines"], entry["seed"])
+    board.load_layout(entry["layout"])
+    return board
+
+
+def build_year(year, processes=None):
+    # 按天分配到多个进程并行生成，已缓存的日期跳过
+    cache = load_cache()
+    first = datetime.date(year, 1, 1)
+    days = [(first + datetime.timedelta(days=i)).isoformat()
+            for i in range((datetime.date(year + 1, 1, 1) - first).days)]
+    missing = [day for day in days if day not in cache]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(processes) as pool:
+        for entry in pool.map(build_challenge, missing, chunksize=4):
+            cache[entry["date"]] = entry
+    save_cache(cache)
+    elapsed = time.perf_counter() - start
+    built = [cache[day] for day in missing]
+    solvable = sum(entry["solvable"] for entry in built)
+    cpu = sum(entry["build_seconds"] for entry in built)
+    print(f"{year}年: 新生成 {len(missing)} 天 (已缓存 {len(days) - len(missing)} 天), "
+          f"免猜 {solvable} 天, 用时 {elapsed:.1f} s (单进程合计 {cpu:.1f} s, "
+          f"{processes or os.cpu_count()} 个进程)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="每日挑战棋盘")
+    parser.add_argument("--build-year", type=int, help="并行预生成一整年的挑战")
+    parser.add_argument("--processes", type=int, help="并行进程数，默认为CPU核数")
+    args = parser.parse_args()
+    if args.build_year:
+        build_year(args.build_year, args.processes)
+    else:
+        entry = get_challenge()
+        print(f"{entry['date']}: 种子 {entry['seed']}, 开局 {tuple(entry['opening'])}, "
+              f"3BV {entry['bbbv']}, {'免猜' if entry['solvable'] else '可能需要猜'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+
+from minesweeper_core import HIDDEN, OPENED, FLAGGED, MINE
+
+# 无尽模式：棋盘向四个方向无限延伸
+# 雷的位置由 (种子, 区块坐标) 的哈希决定，任何时候都能重新算出来，不需要保存
+# 需要保存的只有玩家改动过的格子状态(揭开/插旗)，按区块存放：
+#   热区块   最近访问的区块，bytearray，直接读写
+#   冷区块   远离视口的区块，zlib压缩后留在内存
+#   落盘区块 冷区块总大小超出预算后写入临时目录，每个区块一个文件
+# 三层都有上限，所以无论玩家走多远内存占用都不会增长
+
+CHUNK_SIZE = 16
+# 每个冷区块除压缩数据外，字典项、键和bytes对象本身的大致开销
+ENTRY_OVERHEAD = 200
+
+
+def chunk_seed(seed, cr, cc):
+    digest = hashlib.blake2b(f"{seed}:{cr}:{cc}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class ChunkStore:
+    def __init__(self, cells, hot_limit=256, cold_bytes=4 << 20, spill_dir=None):
+        self.cells = cells
+        self.hot_limit = hot_limit
+        self.cold_bytes = cold_bytes
+        self.hot = OrderedDict()
+        self.cold = OrderedDict()
+        self.cold_size = 0
+        # 不指定目录时使用临时目录，关闭时删除
+        self.own_dir = spill_dir is None
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="minesweeper-endless-")
+        self.spilled = 0
+        self.loads = 0
+        # 最近确认过磁盘上也没有的区块，避免视口里的空白区块每次都去查文件
+        self.missing = OrderedDict()
+        self.missing_limit = hot_limit
+
+    def path(self, key):
+        return os.path.join(self.spill_dir, f"{key[0]}_{key[1]}.z")
+
+    def get(self, key, create=False):
+        # 返回区块的状态数组；从未改动过的区块不存在，create为False时返回None
+        chunk = self.hot.get(key)
+        if chunk is not None:
+            self.hot.move_to_end(key)
+            return chunk
+        packed = self.cold.pop(key, None)
+        if packed is not None:
+            self.cold_size -= len(packed) + ENTRY_OVERHEAD
+        elif key in self.missing:
+            self.missing.move_to_end(key)
+        else:
+            try:
+                with open(self.path(key), "rb") as f:
+                    packed = f.read()
+            except FileNotFoundError:
+                self.missing[key] = True
+                if len(self.missing) > self.missing_limit:
+                    self.missing.popitem(last=False)
+            else:
+                os.remove(self.path(key))
+                self.spilled -= 1
+        if packed is not None:
+            self.loads += 1
+            chunk = bytearray(zlib.decompress(packed))
+        elif create:
+            self.missing.pop(key, None)
+            chunk = bytearray(self.cells)
+        else:
+            return None
+        self.hot[key] = chunk
+        self.trim()
+        return chunk
+
+    def trim(self, keep=()):
+        # 热区块超出上限时压缩最久未访问的区块；keep中的区块(视口附近)不压缩
+        for key in list(self.hot):
+            if len(self.hot) <= self.hot_limit:
+                break
+            if key not in keep:
+                self.freeze(key)
+        while self.cold_size > self.cold_bytes:
+            self.spill(next(iter(self.cold)))
+
+    def freeze(self, key):
+        packed = zlib.compress(self.hot.pop(key), 6)
+        self.cold[key] = packed
+        self.cold_size += len(packed) + ENTRY_OVERHEAD
+
+    def spill(self, key):
+        packed = self.cold.pop(key)
+        self.cold_size -= len(packed) + ENTRY_OVERHEAD
+        with open(self.path(key), "wb") as f:
+            f.write(packed)
+        self.spilled += 1
+
+    def compact(self, keep):
+        # 把视口以外的热区块全部压缩
+        for key in [key for key in self.hot if key not in keep]:
+            self.freeze(key)
+        self.trim(keep)
+
+    def memory(self):
+        return {"hot": len(self.hot), "hot_bytes": len(self.hot) * self.cells,
+                "cold": len(self.cold), "cold_bytes": self.cold_size,
+                "spilled": self.spilled, "loads": self.loads}
+
+    def close(self):
+        self.hot.clear()
+        self.cold.clear()
+        self.cold_size = 0
+        if self.own_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+class EndlessBoard:
+    # 坐标可以是任意整数(包括负数)，玩家从(0, 0)出发，(0, 0)周围一圈保证无雷
+    def __init__(self, seed=None, density=0.16, chunk_size=CHUNK_SIZE,
+                 hot_limit=256, cold_bytes=4 << 20, layout_limit=1024, spill_dir=None):
+        # 密度太低时空白格会连成无限大的区域，一次点击展开不完
+        if not 0.1 <= density < 1:
+            raise ValueError("地雷密度必须在0.1到1之间")
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.density = density
+        self.chunk_size = chunk_size
+        self.store = ChunkStore(chunk_size * chunk_size, hot_limit, cold_bytes, spill_dir)
+        # 雷的布局可以随时重算，只缓存最近用到的一部分
+        self.layouts = OrderedDict()
+        self.layout_limit = layout_limit
+        self.opened = 0
+        self.flags = 0
+        self.status = "playing"
+        self.exploded = None
+        self.clicks = 0
+
+    def layout(self, cr, cc):
+        key = (cr, cc)
+        mines = self.layouts.get(key)
+        if mines is not None:
+            self.layouts.move_to_end(key)
+            return mines
+        rng = random.Random(chunk_seed(self.seed, cr, cc))
+        size = self.chunk_size
+        density = self.density
+        cells = bytearray(rng.random() < density for _ in range(size * size))
+        # 起点周围的格子不放雷
+        for r in range(-1, 2):
+            for c in range(-1, 2):
+                if r // size == cr and c // size == cc:
+                    cells[(r % size) * size + c % size] = 0
+        mines = bytes(cells)
+        self.layouts[key] = mines
+        if len(self.layouts) > self.layout_limit:
+            self.layouts.popitem(last=False)
+        return mines
+
+    def is_mine(self, r, c):
+        size = self.chunk_size
+        return self.layout(r // size, c // size)[(r % size) * size + c % size] == 1
+
+    def neighbors(self, r, c):
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr or dc:
+                    yield r + dr, c + dc
+
+    def value(self, r, c):
+        # 格子的数字，雷返回MINE
+        if self.is_mine(r, c):
+            return MINE
+        return sum(self.is_mine(nr, nc) for nr, nc in self.neighbors(r, c))
+
+    def state(self, r, c):
+        size = self.chunk_size
+        chunk = self.store.get((r // size, c // size))
+        if chunk is None:
+            return HIDDEN
+        return chunk[(r % size) * size + c % size]
+
+    def set_state(self, r, c, value):
+        size = self.chunk_size
+        chunk = self.store.get((r // size, c // size), create=True)
+        chunk[(r % size) * size + c % size] = value
+
+    def left_click(self, r, c):
+        # 返回本次新揭开的格子列表；踩雷时返回空列表并把状态置为lost
+        if self.status != "playing":
+            return []
+        self.clicks += 1
+        if self.state(r, c) != HIDDEN:
+            return []
+        if self.is_mine(r, c):
+            self.status = "lost"
+            self.exploded = (r, c)
+            return []
+        return self.reveal(r, c)
+
+    def right_click(self, r, c):
+        if self.status != "playing":
+            return False
+        self.clicks += 1
+        state = self.state(r, c)
+        if state == OPENED:
+            return False
+        if state == FLAGGED:
+            self.set_state(r, c, HIDDEN)
+            self.flags -= 1
+        else:
+            self.set_state(r, c, FLAGGED)
+            self.flags += 1
+        return True
+
+    def reveal(self, r, c):
+        opened = []
+        stack = [(r, c)]
+        while stack:
+            r, c = stack.pop()
+            if self.state(r, c) != HIDDEN:
+                continue
+            self.set_state(r, c, OPENED)
+            self.opened += 1
+            opened.append((r, c))
+            if self.value(r, c) == 0:
+                stack.extend(self.neighbors(r, c))
+        return opened
+
+    def window(self, top, left, rows, cols, source):
+        # 按区块整段切片拼出一个窗口，避免逐格查找区块；source(cr, cc)返回区块数组
+        size = self.chunk_size
+        window = []
+        for r in range(top, top + rows):
+            cr, offset = divmod(r, size)
+            offset *= size
+            row = bytearray()
+            c = left
+            while c < left + cols:
+                cc, start = divmod(c, size)
+                end = min(size, start + left + cols - c)
+                chunk = source(cr, cc)
+                if chunk is None:
+                    row += bytes(end - start)
+                else:
+                    row += chunk[offset + start:offset + end]
+                c += end - start
+            window.append(row)
+        return window
+
+    def chunk_state(self, cr, cc):
+        return self.store.get((cr, cc))
+
+    def view(self, top, left, rows, cols):
+        # 返回以(top, left)为左上角的窗口，格式与Board.view相同
+        symbols = {HIDDEN: None, FLAGGED: "F"}
+        mines = self.window(top - 1, left - 1, rows + 2, cols + 2, self.layout)
+        states = self.window(top, left, rows, cols, self.chunk_state)
+        result = []
+        for i in range(rows):
+            above, here, below = mines[i], mines[i + 1], mines[i + 2]
+            row = []
+            for j, state in enumerate(states[i]):
+                if state != OPENED:
+                    row.append(symbols[state])
+                elif here[j + 1]:
+                    row.append(MINE)
+                else:
+                    row.append(sum(above[j:j + 3]) + here[j] + here[j + 2] + sum(below[j:j + 3]))
+            result.append(row)
+        return result
+
+    def focus(self, top, left, rows, cols, margin=1):
+        # 视口移动后调用：视口及周围margin个区块保持热状态，其余压缩或落盘
+        size = self.chunk_size
+        keep = {(cr, cc)
+                for cr in range(top // size - margin, (top + rows - 1) // size + margin + 1)
+                for cc in range(left // size - margin, (left + cols - 1) // size + margin + 1)}
+        self.store.compact(keep)
+
+    def memory(self):
+        info = self.store.memory()
+        info["layouts"] = len(self.layouts)
+        return info
+
+    def close(self):
+        self.store.close()
+
+
+def benchmark(steps=2000, seed=1):
+    # 沿一条直线一直向右探索，每一步揭开视口中的一个安全格并移动视口，观察内存是否有上限
+    import tracemalloc
+    board = EndlessBoard(seed=seed, hot_limit=64, cold_bytes=64 << 10, layout_limit=64)
+    board.left_click(0, 0)
+    rows, cols = 20, 30
+    tracemalloc.start()
+    start = time.perf_counter()
+    for step in range(steps):
+        left = step * 8
+        for r in range(rows):
+            c = left + cols - 1
+            if board.state(r, c) == HIDDEN and not board.is_mine(r, c):
+                board.left_click(r, c)
+                break
+        board.view(0, left, rows, cols)
+        board.focus(0, left, rows, cols)
+        if step % (steps // 5) == 0 or step == steps - 1:
+            current, peak = tracemalloc.get_traced_memory()
+            info = board.memory()
+            print(f"第{step + 1}步 列{left}: 揭开 {board.opened} 格, 热区块 {info['hot']}, "
+                  f"冷区块 {info['cold']} ({info['cold_bytes'] // 1024} KB), "
+                  f"落盘 {info['spilled']}, 内存 {current / 1024:.0f} KB (峰值 {peak / 1024:.0f} KB)")
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    print(f"每步(点击+读取视口+整理): {elapsed / steps * 1000:.2f} ms")
+    board.close()
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
@@ -0,0 +1,191 @@
+import sys
+import time
+
+import numpy as np
+
+from minesweeper_core import Board
+
+# 强化学习用的批量环境：N局独立的棋盘放在同一组 (N, 行, 列) 数组里一起推进，
+# 揭开、展开空白区域、判断胜负都是整批的数组运算，不逐局调用Board.left_click
+# 接口仿照Gym的向量环境：reset() -> 观测，step(动作) -> (观测, 奖励, 结束, 截断, 信息)
+# 观测为int8数组，-1表示未揭开，0-8为揭开格子的数字；动作为格子编号 行*列数+列
+# 规则与Board一致：雷在每局第一次点击时生成并避开该格；一局结束后该局自动重开
+
+HIDDEN_OBS = -1
+PLAYING, WON, LOST = 0, 1, 2
+
+
+def dilate(cells):
+    # 8邻域膨胀：先横向再纵向各扩一格，结果包含原来的格子
+    grown = cells.copy()
+    grown[:, :, 1:] |= cells[:, :, :-1]
+    grown[:, :, :-1] |= cells[:, :, 1:]
+    result = grown.copy()
+    result[:, 1:, :] |= grown[:, :-1, :]
+    result[:, :-1, :] |= grown[:, 1:, :]
+    return result
+
+
+def neighbour_counts(mines):
+    # 每格周围8格中的雷数
+    padded = np.pad(mines.astype(np.int8), ((0, 0), (1, 1), (1, 1)))
+    rows, cols = mines.shape[1:]
+    counts = np.zeros(mines.shape, dtype=np.int8)
+    for dr in (0, 1, 2):
+        for dc in (0, 1, 2):
+            if dr != 1 or dc != 1:
+                counts += padded[:, dr:dr + rows, dc:dc + cols]
+    return counts
+
+
+class BatchEnv:
+    REWARD_WIN = 1.0
+    REWARD_LOSS = -1.0
+    REWARD_PROGRESS = 0.1
+    # 点击已揭开的格子
+    REWARD_WASTED = -0.1
+
+    def __init__(self, num_envs, rows=9, cols=9, mines=10, seed=None):
+        if not 0 < mines < rows * cols:
+            raise ValueError("地雷数必须大于0且小于总格子数")
+        self.num_envs = num_envs
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.observation_shape = (num_envs, rows, cols)
+        self.num_actions = rows * cols
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        # 整批重开；同一种子和同一动作序列得到完全相同的对局
+        self.rng = np.random.default_rng(seed)
+        shape = self.observation_shape
+        self.mine = np.zeros(shape, dtype=bool)
+        self.counts = np.zeros(shape, dtype=np.int8)
+        self.opened = np.zeros(shape, dtype=bool)
+        self.obs = np.full(shape, HIDDEN_OBS, dtype=np.int8)
+        self.opened_count = np.zeros(self.num_envs, dtype=np.int32)
+        self.first_click = np.ones(self.num_envs, dtype=bool)
+        return self.obs.copy()
+
+    def reset_envs(self, envs):
+        self.mine[envs] = False
+        self.counts[envs] = 0
+        self.opened[envs] = False
+        self.obs[envs] = HIDDEN_OBS
+        self.opened_count[envs] = 0
+        self.first_click[envs] = True
+
+    def place_mines(self, envs, actions):
+        # 每局给所有格子一个随机键，取最小的mines个作为雷；首次点击的格子键设为最大，不会被选中
+        count = len(envs)
+        keys = self.rng.random((count, self.num_actions))
+        keys[np.arange(count), actions] = 2.0
+        picks = np.argpartition(keys, self.mines - 1, axis=1)[:, :self.mines]
+        mine = np.zeros((count, self.num_actions), dtype=bool)
+        np.put_along_axis(mine, picks, True, axis=1)
+        mine = mine.reshape(count, self.rows, self.cols)
+        self.mine[envs] = mine
+        self.counts[envs] = neighbour_counts(mine)
+        self.first_click[envs] = False
+
+    def flood(self, envs, seeds):
+        # 从揭开的空白格出发逐层膨胀，只在仍有新格子打开的局上继续，各局互不等待
+        mine = self.mine[envs]
+        zero = (self.counts[envs] == 0) & ~mine
+        opened = self.opened[envs]
+        region = seeds
+        active = np.arange(len(envs))
+        while len(active):
+            frontier = region[active] & zero[active]
+            grown = dilate(frontier) & ~opened[active] & ~region[active] & ~mine[active]
+            changed = grown.any(axis=(1, 2))
+            region[active] |= grown
+            active = active[changed]
+        return region
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        envs = np.arange(self.num_envs)
+        rows, cols = np.divmod(actions, self.cols)
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+
+        first = np.flatnonzero(self.first_click)
+        if len(first):
+            self.place_mines(first, actions[first])
+
+        wasted = self.opened[envs, rows, cols]
+        hit = self.mine[envs, rows, cols] & ~wasted
+        fresh = ~wasted & ~hit
+        rewards[wasted] = self.REWARD_WASTED
+
+        # 点到数字格只揭开一格；点到空白格时整批做区域展开
+        targets = np.flatnonzero(fresh)
+        seeds = np.zeros((len(targets),) + self.observation_shape[1:], dtype=bool)
+        seeds[np.arange(len(targets)), rows[targets], cols[targets]] = True
+        spread = self.counts[targets, rows[targets], cols[targets]] == 0
+        if spread.any():
+            seeds[spread] = self.flood(targets[spread], seeds[spread])
+        self.opened[targets] |= seeds
+        self.obs[targets] = np.where(self.opened[targets], self.counts[targets], HIDDEN_OBS)
+        self.opened_count[targets] += seeds.sum(axis=(1, 2), dtype=np.int32)
+        rewards[targets] = self.REWARD_PROGRESS
+
+        won = self.opened_count == self.num_actions - self.mines
+        rewards[won] = self.REWARD_WIN
+        rewards[hit] = self.REWARD_LOSS
+        status = np.full(self.num_envs, PLAYING, dtype=np.int8)
+        status[won] = WON
+        status[hit] = LOST
+        done = status != PLAYING
+
+        info = {"status": status}
+        finished = np.flatnonzero(done)
+        if len(finished):
+            # 与Gym向量环境相同，结束的局立即重开，返回的是新局的观测
+            info["final_observation"] = self.obs[finished].copy()
+            self.reset_envs(finished)
+        return self.obs.copy(), rewards, done, np.zeros(self.num_envs, dtype=bool), info
+
+    def action_mask(self):
+        # 未揭开的格子，形状(N, 行*列)
+        return ~self.opened.reshape(self.num_envs, -1)
+
+
+def random_actions(env, rng):
+    # 每局在未揭开的格子中均匀随机选一个
+    keys = rng.random((env.num_envs, env.num_actions))
+    keys[~env.action_mask()] = -1.0
+    return keys.argmax(axis=1)
+
+
+def benchmark(steps=200):
+    rng = np.random.default_rng(0)
+    for num_envs, rows, cols, mines in ((4096, 9, 9, 10), (1024, 16, 16, 40), (1024, 16, 30, 99)):
+        env = BatchEnv(num_envs, rows, cols, mines, seed=0)
+        actions = [random_actions(env, rng) for _ in range(steps)]
+        games = 0
+        start = time.perf_counter()
+        for batch in actions:
+            # 预先生成的动作可能点到已揭开的格子，计入浪费步数，不影响吞吐量测量
+            games += env.step(batch)[2].sum()
+        elapsed = time.perf_counter() - start
+        print(f"{num_envs}局 {rows}x{cols} {mines}雷: {num_envs * steps / elapsed:,.0f} 步/秒, "
+              f"完成 {games} 局")
+
+        # 对比：逐局调用Board.left_click
+        board_rng = np.random.default_rng(1)
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < 1.0:
+            board = Board(rows, cols, mines)
+            while board.status == "playing":
+                cell = divmod(int(board_rng.integers(rows * cols)), cols)
+                board.left_click(*cell)
+                count += 1
+        print(f"  逐局Board.left_click: {count / (time.perf_counter() - start):,.0f} 步/秒")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
@@ -0,0 +1,257 @@
+import sys
+import time
+import tracemalloc
+import zlib
+from array import array
+
+from minesweeper_core import Board, HIDDEN, OPENED, FLAGGED, MINE
+
+# 悔棋/重做：不复制整张棋盘，每步只保存可逆的增量
+#   左键  本步揭开的格子(编号 行*列数+列，存为array，每格4字节)以及前后的对局状态和踩中的格子
+#   右键  插旗或取消插旗的格子
+# 撤销时把这些格子恢复原状，重做时再应用一次，不重新执行扫雷规则，开销只与本步变化的格子数有关
+# 另外定期保存压缩快照(每格1字节的状态再zlib压缩)：跳到很远的步数时先恢复最近的快照再应用增量，
+# 两次快照之间的增量至少与格子数相当，保存快照的开销可以摊到它省下的增量上
+
+# 两次快照之间至少累积的增量(格子数+步数)，小棋盘上避免频繁保存快照
+CHECKPOINT_WORK = 256
+# 第0步的初始局面(全部未揭开)
+INITIAL = (0, None, 0, 0)
+
+
+class Step:
+    __slots__ = ("move", "r", "c", "cells", "before", "after")
+
+    def __init__(self, move, r, c, cells, before, after):
+        self.move = move
+        self.r = r
+        self.c = c
+        self.cells = cells
+        # 本步前后的(对局状态, 踩中的格子)
+        self.before = before
+        self.after = after
+
+
+class History:
+    def __init__(self, board):
+        self.board = board
+        self.steps = []
+        # 已应用的步数，steps[position:]为可以重做的步骤
+        self.position = 0
+        # [(步数, 压缩的状态, 已揭开数, 旗子数)]，按步数递增；第0步是全部未揭开的初始局面，不需要快照
+        self.checkpoints = []
+        self.work = 0
+
+    def outcome(self):
+        return self.board.status, self.board.exploded
+
+    def record(self, move, r, c, cells, before):
+        # 在历史中间走了新的一步：丢弃可以重做的步骤和它们之后的快照
+        del self.steps[self.position:]
+        while self.checkpoints and self.checkpoints[-1][0] > self.position:
+            self.checkpoints.pop()
+        self.steps.append(Step(move, r, c, cells, before, self.outcome()))
+        self.position += 1
+        self.work += len(cells) + 1
+        board = self.board
+        # 快照要扫描整张棋盘，累积的增量至少与格子数相当时才值得保存
+        if self.work >= max(CHECKPOINT_WORK, board.rows * board.cols):
+            self.checkpoints.append(self.snapshot())
+            self.work = 0
+
+    def left_click(self, r, c):
+        board = self.board
+        before = self.outcome()
+        opened = board.left_click(r, c)
+        if opened or board.status != before[0]:
+            cols = board.cols
+            self.record("L", r, c, array("I", [nr * cols + nc for nr, nc in opened]), before)
+        return opened
+
+    def right_click(self, r, c):
+        board = self.board
+        changed = board.right_click(r, c)
+        if changed:
+            self.record("R", r, c, array("I", [r * board.cols + c]), self.outcome())
+        return changed
+
+    def snapshot(self):
+        board = self.board
+        states = bytearray(board.rows * board.cols)
+        index = 0
+        for r in range(board.rows):
+            row = board.state[r]
+            for c in range(board.cols):
+                states[index] = row[c]
+                index += 1
+        return self.position, zlib.compress(bytes(states), 1), board.opened, board.flags
+
+    def cell(self, index):
+        return divmod(index, self.board.cols)
+
+    def apply(self, step, forward):
+        # 正向或反向应用一步，返回状态发生变化的格子
+        board = self.board
+        state = board.state
+        cells = [self.cell(index) for index in step.cells]
+        if step.move == "L":
+            value = OPENED if forward else HIDDEN
+            for r, c in cells:
+                state[r][c] = value
+            board.opened += len(cells) if forward else -len(cells)
+        else:
+            r, c = cells[0]
+            flagged = state[r][c] == FLAGGED
+            state[r][c] = HIDDEN if flagged else FLAGGED
+            board.flags += -1 if flagged else 1
+        board.status, board.exploded = step.after if forward else step.before
+        # 踩中的格子(本身不在揭开列表里)在撤销和重做时都要重绘
+        exploded = step.after[1] if step.after[1] != step.before[1] else None
+        if exploded is not None:
+            cells.append(exploded)
+        return cells
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.steps)
+
+    def undo(self):
+        # 没有可以撤销的步骤时返回None
+        if not self.can_undo():
+            return None
+        self.position -= 1
+        return self.apply(self.steps[self.position], False)
+
+    def redo(self):
+        if not self.can_redo():
+            return None
+        step = self.steps[self.position]
+        self.position += 1
+        return self.apply(step, True)
+
+    def goto(self, position):
+        # 跳到第position步；逐步撤销/重做和从快照恢复之间选开销小的一种，返回变化的格子
+        position = max(0, min(position, len(self.steps)))
+        low, high = sorted((self.position, position))
+        walk = sum(len(step.cells) + 1 for step in self.steps[low:high])
+        checkpoint = INITIAL
+        for candidate in self.checkpoints:
+            if candidate[0] <= position:
+                checkpoint = candidate
+        board = self.board
+        replay = board.rows * board.cols + sum(len(step.cells) + 1
+                                               for step in self.steps[checkpoint[0]:position])
+        if replay < walk:
+            changed = self.restore(checkpoint)
+        else:
+            changed = set()
+        while self.position > position:
+            changed.update(self.undo())
+        while self.position < position:
+            changed.update(self.redo())
+        return list(changed)
+
+    def restore(self, checkpoint):
+        # 用快照覆盖整个棋盘状态，返回与当前状态不同的格子
+        position, data, opened, flags = checkpoint
+        board = self.board
+        states = zlib.decompress(data) if data is not None else bytes(board.rows * board.cols)
+        changed = set()
+        index = 0
+        for r in range(board.rows):
+            row = board.state[r]
+            for c in range(board.cols):
+                if row[c] != states[index]:
+                    row[c] = states[index]
+                    changed.add((r, c))
+                index += 1
+        if board.exploded is not None:
+            changed.add(board.exploded)
+        board.opened, board.flags = opened, flags
+        board.status, board.exploded = self.steps[position - 1].after if position else ("playing", None)
+        if board.exploded is not None:
+            changed.add(board.exploded)
+        self.position = position
+        return changed
+
+    def play(self, move, r, c):
+        # 按对局日志的操作代码走一步：L左键、R右键、U撤销、Y重做、G跳到第r步
+        # 返回状态变化的格子，没有变化时返回空列表
+        if move == "L":
+            return self.left_click(r, c)
+        if move == "R":
+            return [(r, c)] if self.right_click(r, c) else []
+        if move == "U":
+            return self.undo() or []
+        if move == "Y":
+            return self.redo() or []
+        if move == "G":
+            return self.goto(r)
+        raise ValueError(f"未知的操作: {move}")
+
+    def moves(self):
+        # 全部步骤(包括可以重做的) [(操作, 行, 列)]，重新写对局日志时再补一条 G 当前步数
+        return [(step.move, step.r, step.c) for step in self.steps]
+
+    def memory(self):
+        # 历史占用的字节数(近似)：增量数组和快照
+        return (sum(step.cells.itemsize * len(step.cells) + 120 for step in self.steps)
+                + sum(len(checkpoint[1]) for checkpoint in self.checkpoints))
+
+
+def benchmark(rows=1000, cols=1000, mines=150000):
+    # 大棋盘上走一局，对比每步复制整张状态表与保存增量的内存，以及撤销一次大面积展开的耗时
+    board = Board(rows, cols, mines, seed=2, lazy=True)
+    history = History(board)
+    history.left_click(rows // 2, cols // 2)
+    moves = 0
+    start = time.perf_counter()
+    for r in range(0, rows, 7):
+        for c in range(0, cols, 7):
+            if board.status != "playing":
+                break
+            if board.state[r][c] != HIDDEN:
+                continue
+            if board.grid[r][c] == MINE:
+                history.right_click(r, c)
+            else:
+                history.left_click(r, c)
+            moves += 1
+    elapsed = time.perf_counter() - start
+    print(f"{rows}x{cols} 走 {len(history.steps)} 步: 记录增量 {elapsed / moves * 1e6:.1f} µs/步, "
+          f"历史 {history.memory() / 2**20:.1f} MB, 快照 {len(history.checkpoints)} 个")
+
+    tracemalloc.start()
+    copy = [row[:] for row in board.state]
+    copied = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copy
+    print(f"  对比：每步复制状态表 {copied / 2**20:.1f} MB/步, "
+          f"{len(history.steps)} 步共 {copied * len(history.steps) / 2**30:.1f} GB")
+
+    opened = board.opened
+    start = time.perf_counter()
+    repainted = len(history.goto(1))
+    print(f"  跳回第1步: {(time.perf_counter() - start) * 1000:.0f} ms, 重绘 {repainted} 格")
+    start = time.perf_counter()
+    history.goto(len(history.steps))
+    print(f"  重做到最后一步: {(time.perf_counter() - start) * 1000:.0f} ms")
+    # 展开格子最多的一步，撤销和重做都只动这些格子
+    largest = max(range(len(history.steps)), key=lambda i: len(history.steps[i].cells))
+    history.goto(largest + 1)
+    start = time.perf_counter()
+    changed = history.undo()
+    print(f"  撤销第 {largest + 1} 步(展开 {len(changed)} 格): "
+          f"{(time.perf_counter() - start) * 1000:.2f} ms")
+    start = time.perf_counter()
+    history.redo()
+    print(f"  重做这一步: {(time.perf_counter() - start) * 1000:.2f} ms")
+    history.goto(len(history.steps))
+    assert board.opened == opened
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
@@ -0,0 +1,432 @@
+import atexit
+import collections
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from minesweeper_core import Board, MINE, data_path
+from minesweeper_history import History
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# 对局日志：每局一个只追加的文本文件，崩溃或被杀掉后可以按日志重放恢复
+#   第一行   JSON头: {"rows", "cols", "mines", "seed", "started"}；
+#            已经布好雷的棋盘(结束后悔棋重新写日志)另有"layout"，重放时直接载入，不按第一步重新布雷
+#   之后每行 一步操作: "L 行 列 用时" 或 "R 行 列 用时"；
+#            悔棋为 "U 0 0 用时"，重做为 "Y 0 0 用时"，跳到第n步为 "G n 0 用时"
+# 界面线程记录一步只是一次队列put；后台线程把一段时间内的所有操作一起写入并只fsync一次(组提交)
+# 对局结束后日志由后台线程移到 games/ 目录，供导出回放(minesweeper_render.py)，只保留最近KEEP_FINISHED局；
+# 主动放弃的未完成对局直接删除
+# 崩溃时最后一行可能只写了一半，读取时忽略没有换行结尾的行
+# 写入线程打开日志后一直持有排他锁(flock，Windows上锁住第一个字节)，进程退出时自动释放：
+# 查找可恢复的对局时跳过加不上锁的日志，它们属于其他实例或独立进程中正在进行的对局
+# 写入线程最多同时打开MAX_OPEN_JOURNALS个日志，超出时关闭最久没写的(同时释放它的锁)，下次写入时重新打开加锁；
+# 某个日志写入出错(磁盘满、句柄用完)时报告并放弃这一局的日志，写入线程继续处理其他对局
+
+JOURNAL_DIR = "journal"
+FINISHED_DIR = "games"
+# 服务器的对局数量远多于图形界面，单独存放和按KEEP_FINISHED清理，不会挤掉图形界面的回放
+SERVER_FINISHED_DIR = "server-games"
+KEEP_FINISHED = 200
+MOVES = ("L", "R", "U", "Y", "G")
+# 刚创建、写入线程还没来得及加锁的空日志，这段时间内不当作损坏的日志删除
+NEW_JOURNAL_SECONDS = 60
+MAX_OPEN_JOURNALS = 64
+
+
+def journal_dir(name=JOURNAL_DIR):
+    path = data_path(name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def finished_games(directory=None):
+    # 已结束对局的日志路径，按开始时间从早到晚(文件名以毫秒时间戳开头)
+    directory = directory or journal_dir(FINISHED_DIR)
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if name.endswith(".log")]
+
+
+def try_lock(f):
+    # 非阻塞地给打开的日志加排他锁，锁随文件关闭释放；已被其他进程(或同一进程的另一个句柄)锁住时返回False
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+class JournalWriter:
+    _instance = None
+
+    @classmethod
+    def get(cls):
+        # 每个进程共用一个写入线程，多局同时进行时一次fsync覆盖所有文件
+        if cls._instance is None:
+            cls._instance = cls()
+            atexit.register(cls._instance.close)
+        return cls._instance
+
+    def __init__(self, flush_interval=0.05):
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue()
+        self.files = collections.OrderedDict()  # 按最近写入排序
+        self.max_open = MAX_OPEN_JOURNALS
+        self.failed = set()     # 写入出过错的日志，之后的操作不再写入
+        self.commits = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.thread.start()
+
+    def append(self, path, text):
+        self.pending.put(("append", path, text))
+
+    def remove(self, path):
+        self.pending.put(("remove", path, None))
+
+    def adopt(self, path, f):
+        # 接管已经加锁的日志文件(恢复的对局)，之后的操作写入这个句柄，锁一直不释放
+        self.pending.put(("adopt", path, f))
+
+    def archive(self, path, directory):
+        # 写完之前的操作后把日志移到directory
+        self.pending.put(("archive", path, directory))
+
+    def write_loop(self):
+        running = True
+        while running:
+            batch = []
+            try:
+                item = self.pending.get()
+                deadline = time.monotonic() + self.flush_interval
+                while item is not None:
+                    batch.append(item)
+                    item = self.pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                else:
+                    running = False
+            except queue.Empty:
+                pass
+            self.commit(batch)
+        while self.files:
+            self.close_file(self.files.popitem(last=False)[1])
+
+    def commit(self, batch):
+        touched = set()
+        for action, path, text in batch:
+            try:
+                if action == "adopt":
+                    self.files[path] = text
+                elif action == "append":
+                    if path in self.failed:
+                        continue
+                    f = self.files.get(path)
+                    if f is None:
+                        f = open(path, "a", encoding="utf-8")
+                        if not try_lock(f):
+                            f.close()
+                            raise OSError("日志已被其他实例锁住")
+                        self.files[path] = f
+                    else:
+                        self.files.move_to_end(path)
+                    f.write(text)
+                    touched.add(path)
+                else:
+                    self.failed.discard(path)
+                    touched.discard(path)
+                    f = self.files.pop(path, None)
+                    if f is not None:
+                        if action == "archive":
+                            f.flush()
+                            os.fsync(f.fileno())
+                        f.close()
+                    try:
+                        if action == "archive":
+                            os.replace(path, os.path.join(text, os.path.basename(path)))
+                            self.prune(text)
+                        else:
+                            os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            except OSError as e:
+                self.fail(path, e)
+                touched.discard(path)
+        for path in touched:
+            f = self.files[path]
+            try:
+                f.flush()
+                os.fsync(f.fileno())
+            except OSError as e:
+                self.fail(path, e)
+        # 本批写过的都已fsync，关闭最久没写的日志直到不超过上限
+        while len(self.files) > self.max_open:
+            self.close_file(self.files.popitem(last=False)[1])
+        if touched:
+            self.commits += 1
+
+    def fail(self, path, error):
+        # 只放弃这一局的日志：写了一半的行后面不能再接着写，关闭句柄，之后的操作也不再写入
+        print(f"对局日志写入失败: {path}: {error}", file=sys.stderr)
+        self.failed.add(path)
+        f = self.files.pop(path, None)
+        if f is not None:
+            self.close_file(f)
+
+    def close_file(self, f):
+        try:
+            f.close()
+        except OSError as e:
+            print(f"对局日志关闭失败: {f.name}: {e}", file=sys.stderr)
+
+    def prune(self, directory):
+        for path in finished_games(directory)[:-KEEP_FINISHED]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        # 写完队列中剩余的操作后退出
+        if self.closed:
+            return
+        self.closed = True
+        self.pending.put(None)
+        self.thread.join()
+
+
+class GameJournal:
+    def __init__(self, path, writer=None, finished=None, locked=None):
+        self.path = path
+        self.writer = writer or JournalWriter.get()
+        # 对局结束后日志移到的目录
+        self.finished = finished
+        # 恢复的对局：查找时已经打开并加锁的文件交给写入线程，中间不释放锁
+        if locked is not None:
+            self.writer.adopt(path, locked)
+
+    @classmethod
+    def start(cls, board, directory=None, writer=None, finished=None):
+        name = f"{int(time.time() * 1000)}-{board.seed}.log"
+        journal = cls(os.path.join(directory or journal_dir(), name), writer, finished)
+        header = {"rows": board.rows, "cols": board.cols, "mines": board.mines,
+                  "seed": board.seed, "started": time.time()}
+        if not board.first_click:
+            # 重新写的日志里第一步不一定是当初的第一次点击(可能已被撤销后改走别处)，按它重新布雷会得到另一局
+            header["layout"] = board.layout()
+        journal.writer.append(journal.path, json.dumps(header) + "\n")
+        return journal
+
+    def log(self, move, r, c, elapsed):
+        self.writer.append(self.path, f"{move} {r} {c} {elapsed:.1f}\n")
+
+    def finish(self):
+        self.writer.archive(self.path, self.finished or journal_dir(FINISHED_DIR))
+
+    def discard(self):
+        # 主动退出未完成的对局时不再保留
+        self.writer.remove(self.path)
+
+
+def read_journal(path):
+    # 返回(头信息, [(操作, 行, 列, 用时)])；文件损坏时返回None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return parse_journal(f.read())
+    except OSError:
+        return None
+
+
+def parse_journal(text):
+    lines = text.split("\n")
+    # 最后一段没有换行结尾(空串或写了一半的行)，丢弃
+    lines.pop()
+    if not lines:
+        return None
+    try:
+        header = json.loads(lines[0])
+        moves = []
+        for line in lines[1:]:
+            move, r, c, elapsed = line.split()
+            if move not in MOVES:
+                raise ValueError(move)
+            moves.append((move, int(r), int(c), float(elapsed)))
+    except ValueError:
+        return None
+    return header, moves
+
+
+def header_board(header):
+    # 按日志头建一个还没有操作的棋盘：有布局时直接载入，否则由同一种子在第一步时布雷
+    board = Board(header["rows"], header["cols"], header["mines"], header["seed"])
+    if "layout" in header:
+        board.load_layout(header["layout"])
+    return board
+
+
+def replay_history(header, moves):
+    # 在同一种子的棋盘上重放所有操作(包括悔棋)，得到崩溃前的局面、完整的悔棋历史和已用时间
+    history = History(header_board(header))
+    elapsed = 0.0
+    for move, r, c, elapsed in moves:
+        history.play(move, r, c)
+    return history, elapsed
+
+
+def replay(header, moves):
+    history, elapsed = replay_history(header, moves)
+    return history.board, elapsed
+
+
+def unfinished_games(directory=None, writer=None):
+    # 可以恢复的对局：[(日志, 悔棋历史, 已用时间)]，棋盘为history.board；日志保持加锁，继续写入或discard()
+    # 加不上锁的日志属于正在进行的对局，不读也不动；无法读取或还没点过的日志顺便删除，
+    # 已经结束(结束后来不及移走就退出了)的移到 games/
+    directory = directory or journal_dir()
+    games = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        try:
+            f = open(path, "a+", encoding="utf-8")
+        except OSError:
+            continue
+        if not try_lock(f):
+            f.close()
+            continue
+        f.seek(0)
+        text = f.read()
+        if not text and time.time() - os.path.getmtime(path) < NEW_JOURNAL_SECONDS:
+            f.close()
+            continue
+        record = parse_journal(text)
+        board = None
+        if record is not None:
+            history, elapsed = replay_history(*record)
+            board = history.board
+        if board is None or board.first_click or board.status != "playing":
+            # Windows上要先关闭才能删除或移动
+            f.close()
+            if board is None or board.first_click:
+                os.remove(path)
+            else:
+                os.replace(path, os.path.join(journal_dir(FINISHED_DIR), name))
+            continue
+        games.append((GameJournal(path, writer, locked=f), history, elapsed))
+    return games
+
+
+def benchmark(moves=20000):
+    directory = tempfile.mkdtemp()
+    writer = JournalWriter()
+    board = Board(200, 200, 4000, seed=1)
+    journal = GameJournal.start(board, directory, writer)
+    cells = [(r, c) for r in range(board.rows) for c in range(board.cols)]
+    random.Random(0).shuffle(cells)
+    cells = cells[:moves]
+
+    # 在棋盘上实际走一遍(安全格左键、雷插旗)，只计入记录日志的开销
+    logged = 0.0
+    for i, (r, c) in enumerate(cells):
+        move = "R" if not board.first_click and board.grid[r][c] == MINE else "L"
+        if move == "L":
+            board.left_click(r, c)
+        else:
+            board.right_click(r, c)
+        start = time.perf_counter()
+        journal.log(move, r, c, i * 0.1)
+        logged += time.perf_counter() - start
+    writer.close()
+    print(f"记录 {moves} 步: {logged / moves * 1e6:.2f} µs/步 (界面线程开销), "
+          f"fsync {writer.commits} 次")
+
+    record = read_journal(journal.path)
+    start = time.perf_counter()
+    replayed, elapsed = replay(*record)
+    print(f"重放 {len(record[1])} 步: {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"状态 {replayed.status}, 已揭开 {replayed.opened} 格, 用时 {elapsed:.1f} 秒")
+    assert replayed.view() == board.view()
+    os.remove(journal.path)
+    os.rmdir(directory)
+
+
+def check():
+    # 撤销第一次点击后改点一个雷结束，再按历史重新写日志：日志里的第一步成了这个雷，
+    # 按它重新布雷会把它排除在外，重放必须载入原来的布局才能得到同一个局面
+    directory = tempfile.mkdtemp()
+    writer = JournalWriter()
+    history = History(Board(9, 9, 10, seed=3))
+    board = history.board
+    history.left_click(0, 0)
+    history.undo()
+    mine = next((r, c) for r in range(9) for c in range(9) if board.grid[r][c] == MINE)
+    history.left_click(*mine)
+    assert board.status == "lost"
+    history.undo()
+    journal = GameJournal.start(board, directory, writer)
+    for i, (move, r, c) in enumerate(history.moves()):
+        journal.log(move, r, c, i)
+    journal.log("U", 0, 0, 2)
+    writer.close()
+    replayed, elapsed = replay(*read_journal(journal.path))
+    assert replayed.layout() == board.layout()
+    assert replayed.view() == board.view() and replayed.status == "playing"
+    assert elapsed == 2
+    os.remove(journal.path)
+
+    # 另一个写入线程(相当于另一个实例)正在写的日志加着锁，查找时跳过，也不删除；
+    # 写入线程退出释放锁之后才能恢复，恢复后的日志继续加锁，discard()删除
+    running = JournalWriter()
+    board = Board(9, 9, 10, seed=3)
+    journal = GameJournal.start(board, directory, running)
+    board.left_click(0, 0)
+    journal.log("L", 0, 0, 1)
+    while read_journal(journal.path) is None or not read_journal(journal.path)[1]:
+        time.sleep(0.01)
+    resumer = JournalWriter()
+    assert unfinished_games(directory, resumer) == [] and os.path.exists(journal.path)
+    running.close()
+    games = unfinished_games(directory, resumer)
+    assert len(games) == 1 and games[0][1].board.view() == board.view()
+    other = JournalWriter()
+    assert unfinished_games(directory, other) == []
+    other.close()
+    games[0][0].discard()
+    resumer.close()
+    assert not os.listdir(directory)
+
+    # 句柄数超过上限时关闭最久没写的日志，之后写入时重新打开；一个日志出错不影响写入线程和其他日志
+    writer = JournalWriter()
+    writer.max_open = 2
+    journals = [GameJournal.start(Board(9, 9, 10, seed=i), directory, writer) for i in range(4)]
+    missing = GameJournal.start(Board(9, 9, 10, seed=9), os.path.join(directory, "missing"), writer)
+    for i in range(3):
+        for journal in journals + [missing]:
+            journal.log("L", i, 0, i)
+        time.sleep(0.2)
+        assert len(writer.files) <= 2 and writer.thread.is_alive()
+    writer.close()
+    for journal in journals:
+        header, moves = read_journal(journal.path)
+        assert len(moves) == 3, moves
+        os.remove(journal.path)
+    assert missing.path in writer.failed
+    os.rmdir(directory)
+    print("ok")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    if "--check" in sys.argv:
+        check()
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from minesweeper_protocol import FRAME_ERROR, Delta
+
+# 扫雷服务器压测客户端：大量并发连接随机点击，统计吞吐量和每步延迟
+
+
+async def play(host, port, rows, cols, mines, deadline, latencies, counters, binary):
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+
+    async def request(line):
+        writer.write(line.encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    async def move(line):
+        # 读取一步的增量回复
+        writer.write(line.encode() + b"\n")
+        await writer.drain()
+        if binary:
+            header = await reader.readexactly(5)
+            payload = await reader.readexactly(int.from_bytes(header[1:], "big"))
+            if header[:1] == FRAME_ERROR:
+                raise ValueError(json.loads(payload)["error"])
+            return Delta.from_bytes(payload)
+        reply = await reader.readline()
+        if reply.startswith(b'{"error"'):
+            raise ValueError(json.loads(reply)["error"])
+        return Delta.from_json(reply)
+
+    try:
+        if binary:
+            await request("PROTO binary")
+        while time.perf_counter() < deadline:
+            await request(f"NEW {rows} {cols} {mines}")
+            # 打乱所有格子，依次弹出；已被展开的格子跳过
+            order = [(r, c) for r in range(rows) for c in range(cols)]
+            rng.shuffle(order)
+            opened = set()
+            status = "playing"
+            while status == "playing" and order and time.perf_counter() < deadline:
+                cell = order.pop()
+                if cell in opened:
+                    continue
+                start = time.perf_counter()
+                delta = await move(f"L {cell[0]} {cell[1]}")
+                latencies.append(time.perf_counter() - start)
+                status = delta.status
+                opened.update(divmod(index, cols) for index, _ in delta.revealed())
+            counters["games"] += 1
+            counters["wins"] += status == "won"
+        writer.write(b"QUIT\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run(host, port, clients, duration, rows, cols, mines, binary=False):
+    latencies = []
+    counters = {"games": 0, "wins": 0}
+    start = time.perf_counter()
+    deadline = start + duration
+    results = await asyncio.gather(
+        *(play(host, port, rows, cols, mines, deadline, latencies, counters, binary)
+          for _ in range(clients)),
+        return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    errors = [result for result in results if isinstance(result, Exception)]
+
+    latencies.sort()
+    print(f"并发连接: {clients}  失败连接: {len(errors)}  时长: {elapsed:.1f} s")
+    print(f"完成对局: {counters['games']}  胜利: {counters['wins']}")
+    print(f"总步数: {len(latencies)}  吞吐量: {len(latencies) / elapsed:.0f} 步/秒")
+    print(f"延迟 p50: {percentile(latencies, 0.50) * 1000:.2f} ms  "
+          f"p99: {percentile(latencies, 0.99) * 1000:.2f} ms  "
+          f"最大: {(latencies[-1] if latencies else 0) * 1000:.2f} ms")
+    if errors:
+        print(f"首个错误: {errors[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="扫雷服务器压测客户端")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--rows", type=int, default=16)
+    parser.add_argument("--cols", type=int, default=16)
+    parser.add_argument("--mines", type=int, default=40)
+    parser.add_argument("--binary", action="store_true", help="使用二进制增量编码")
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.clients, args.duration,
+                    args.rows, args.cols, args.mines, args.binary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from minesweeper_core import Board, HIDDEN, MINE, data_path
+from minesweeper_history import History
+from minesweeper_solver import FrontierAnalyzer
+from minesweeper_sparse import SparseBoard
+
+# 开局前的资源预估：按每格/每雷的实测开销预测棋盘的内存和耗时，
+# 自动选出最省的存储方式(嵌套列表Board、延迟计数Board、稀疏分块SparseBoard)，超出预算的配置直接拒绝
+# 开销模型对每种存储方式是线性的：
+#   开局耗时 = 固定开销 + 每格开销 x 格子数 + 每雷开销 x 雷数 (创建棋盘和首次点击)
+#   游玩耗时 = 同上 (把所有安全格依次点开)
+#   内存     = 同上 (所有安全格都揭开之后的占用)
+# 系数由calibrate()在两种大小、两种雷密度下实测，用非负最小二乘拟合，结果缓存在 ~/.minesweeper/preflight.json，
+# 没有缓存时使用下面的默认值(在开发机上测得)
+# 图形界面的开销另计：
+#   每格一个Canvas图片项 - 耗时和内存在图形界面第一次需要时实测(measure_canvas)
+#   每格的Python结构(图片项编号表、增量分析器的可见棋盘和约束、悔棋历史) - 与存储方式无关，
+#   同样由calibrate()拟合，记在"interface"下
+
+MODES = ("board", "lazy", "sparse")
+# 各渲染方式能使用的存储方式；图形界面按格子读写，只用嵌套列表的两种
+RENDERER_MODES = {"canvas": ("board", "lazy"), "terminal": MODES}
+
+# (固定开销, 每格开销, 每雷开销)，耗时单位为秒，内存单位为字节
+DEFAULT_COSTS = {
+    "board": {"startup": (0.07, 1.43e-06, 7.7e-06), "play": (0.015, 2.1e-07, 1.9e-06),
+              "bytes": (0.0, 60.8, 0.0)},
+    "lazy": {"startup": (0.0, 0.0, 3.8e-06), "play": (0.0, 7.6e-06, 0.0),
+             "bytes": (128000.0, 16.2, 0.0)},
+    "sparse": {"startup": (0.036, 0.0, 1.4e-08), "play": (0.057, 4.5e-06, 2.1e-05),
+               "bytes": (43000.0, 2.4, 37.8)},
+    "interface": {"bytes": (720000.0, 168.0, 403.0)},
+}
+# Canvas图片项的默认开销，只在无法实测时使用：Tk在C层分配内存，tracemalloc看不到，
+# 字节数由进程常驻内存的增长测得(resident_bytes)，读不到常驻内存的平台按Tk canvas图片项结构体估计
+CANVAS_ITEM_SECONDS = 1.5e-05
+CANVAS_ITEM_BYTES = 300
+
+MEMORY_BUDGET = 1 << 30
+TIME_BUDGET = 10.0
+CALIBRATION_SIZES = ((200, 200), (400, 400))
+# 雷密度太低时首次点击会连片展开大半个棋盘，测到的开局开销会偏大
+CALIBRATION_DENSITIES = (0.15, 0.3)
+
+
+def build_board(mode, rows, cols, mines, seed=None):
+    if mode == "sparse":
+        return SparseBoard(rows, cols, mines, seed)
+    return Board(rows, cols, mines, seed, lazy=mode == "lazy")
+
+
+def play_through(board):
+    # 依次点开所有安全格，相当于一局下来每个格子都被揭开一次
+    for r in range(board.rows):
+        state, grid = board.state[r], board.grid[r]
+        for c in range(board.cols):
+            if state[c] == HIDDEN and grid[c] != MINE:
+                board.left_click(r, c)
+
+
+def measure(mode, rows, cols, mines):
+    # 返回(开局秒数, 游玩秒数, 字节数)；tracemalloc会明显拖慢执行，内存单独再跑一遍
+    board = build_board(mode, rows, cols, mines, seed=1)
+    start = time.perf_counter()
+    board.left_click(rows // 2, cols // 2)
+    startup = time.perf_counter() - start
+    board = build_board(mode, rows, cols, mines, seed=1)
+    board.left_click(rows // 2, cols // 2)
+    start = time.perf_counter()
+    play_through(board)
+    play = time.perf_counter() - start
+    del board
+
+    tracemalloc.start()
+    board = build_board(mode, rows, cols, mines, seed=1)
+    board.left_click(rows // 2, cols // 2)
+    play_through(board)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # 创建棋盘的耗时计入开局
+    start = time.perf_counter()
+    build_board(mode, rows, cols, mines, seed=1)
+    startup += time.perf_counter() - start
+    return startup, play, memory
+
+
+def measure_interface(rows, cols, mines):
+    # 图形界面每局另外持有的Python结构，按一局从头走到尾的峰值计算：
+    # Canvas图片项编号表(每格一个int)、增量分析器(跟随每一步更新)、悔棋历史(每步的增量和快照)
+    tracemalloc.start()
+    board = Board(rows, cols, mines, seed=1)
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    items = [[r * cols + c + 1000 for c in range(cols)] for r in range(rows)]
+    analyzer = FrontierAnalyzer(rows, cols, mines)
+    history = History(board)
+    analyzer.observe_board(board, history.left_click(rows // 2, cols // 2))
+    for r in range(rows):
+        state, grid = board.state[r], board.grid[r]
+        for c in range(cols):
+            if state[c] == HIDDEN and grid[c] != MINE:
+                analyzer.observe_board(board, history.left_click(r, c))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del items, analyzer, history
+    return peak - base
+
+
+def least_squares(samples, columns):
+    # 只用columns里的系数拟合，解正规方程；samples为[(特征, 观测值)]
+    size = len(columns)
+    matrix = [[sum(x[i] * x[j] for x, _ in samples) for j in columns] for i in columns]
+    vector = [sum(x[i] * y for x, y in samples) for i in columns]
+    for k in range(size):
+        pivot = max(range(k, size), key=lambda i: abs(matrix[i][k]))
+        matrix[k], matrix[pivot] = matrix[pivot], matrix[k]
+        vector[k], vector[pivot] = vector[pivot], vector[k]
+        if matrix[k][k] == 0:
+            return None
+        for i in range(k + 1, size):
+            factor = matrix[i][k] / matrix[k][k]
+            for j in range(k, size):
+                matrix[i][j] -= factor * matrix[k][j]
+            vector[i] -= factor * vector[k]
+    solution = [0.0] * size
+    for k in reversed(range(size)):
+        solution[k] = (vector[k] - sum(matrix[k][j] * solution[j]
+                                       for j in range(k + 1, size))) / matrix[k][k]
+    coefficients = [0.0, 0.0, 0.0]
+    for column, value in zip(columns, solution):
+        coefficients[column] = value
+    return coefficients
+
+
+def fit(samples):
+    # 非负最小二乘：系数只有3个，枚举所有取值非零的子集，取残差最小且全部非负的一组
+    # 特征先按量级归一化，否则格子数的平方会淹没固定开销
+    scales = [max(abs(x[i]) for x, _ in samples) or 1.0 for i in range(3)]
+    scaled = [([x[i] / scales[i] for i in range(3)], y) for x, y in samples]
+    best, best_error = (0.0, 0.0, 0.0), sum(y * y for _, y in samples)
+    for columns in ((0,), (1,), (2,), (0, 1), (0, 2), (1, 2), (0, 1, 2)):
+        coefficients = least_squares(scaled, columns)
+        if coefficients is None or min(coefficients) < 0:
+            continue
+        error = sum((y - sum(a * b for a, b in zip(coefficients, x))) ** 2 for x, y in scaled)
+        if error < best_error:
+            best, best_error = coefficients, error
+    return tuple(value / scale for value, scale in zip(best, scales))
+
+
+def calibrate(modes=MODES):
+    costs = {}
+    for mode in modes:
+        samples = []
+        for rows, cols in CALIBRATION_SIZES:
+            for density in CALIBRATION_DENSITIES:
+                mines = int(rows * cols * density)
+                samples.append(((1.0, rows * cols, mines), measure(mode, rows, cols, mines)))
+        costs[mode] = {name: fit([(x, result[i]) for x, result in samples])
+                       for i, name in enumerate(("startup", "play", "bytes"))}
+    samples = []
+    for rows, cols in CALIBRATION_SIZES:
+        for density in CALIBRATION_DENSITIES:
+            mines = int(rows * cols * density)
+            samples.append(((1.0, rows * cols, mines), measure_interface(rows, cols, mines)))
+    costs["interface"] = {"bytes": fit(samples)}
+    return costs
+
+
+def costs_path():
+    return data_path("preflight.json")
+
+
+def load_costs():
+    try:
+        with open(costs_path(), encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return DEFAULT_COSTS
+    return {mode: {name: tuple(saved.get(mode, {}).get(name, DEFAULT_COSTS[mode][name]))
+                   for name in DEFAULT_COSTS[mode]} for mode in DEFAULT_COSTS}
+
+
+def save_costs(costs):
+    with open(costs_path(), "w", encoding="utf-8") as f:
+        json.dump(costs, f, indent=1)
+
+
+class Estimate:
+    def __init__(self, mode, renderer, rows, cols, mines, costs, canvas_seconds=CANVAS_ITEM_SECONDS,
+                 canvas_bytes=CANVAS_ITEM_BYTES):
+        cells = rows * cols
+        cost = costs[mode]
+        self.mode = mode
+        self.renderer = renderer
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.startup, self.play, self.memory = (base + per_cell * cells + per_mine * mines
+                                                for base, per_cell, per_mine in
+                                                (cost["startup"], cost["play"], cost["bytes"]))
+        if renderer == "canvas":
+            base, per_cell, per_mine = costs.get("interface", DEFAULT_COSTS["interface"])["bytes"]
+            self.startup += canvas_seconds * cells
+            self.memory += canvas_bytes * cells + base + per_cell * cells + per_mine * mines
+
+    def fits(self, memory_budget=MEMORY_BUDGET, time_budget=TIME_BUDGET):
+        return self.memory <= memory_budget and self.startup <= time_budget
+
+    def build(self, seed=None):
+        return build_board(self.mode, self.rows, self.cols, self.mines, seed)
+
+    def describe(self):
+        return (f"{self.mode}/{self.renderer}: 内存约 {format_bytes(self.memory)}, "
+                f"开局约 {self.startup:.2f} 秒, 全部揭开约 {self.play:.1f} 秒")
+
+
+class OverBudget(ValueError):
+    def __init__(self, message, estimates):
+        super().__init__(message)
+        # 所有候选方案的预估，按内存从小到大
+        self.estimates = estimates
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def plan(rows, cols, mines, renderers=("canvas",), memory_budget=MEMORY_BUDGET,
+         time_budget=TIME_BUDGET, costs=None, canvas_seconds=CANVAS_ITEM_SECONDS,
+         canvas_bytes=CANVAS_ITEM_BYTES):
+    # 在预算内的方案中选开局加游玩总耗时最少的一个；都超出预算时抛出OverBudget
+    costs = costs or load_costs()
+    estimates = [Estimate(mode, renderer, rows, cols, mines, costs, canvas_seconds, canvas_bytes)
+                 for renderer in renderers for mode in RENDERER_MODES[renderer]]
+    fitting = [estimate for estimate in estimates if estimate.fits(memory_budget, time_budget)]
+    if not fitting:
+        estimates.sort(key=lambda estimate: estimate.memory)
+        raise OverBudget(f"{rows}×{cols} 的棋盘超出资源预算 (内存 {format_bytes(memory_budget)}, "
+                         f"开局 {time_budget:.0f} 秒)，最省的方案需要 {estimates[0].describe()}",
+                         estimates)
+    return min(fitting, key=lambda estimate: estimate.startup + estimate.play)
+
+
+def resident_bytes():
+    # 进程的常驻内存(字节)；Linux读/proc，Windows调GetProcessMemoryInfo，其他平台返回None
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                    "PagefileUsage", "PeakPagefileUsage")]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def measure_canvas(canvas, style, items=10000):
+    # 在(可以是未显示的)Canvas上创建一批图片项，测每项的(耗时, 字节数)，测完删除
+    # 字节数为常驻内存的增长减去编号列表本身；常驻内存读不到或没有增长(复用了之前释放的内存)时用默认值
+    before = resident_bytes()
+    start = time.perf_counter()
+    created = [canvas.create_image(i % 100, i // 100, anchor="nw", **style) for i in range(items)]
+    elapsed = time.perf_counter() - start
+    after = resident_bytes()
+    size = CANVAS_ITEM_BYTES
+    if before is not None and after is not None:
+        grown = after - before - sys.getsizeof(created) - sum(map(sys.getsizeof, created))
+        if grown > 0:
+            size = grown / items
+    canvas.delete(*created)
+    return elapsed / items, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大棋盘资源预估")
+    parser.add_argument("--calibrate", action="store_true", help="实测各存储方式的开销并保存")
+    parser.add_argument("--board", type=int, nargs=3, metavar=("ROWS", "COLS", "MINES"),
+                        help="预估指定棋盘")
+    parser.add_argument("--memory-budget", type=float, default=MEMORY_BUDGET / 2**20,
+                        help="内存预算(MB)")
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET, help="开局耗时预算(秒)")
+    args = parser.parse_args()
+    if args.calibrate:
+        start = time.perf_counter()
+        costs = calibrate()
+        save_costs(costs)
+        print(f"校准用时 {time.perf_counter() - start:.1f} 秒，已保存到 {costs_path()}")
+        for mode, cost in costs.items():
+            print(f"  {mode}: " + ", ".join(f"{name} {base:.3g} + {per_cell:.3g}/格 + {per_mine:.3g}/雷"
+                                            for name, (base, per_cell, per_mine) in cost.items()))
+    boards = [tuple(args.board)] if args.board else [(30, 30, 150), (300, 300, 15000),
+                                                     (1000, 1000, 150000), (10000, 10000, 15000000)]
+    for rows, cols, mines in boards:
+        for renderers in (("canvas",), ("terminal",)):
+            try:
+                estimate = plan(rows, cols, mines, renderers, args.memory_budget * 2**20,
+                                args.time_budget)
+                print(f"{rows}×{cols} {mines}雷: 选择 {estimate.describe()}")
+            except OverBudget as e:
+                print(f"{rows}×{cols} {mines}雷: 拒绝 - {e}")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        sys.argv.remove("--bench")
+        sys.argv.append("--calibrate")
+    main()
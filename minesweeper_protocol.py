@@ -0,0 +1,224 @@
+import json
+import sys
+import time
+
+from minesweeper_core import Board, FLAGGED
+
+# 紧凑的增量协议：每步只发送新揭开的格子、旗子变化和对局状态
+# 揭开的格子按 行*列数+列 编号排序后做游程编码，每个游程是(起点, 连续格子的数字)
+#
+# 二进制格式：
+#   1字节     版本(高4位) | 状态(低4位)
+#   [变长整数 踩雷格子编号]              仅状态为lost时存在
+#   变长整数 游程数
+#     每个游程: 变长整数 与上一游程末尾的间隔, 变长整数 长度, 每字节两个数字(高4位在前)
+#   变长整数 旗子变化数
+#     每个变化: 变长整数 (与上一编号的间隔<<1 | 是否插旗)
+#
+# JSON格式：{"s": 状态, "x": 踩雷格子, "r": [[起点, "数字串"], ...], "f": [[编号, 0/1], ...]}
+#
+# 服务器二进制模式下L/R的每个回复都是一帧：1字节类型 + 4字节大端长度 + 内容
+#   b"D" 增量，内容为上面的二进制格式
+#   b"E" 错误，内容为UTF-8编码的JSON {"error": 说明}
+
+VERSION = 1
+FRAME_DELTA = b"D"
+FRAME_ERROR = b"E"
+STATUS_CODES = {"playing": 0, "won": 1, "lost": 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# 数字与ASCII字符、半字节之间的转换表，用bytes.translate批量转换
+_TO_DIGITS = bytes(48 + i if i < 10 else 0 for i in range(256))
+_FROM_DIGITS = bytes(i - 48 if 48 <= i < 58 else 0 for i in range(256))
+_SHIFT_HIGH = bytes((i << 4) & 0xFF for i in range(256))
+_HIGH_NIBBLE = bytes(i >> 4 for i in range(256))
+_LOW_NIBBLE = bytes(i & 0x0F for i in range(256))
+
+
+class Delta:
+    __slots__ = ("status", "exploded", "runs", "flags")
+
+    def __init__(self, status="playing", exploded=None, runs=None, flags=None):
+        self.status = status
+        self.exploded = exploded
+        # runs: [(起点编号, bytes数字)]，flags: [(编号, 是否插旗)]，均按编号升序
+        self.runs = runs or []
+        self.flags = flags or []
+
+    @classmethod
+    def from_move(cls, board, opened=(), flag_cells=()):
+        cols = board.cols
+        grid = board.grid
+        indices = sorted(r * cols + c for r, c in opened)
+        runs = []
+        start = previous = None
+        values = bytearray()
+        for index in indices:
+            if previous is None or index != previous + 1:
+                if start is not None:
+                    runs.append((start, bytes(values)))
+                start = index
+                values = bytearray()
+            values.append(grid[index // cols][index % cols])
+            previous = index
+        if start is not None:
+            runs.append((start, bytes(values)))
+
+        flags = sorted((r * cols + c, board.state[r][c] == FLAGGED) for r, c in flag_cells)
+        exploded = None
+        if board.exploded is not None:
+            exploded = board.exploded[0] * cols + board.exploded[1]
+        return cls(board.status, exploded, runs, flags)
+
+    def revealed(self):
+        # 展开游程，逐个返回(编号, 数字)
+        for start, values in self.runs:
+            for offset, value in enumerate(values):
+                yield start + offset, value
+
+    def __eq__(self, other):
+        return (isinstance(other, Delta) and self.status == other.status
+                and self.exploded == other.exploded
+                and self.runs == other.runs and self.flags == other.flags)
+
+    def to_json(self):
+        data = {"s": self.status,
+                "r": [[start, values.translate(_TO_DIGITS).decode("ascii")]
+                      for start, values in self.runs],
+                "f": [[index, int(flagged)] for index, flagged in self.flags]}
+        if self.exploded is not None:
+            data["x"] = self.exploded
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        runs = [(start, digits.encode("ascii").translate(_FROM_DIGITS))
+                for start, digits in data["r"]]
+        flags = [(index, bool(flagged)) for index, flagged in data["f"]]
+        return cls(data["s"], data.get("x"), runs, flags)
+
+    def to_bytes(self):
+        out = bytearray()
+        out.append(VERSION << 4 | STATUS_CODES[self.status])
+        if self.status == "lost":
+            write_varint(out, self.exploded)
+        write_varint(out, len(self.runs))
+        position = 0
+        for start, values in self.runs:
+            write_varint(out, start - position)
+            write_varint(out, len(values))
+            out += pack_nibbles(values)
+            position = start + len(values)
+        write_varint(out, len(self.flags))
+        position = 0
+        for index, flagged in self.flags:
+            write_varint(out, (index - position) << 1 | flagged)
+            position = index
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        header = data[0]
+        if header >> 4 != VERSION:
+            raise ValueError(f"不支持的协议版本: {header >> 4}")
+        status = STATUS_NAMES[header & 0x0F]
+        offset = 1
+        exploded = None
+        if status == "lost":
+            exploded, offset = read_varint(data, offset)
+        count, offset = read_varint(data, offset)
+        runs = []
+        position = 0
+        for _ in range(count):
+            gap, offset = read_varint(data, offset)
+            length, offset = read_varint(data, offset)
+            size = (length + 1) // 2
+            start = position + gap
+            runs.append((start, unpack_nibbles(data[offset:offset + size], length)))
+            offset += size
+            position = start + length
+        count, offset = read_varint(data, offset)
+        flags = []
+        position = 0
+        for _ in range(count):
+            value, offset = read_varint(data, offset)
+            position += value >> 1
+            flags.append((position, bool(value & 1)))
+        return cls(status, exploded, runs, flags)
+
+
+def encode_frame(kind, payload):
+    return kind + len(payload).to_bytes(4, "big") + payload
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def pack_nibbles(values):
+    # 偶数位放高4位、奇数位放低4位；两部分按大整数相加，没有进位所以等价于按位或
+    if len(values) % 2:
+        values = values + b"\0"
+    high = values[0::2].translate(_SHIFT_HIGH)
+    low = values[1::2]
+    size = len(high)
+    packed = int.from_bytes(high, "big") + int.from_bytes(low, "big")
+    return packed.to_bytes(size, "big")
+
+
+def unpack_nibbles(packed, length):
+    values = bytearray(len(packed) * 2)
+    values[0::2] = packed.translate(_HIGH_NIBBLE)
+    values[1::2] = packed.translate(_LOW_NIBBLE)
+    return bytes(values[:length])
+
+
+def benchmark(rows=1000, cols=1000, repeat=5):
+    # 最坏情况：只有一个雷的棋盘，首次点击几乎展开整个棋盘
+    board = Board(rows, cols, 1, seed=0)
+    start = time.perf_counter()
+    opened = board.left_click(rows // 2, cols // 2)
+    reveal_time = time.perf_counter() - start
+    delta = Delta.from_move(board, opened)
+    print(f"{rows}x{cols} 全盘展开: {len(opened)} 格, {len(delta.runs)} 个游程, "
+          f"展开耗时 {reveal_time * 1000:.1f} ms")
+
+    def timed(function, argument):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function(argument)
+            best = min(best, time.perf_counter() - start)
+        return result, best
+
+    _, build_time = timed(lambda cells: Delta.from_move(board, cells), opened)
+    print(f"  生成增量: {build_time * 1000:.1f} ms")
+    for name, encode, decode in (("二进制", Delta.to_bytes, Delta.from_bytes),
+                                 ("JSON", Delta.to_json, Delta.from_json)):
+        encoded, encode_time = timed(encode, delta)
+        decoded, decode_time = timed(decode, encoded)
+        assert decoded == delta
+        print(f"  {name}: {len(encoded)} 字节 ({len(encoded) * 8 / len(opened):.2f} 位/格), "
+              f"编码 {encode_time * 1000:.1f} ms, 解码 {decode_time * 1000:.1f} ms")
+    full_grid = json.dumps(board.view(), separators=(",", ":"))
+    print(f"  对比完整棋盘JSON: {len(full_grid)} 字节")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
@@ -0,0 +1,378 @@
+import argparse
+import os
+import random
+import struct
+import tempfile
+import time
+import zlib
+
+from minesweeper_core import Board, HIDDEN, OPENED, FLAGGED, MINE
+from minesweeper_history import History
+from minesweeper_journal import (SERVER_FINISHED_DIR, finished_games, header_board, journal_dir,
+                                 read_journal, replay)
+
+# 无界面的棋盘渲染：不依赖Tk和显示器，在服务器上导出棋盘截图和对局回放，用于问题报告和比赛回顾
+# 格子图案与图形界面共用(TilePainter，TileAtlas在它之上生成PhotoImage)，配色为COLOR_SCHEME
+# 图片用PNG索引色格式，每像素1字节，只需要zlib：
+#   write_png        整张棋盘输出为一张PNG
+#   ApngWriter       回放逐帧写入APNG动画；第一帧完整编码，之后每帧只编码变化格子的外接矩形，
+#                    帧数据编码后立即写盘，只在内存里保留当前画面和最多一帧待写的数据
+
+COLOR_SCHEME = {
+    -1: "#424242",   # 地雷颜色
+    0: "#e0e0e0",    # 空白区域
+    1: "#1976d2",    # 蓝色
+    2: "#388e3c",    # 绿色
+    3: "#d32f2f",    # 红色
+    4: "#7b1fa2",    # 紫色
+    5: "#ff8f00",    # 橙色
+    6: "#0097a7",    # 青色
+    7: "#5d4037",    # 棕色
+    8: "#616161"      # 灰色
+}
+# 格子之间的缝隙，与图形界面Canvas的背景色相同
+GAP_COLOR = "#bdbdbd"
+WRONG_FLAG_FACE = "#ffcdd2"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class TilePainter:
+    # 图案用像素点阵绘制，不依赖系统字体，各平台显示一致
+    GLYPHS = {
+        1: ["  #  ", " ##  ", "# #  ", "  #  ", "  #  ", "  #  ", "#####"],
+        2: [" ### ", "#   #", "    #", "   # ", "  #  ", " #   ", "#####"],
+        3: ["#### ", "    #", "    #", " ### ", "    #", "    #", "#### "],
+        4: ["   # ", "  ## ", " # # ", "#  # ", "#####", "   # ", "   # "],
+        5: ["#####", "#    ", "#### ", "    #", "    #", "#   #", " ### "],
+        6: [" ### ", "#    ", "#    ", "#### ", "#   #", "#   #", " ### "],
+        7: ["#####", "    #", "   # ", "  #  ", " #   ", " #   ", " #   "],
+        8: [" ### ", "#   #", "#   #", " ### ", "#   #", "#   #", " ### "],
+        "flag": ["  KRRR ", "  KRRRR", "  KRRR ", "  K    ", "  K    ", " KKK   ", "KKKKK  "],
+        "mine": ["   K   ", " KKKKK ", " KWKKK ", "KKKKKKK", " KKKKK ", " KKKKK ", "   K   "],
+    }
+    # 点阵最大7x7，格子再小就放不下(放大倍数至少为1)
+    MIN_SIZE = 7
+    HIDDEN_FACE = "#eeeeee"
+    HOVER_FACE = "#e0e0e0"
+    BEVEL_LIGHT = "#ffffff"
+    BEVEL_DARK = "#9e9e9e"
+    EXPLODED_FACE = "#ff0000"
+
+    def __init__(self, size, color_scheme=COLOR_SCHEME):
+        self.size = size
+        self.color_scheme = color_scheme
+        self.glyph_colors = {"K": color_scheme[-1], "R": "#d32f2f", "W": "#ffffff"}
+
+    def pixels(self, kind, value=0, face=None):
+        # 返回 size x size 的颜色字符串("#rrggbb")二维列表
+        size = self.size
+        if kind in ("hidden", "hover", "flag"):
+            if face is None:
+                face = self.HOVER_FACE if kind == "hover" else self.HIDDEN_FACE
+            pixels = self._raised(face)
+        else:
+            if face is None:
+                face = self.EXPLODED_FACE if kind == "exploded" else self.color_scheme[0]
+            pixels = [[face] * size for _ in range(size)]
+
+        if kind == "revealed" and value > 0:
+            self._stamp(pixels, self.GLYPHS[value], {"#": self.color_scheme[value]})
+        elif kind == "flag":
+            self._stamp(pixels, self.GLYPHS["flag"], self.glyph_colors)
+        elif kind in ("mine", "exploded"):
+            self._stamp(pixels, self.GLYPHS["mine"], self.glyph_colors)
+        return pixels
+
+    def _raised(self, face):
+        size = self.size
+        bevel = max(1, size // 12)
+        pixels = []
+        for y in range(size):
+            row = []
+            for x in range(size):
+                if x < bevel or y < bevel:
+                    row.append(self.BEVEL_LIGHT if x + y < size - 1 else self.BEVEL_DARK)
+                elif x >= size - bevel or y >= size - bevel:
+                    row.append(self.BEVEL_DARK)
+                else:
+                    row.append(face)
+            pixels.append(row)
+        return pixels
+
+    def _stamp(self, pixels, glyph, colors):
+        # 按格子尺寸整数倍放大点阵并居中
+        scale = max(1, (self.size - 6) // 8)
+        height = len(glyph) * scale
+        width = len(glyph[0]) * scale
+        top = (self.size - height) // 2
+        left = (self.size - width) // 2
+        for gy, line in enumerate(glyph):
+            for gx, char in enumerate(line):
+                color = colors.get(char)
+                if color is None:
+                    continue
+                for y in range(top + gy * scale, top + (gy + 1) * scale):
+                    for x in range(left + gx * scale, left + (gx + 1) * scale):
+                        pixels[y][x] = color
+
+
+def chunk(kind, data):
+    body = kind + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+
+def cell_style(board, r, c):
+    # 与图形界面相同的外观：对局结束后显示所有雷和插错的旗子
+    state = board.state[r][c]
+    if state == OPENED:
+        return ("revealed", board.grid[r][c])
+    if (r, c) == board.exploded:
+        return ("exploded", 0)
+    if board.status == "playing":
+        return ("flag", 0) if state == FLAGGED else ("hidden", 0)
+    mine = board.grid[r][c] == MINE
+    if state == FLAGGED:
+        return ("flag", 0) if mine else ("wrong_flag", 0)
+    if mine:
+        return ("flag", 0) if board.status == "won" else ("mine", 0)
+    return ("hidden", 0)
+
+
+class BoardRasterizer:
+    # 当前画面保存为每像素1字节的调色板索引；每个格子记住显示中的样式，只重画样式变化的格子
+    def __init__(self, rows, cols, cell_size=16, color_scheme=COLOR_SCHEME):
+        self.rows = rows
+        self.cols = cols
+        self.size = cell_size
+        self.pitch = cell_size + 1
+        self.width = cols * self.pitch - 1
+        self.height = rows * self.pitch - 1
+        painter = TilePainter(cell_size, color_scheme)
+        styles = [("hidden", 0), ("flag", 0), ("mine", 0), ("exploded", 0)]
+        styles += [("revealed", value) for value in range(9)]
+        tiles = {style: painter.pixels(*style) for style in styles}
+        tiles[("wrong_flag", 0)] = painter.pixels("flag", face=WRONG_FLAG_FACE)
+
+        # 所有图案用到的颜色组成调色板，0号为缝隙颜色
+        colors = {GAP_COLOR: 0}
+        for pixels in tiles.values():
+            for row in pixels:
+                for color in row:
+                    colors.setdefault(color, len(colors))
+        self.palette = b"".join(bytes.fromhex(color[1:]) for color in colors)
+        # 每种样式预先转成逐行的索引字节串，画格子时按行整段复制
+        self.tiles = {style: [bytes(colors[color] for color in row) for row in pixels]
+                      for style, pixels in tiles.items()}
+        self.pixels = [bytearray(self.width) for _ in range(self.height)]
+        self.shown = [[None] * cols for _ in range(rows)]
+
+    def draw(self, board, cells=None):
+        # 按棋盘当前状态更新画面，返回样式变化的格子列表；cells给出时只检查这些格子
+        if cells is None:
+            cells = ((r, c) for r in range(self.rows) for c in range(self.cols))
+        changed = []
+        size, pitch = self.size, self.pitch
+        for r, c in cells:
+            style = cell_style(board, r, c)
+            if self.shown[r][c] == style:
+                continue
+            self.shown[r][c] = style
+            changed.append((r, c))
+            x = c * pitch
+            for y, line in enumerate(self.tiles[style], r * pitch):
+                self.pixels[y][x:x + size] = line
+        return changed
+
+    def bounds(self, cells):
+        # 格子列表的像素外接矩形 (x, y, 宽, 高)
+        rows = [r for r, _ in cells]
+        cols = [c for _, c in cells]
+        x, y = min(cols) * self.pitch, min(rows) * self.pitch
+        return (x, y, (max(cols) + 1) * self.pitch - 1 - x, (max(rows) + 1) * self.pitch - 1 - y)
+
+    def encode(self, x=0, y=0, width=None, height=None, level=6):
+        # 矩形区域的PNG图像数据：每行前加过滤类型0，整体zlib压缩
+        width = self.width if width is None else width
+        height = self.height if height is None else height
+        compressor = zlib.compressobj(level)
+        parts = [compressor.compress(b"\0" + bytes(row[x:x + width]))
+                 for row in self.pixels[y:y + height]]
+        parts.append(compressor.flush())
+        return b"".join(parts)
+
+    def header(self, width=None, height=None):
+        return chunk(b"IHDR", struct.pack(">IIBBBBB", width or self.width, height or self.height,
+                                          8, 3, 0, 0, 0)) + chunk(b"PLTE", self.palette)
+
+
+def write_png(board, path, cell_size=16):
+    raster = BoardRasterizer(board.rows, board.cols, cell_size)
+    raster.draw(board)
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE + raster.header() + chunk(b"IDAT", raster.encode()) + chunk(b"IEND", b""))
+
+
+class ApngWriter:
+    # 回放动画：每调用一次frame()给出一帧；没有变化的帧只延长上一帧的显示时间
+    # 帧的显示时间要等下一帧到来才知道，所以最多缓存一帧编码后的数据
+    # 总帧数写在文件开头的acTL块里，关闭时回填
+    def __init__(self, path, rows, cols, cell_size=16, loop=0):
+        self.raster = BoardRasterizer(rows, cols, cell_size)
+        self.file = open(path, "wb")
+        self.loop = loop
+        self.sequence = 0
+        self.frames = 0
+        self.pending = None
+        self.encoded_bytes = 0
+        self.file.write(PNG_SIGNATURE + self.raster.header())
+        self.actl_offset = self.file.tell()
+        self.file.write(chunk(b"acTL", struct.pack(">II", 0, loop)))
+
+    def frame(self, board, delay, cells=None):
+        # delay为本帧显示的秒数；cells为可能变化的格子(例如left_click的返回值)，不给时检查整个棋盘
+        first = self.frames == 0 and self.pending is None
+        changed = self.raster.draw(board, None if first else cells)
+        if not first and not changed:
+            if self.pending is not None:
+                self.pending[1] += delay
+            return 0
+        if first:
+            rect = (0, 0, self.raster.width, self.raster.height)
+        else:
+            rect = self.raster.bounds(changed)
+        self.flush()
+        self.pending = [rect, delay, self.raster.encode(*rect), first]
+        self.encoded_bytes += len(self.pending[2])
+        return len(changed)
+
+    def flush(self):
+        if self.pending is None:
+            return
+        (x, y, width, height), delay, data, first = self.pending
+        self.pending = None
+        milliseconds = max(1, min(65535, round(delay * 1000)))
+        control = struct.pack(">IIIIIHHBB", self.sequence, width, height, x, y, milliseconds, 1000, 0, 0)
+        self.sequence += 1
+        out = chunk(b"fcTL", control)
+        if first:
+            out += chunk(b"IDAT", data)
+        else:
+            out += chunk(b"fdAT", struct.pack(">I", self.sequence) + data)
+            self.sequence += 1
+        self.file.write(out)
+        self.frames += 1
+
+    def close(self):
+        self.flush()
+        self.file.write(chunk(b"IEND", b""))
+        self.file.seek(self.actl_offset)
+        self.file.write(chunk(b"acTL", struct.pack(">II", self.frames, self.loop)))
+        self.file.close()
+
+
+def render_replay(header, moves, path, cell_size=16, speed=1.0, min_delay=0.05, max_delay=2.0):
+    # 按对局日志重放并写出APNG；每步的显示时间取日志中相邻两步的用时差，按speed加速
+    history = History(header_board(header))
+    board = history.board
+    writer = ApngWriter(path, board.rows, board.cols, cell_size)
+    writer.frame(board, min_delay)
+    previous = 0.0
+    for move, r, c, elapsed in moves:
+        delay = min(max_delay, max(min_delay, (elapsed - previous) / speed))
+        previous = elapsed
+        ended = board.status != "playing"
+        cells = history.play(move, r, c)
+        if move in "LR":
+            cells = cells or [(r, c)]
+        if ended or board.status != "playing":
+            # 对局结束时所有雷和插错的旗子都要显示，悔棋回到对局中时又要盖回去，检查整个棋盘
+            cells = None
+        writer.frame(board, delay, cells)
+    writer.close()
+    return writer.frames
+
+
+def benchmark(rows=100, cols=100, mines=1600, cell_size=16):
+    # 用随机点击(避开雷)走完一局，对比逐帧完整编码与只编码变化区域的耗时和文件大小
+    board = Board(rows, cols, mines, seed=3)
+    rng = random.Random(0)
+    cells = [(r, c) for r in range(rows) for c in range(cols)]
+    rng.shuffle(cells)
+    moves = []
+    for r, c in cells:
+        if board.state[r][c] == HIDDEN and (board.first_click or board.grid[r][c] != MINE):
+            board.left_click(r, c)
+            moves.append(("L", r, c, len(moves) * 0.1))
+    header = {"rows": rows, "cols": cols, "mines": mines, "seed": 3}
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "replay.png")
+
+    start = time.perf_counter()
+    frames = render_replay(header, moves, path)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    print(f"{rows}x{cols} 回放 {len(moves)} 步 -> {frames} 帧 APNG: {elapsed:.2f} s "
+          f"({elapsed / frames * 1000:.2f} ms/帧), {size / 1024:.0f} KB")
+
+    # 对比：每帧都完整编码整张图(太慢，只测前sample帧后按比例估算)
+    sample = min(200, len(moves))
+    board = Board(rows, cols, mines, seed=3)
+    raster = BoardRasterizer(rows, cols, cell_size)
+    start = time.perf_counter()
+    total = 0
+    for _, r, c, _ in moves[:sample]:
+        raster.draw(board, board.left_click(r, c))
+        total += len(raster.encode())
+    elapsed = time.perf_counter() - start
+    print(f"  逐帧完整编码(按前{sample}帧估算): {elapsed / sample * len(moves):.1f} s "
+          f"({elapsed / sample * 1000:.2f} ms/帧), {total / sample * len(moves) / 1024:.0f} KB")
+    os.remove(path)
+    os.rmdir(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面导出棋盘图片和对局回放")
+    parser.add_argument("journal", nargs="?",
+                        help="对局日志(结束的对局在 ~/.minesweeper/games/，未完成的在 journal/)")
+    parser.add_argument("--last", action="store_true", help="导出最近结束的一局")
+    parser.add_argument("--list", action="store_true", help="列出保留的已结束对局")
+    parser.add_argument("--server", action="store_true", help="--last/--list使用服务器的对局(server-games/)")
+    parser.add_argument("--out", default="replay.png", help="输出的PNG/APNG文件")
+    parser.add_argument("--cell-size", type=int, default=16, help=f"格子边长(像素)，至少{TilePainter.MIN_SIZE}")
+    parser.add_argument("--speed", type=float, default=1.0, help="回放速度倍数")
+    parser.add_argument("--final", action="store_true", help="只导出最终局面的静态图片")
+    parser.add_argument("--bench", action="store_true")
+    args = parser.parse_args()
+    if args.cell_size < TilePainter.MIN_SIZE:
+        parser.error(f"--cell-size至少为{TilePainter.MIN_SIZE}")
+    directory = journal_dir(SERVER_FINISHED_DIR) if args.server else None
+    if args.bench:
+        benchmark()
+        return
+    if args.list:
+        for path in finished_games(directory):
+            record = read_journal(path)
+            if record is not None:
+                header, moves = record
+                print(f"{path}  {header['rows']}x{header['cols']} {header['mines']}雷  {len(moves)}步")
+        return
+    if args.last:
+        games = finished_games(directory)
+        if not games:
+            parser.error("没有已结束的对局")
+        args.journal = games[-1]
+    if not args.journal:
+        parser.error("需要指定对局日志")
+    record = read_journal(args.journal)
+    if record is None:
+        parser.error("无法读取对局日志")
+    if args.final:
+        write_png(replay(*record)[0], args.out, args.cell_size)
+        print(f"已写入 {args.out}")
+    else:
+        frames = render_replay(*record, args.out, args.cell_size, args.speed)
+        print(f"已写入 {args.out} ({frames} 帧)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import asyncio
+import json
+import time
+
+from minesweeper_core import Board, LAZY_CELLS
+from minesweeper_journal import SERVER_FINISHED_DIR, GameJournal, journal_dir
+from minesweeper_protocol import FRAME_DELTA, FRAME_ERROR, Delta, encode_frame
+
+# 本地多会话扫雷服务器：每个TCP连接拥有独立的棋盘，规则与图形界面完全相同
+# 协议为按行的文本命令，每条命令回复一行JSON：
+#   NAME <名字>                  设置排行榜上显示的名字
+#   NEW <行> <列> <雷数> [种子]   开始新的一局
+#   PROTO json|binary            选择L/R回复的编码，默认json
+#   L <行> <列>                  左键揭开，回复增量
+#   R <行> <列>                  右键插旗/取消，回复增量
+#   VIEW                         返回当前可见棋盘
+#   STATS                        返回服务器统计和排行榜
+#   QUIT                         断开连接
+# 增量格式见minesweeper_protocol.py；二进制模式下L/R的回复(包括出错)都以帧发送：
+# 增量为 b"D" + 4字节大端长度 + 内容，错误为 b"E" + 4字节大端长度 + JSON，不会在二进制流里混入文本行
+# 每局的操作写入 server/ 下的对局日志，结束后移到 server-games/(与图形界面的 games/ 分开保留)，
+# 可用minesweeper_render.py --server导出；没下完就断开或重新开局的日志删除；压测时用--no-record关闭
+
+MAX_CELLS = 1000 * 1000
+SERVER_JOURNAL_DIR = "server"
+
+
+class ServerStats:
+    def __init__(self):
+        self.sessions = 0
+        self.active = 0
+        self.games = 0
+        self.moves = 0
+        self.players = {}
+
+    def record(self, name, won):
+        self.games += 1
+        wins, games = self.players.get(name, (0, 0))
+        self.players[name] = (wins + won, games + 1)
+
+    def leaderboard(self, limit=10):
+        ranking = sorted(self.players.items(), key=lambda item: (-item[1][0], item[1][1]))
+        return [{"name": name, "wins": wins, "games": games}
+                for name, (wins, games) in ranking[:limit]]
+
+
+class Session:
+    # 二进制模式下以帧回复的命令
+    FRAMED_COMMANDS = ("L", "R")
+
+    def __init__(self, stats, name, record=True):
+        self.stats = stats
+        self.name = name
+        self.board = None
+        self.binary = False
+        self.record = record
+        self.journal = None
+        self.started = 0.0
+
+    def handle(self, line):
+        parts = line.split()
+        if not parts:
+            return {"error": "空命令"}
+        command, args = parts[0].upper(), parts[1:]
+        handler = self.COMMANDS.get(command)
+        if handler is None:
+            return {"error": f"未知命令: {command}"}
+        try:
+            return handler(self, *args)
+        except (TypeError, ValueError) as e:
+            return {"error": f"参数错误: {e}"}
+
+    def cmd_name(self, name):
+        self.name = name
+        return {"ok": True}
+
+    def cmd_proto(self, mode):
+        if mode not in ("json", "binary"):
+            raise ValueError("编码必须是json或binary")
+        self.binary = mode == "binary"
+        return {"ok": True}
+
+    def cmd_new(self, rows, cols, mines, seed=None):
+        rows, cols, mines = int(rows), int(cols), int(mines)
+        if rows < 1 or cols < 1 or rows * cols > MAX_CELLS:
+            raise ValueError("棋盘尺寸超出范围")
+        if not 0 < mines < rows * cols:
+            raise ValueError("地雷数超出范围")
+        self.board = Board(rows, cols, mines, None if seed is None else int(seed),
+                           lazy=rows * cols > LAZY_CELLS)
+        self.close_journal()
+        if self.record:
+            self.journal = GameJournal.start(self.board, journal_dir(SERVER_JOURNAL_DIR),
+                                             finished=journal_dir(SERVER_FINISHED_DIR))
+            self.started = time.monotonic()
+        return {"ok": True, "seed": self.board.seed}
+
+    def close_journal(self):
+        # 上一局没有下完
+        if self.journal is not None:
+            self.journal.discard()
+            self.journal = None
+
+    def cell(self, r, c):
+        if self.board is None:
+            raise ValueError("请先使用NEW开始一局")
+        r, c = int(r), int(c)
+        if not (0 <= r < self.board.rows and 0 <= c < self.board.cols):
+            raise ValueError("坐标超出棋盘")
+        return r, c
+
+    def cmd_left(self, r, c):
+        r, c = self.cell(r, c)
+        board = self.board
+        before = board.status
+        opened = board.left_click(r, c)
+        self.after_move("L", r, c, before)
+        return Delta.from_move(board, opened)
+
+    def cmd_right(self, r, c):
+        r, c = self.cell(r, c)
+        board = self.board
+        before = board.status
+        changed = board.right_click(r, c)
+        self.after_move("R", r, c, before)
+        return Delta.from_move(board, flag_cells=[(r, c)] if changed else ())
+
+    def after_move(self, move, r, c, before):
+        self.stats.moves += 1
+        if self.journal is not None:
+            self.journal.log(move, r, c, time.monotonic() - self.started)
+        # 只在本步结束对局时计入结果
+        if before == "playing" and self.board.status != "playing":
+            self.stats.record(self.name, self.board.status == "won")
+            if self.journal is not None:
+                self.journal.finish()
+                self.journal = None
+
+    def cmd_view(self):
+        if self.board is None:
+            raise ValueError("请先使用NEW开始一局")
+        return {"status": self.board.status, "view": self.board.view()}
+
+    def cmd_stats(self):
+        return {"sessions": self.stats.sessions,
+                "active": self.stats.active,
+                "games": self.stats.games,
+                "moves": self.stats.moves,
+                "leaderboard": self.stats.leaderboard()}
+
+    COMMANDS = {
+        "NAME": cmd_name,
+        "PROTO": cmd_proto,
+        "NEW": cmd_new,
+        "L": cmd_left,
+        "R": cmd_right,
+        "VIEW": cmd_view,
+        "STATS": cmd_stats,
+    }
+
+
+async def handle_client(reader, writer, stats, record=True):
+    stats.sessions += 1
+    stats.active += 1
+    session = Session(stats, f"player{stats.sessions}", record)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            line = line.decode("utf-8", "replace").strip()
+            if line.upper() == "QUIT":
+                break
+            command = line.split(maxsplit=1)[:1]
+            framed = session.binary and command and command[0].upper() in Session.FRAMED_COMMANDS
+            response = session.handle(line)
+            if isinstance(response, Delta):
+                if framed:
+                    writer.write(encode_frame(FRAME_DELTA, response.to_bytes()))
+                else:
+                    writer.write(response.to_json().encode() + b"\n")
+            else:
+                reply = json.dumps(response, separators=(",", ":")).encode()
+                writer.write(encode_frame(FRAME_ERROR, reply) if framed else reply + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        stats.active -= 1
+        session.close_journal()
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, record=True):
+    stats = ServerStats()
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_client(reader, writer, stats, record),
+        host, port, backlog=4096)
+    print(f"扫雷服务器已启动: {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地多会话扫雷服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-record", action="store_true", help="不写对局日志(压测时使用)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, not args.no_record))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import json
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 长时间会话的实时统计：胜率、每个难度的平均/中位数/p90用时、3BV/s、每秒点击数
+# 不保存每一局，只保存流式估计量，内存占用与对局数无关：
+#   RunningMoments  计数、均值、方差(Welford)、最小/最大值
+#   QuantileSketch  对数分桶的分位数草图，相对误差不超过accuracy，桶数有上限
+# 两种估计量都可以合并，多个进程(例如批量跑机器人)各自统计后用to_dict/from_dict传回再合并成一份
+
+
+class RunningMoments:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # 与均值差的平方和
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other):
+        # 两组数据的均值和平方和按并行公式合并，结果与逐个add相同(浮点误差内)
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2,
+                "min": self.min if self.count else None, "max": self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls()
+        moments.count = data["count"]
+        moments.mean = data["mean"]
+        moments.m2 = data["m2"]
+        if moments.count:
+            moments.min = data["min"]
+            moments.max = data["max"]
+        return moments
+
+
+class QuantileSketch:
+    # 正数x落入编号为ceil(log_gamma(x))的桶，桶内任意值与桶代表值的相对误差不超过accuracy
+    # 同样参数的草图按桶编号相加即可合并，与合并顺序无关
+    # 桶数超过max_buckets时把最小的几个桶并在一起：只有最低的分位数会变粗，中位数和p90不受影响
+    MIN_VALUE = 1e-9
+
+    def __init__(self, accuracy=0.01, max_buckets=1024):
+        self.accuracy = accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        # 小于MIN_VALUE(包括0)的值单独计数
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, x, weight=1):
+        self.count += weight
+        if x < self.MIN_VALUE:
+            self.zeros += weight
+            return
+        key = math.ceil(math.log(x) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + weight
+        if len(self.buckets) > self.max_buckets:
+            self.collapse()
+
+    def collapse(self):
+        keys = sorted(self.buckets)
+        extra = len(keys) - self.max_buckets
+        lowest = keys[extra]
+        for key in keys[:extra]:
+            self.buckets[lowest] += self.buckets.pop(key)
+
+    def merge(self, other):
+        if other.accuracy != self.accuracy:
+            raise ValueError("只能合并精度相同的分位数草图")
+        for key, weight in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + weight
+        self.zeros += other.zeros
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self.collapse()
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # 桶(gamma^(k-1), gamma^k]的代表值，到两端的相对误差都是accuracy
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {"accuracy": self.accuracy, "max_buckets": self.max_buckets, "zeros": self.zeros,
+                "count": self.count, "buckets": [[key, weight] for key, weight in self.buckets.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["accuracy"], data["max_buckets"])
+        sketch.buckets = {key: weight for key, weight in data["buckets"]}
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        return sketch
+
+
+class DifficultyStats:
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        # 用时和3BV/s只统计胜局，失败的局用时长短没有可比性；点击速度统计所有对局
+        self.time = RunningMoments()
+        self.time_quantiles = QuantileSketch()
+        self.bbbv_rate = RunningMoments()
+        self.click_rate = RunningMoments()
+
+    def record(self, result):
+        self.games += 1
+        duration = result["time"]
+        if duration > 0:
+            self.click_rate.add(result.get("clicks", 0) / duration)
+        if not result["won"]:
+            return
+        self.wins += 1
+        self.time.add(duration)
+        self.time_quantiles.add(duration)
+        if duration > 0 and result.get("bbbv") is not None:
+            self.bbbv_rate.add(result["bbbv"] / duration)
+
+    def merge(self, other):
+        self.games += other.games
+        self.wins += other.wins
+        self.time.merge(other.time)
+        self.time_quantiles.merge(other.time_quantiles)
+        self.bbbv_rate.merge(other.bbbv_rate)
+        self.click_rate.merge(other.click_rate)
+        return self
+
+    def summary(self):
+        return {"games": self.games, "wins": self.wins,
+                "win_rate": self.wins / self.games if self.games else 0.0,
+                "mean_time": self.time.mean if self.time.count else None,
+                "median_time": self.time_quantiles.quantile(0.5),
+                "p90_time": self.time_quantiles.quantile(0.9),
+                "bbbv_per_second": self.bbbv_rate.mean if self.bbbv_rate.count else None,
+                "clicks_per_second": self.click_rate.mean if self.click_rate.count else None}
+
+    def to_dict(self):
+        return {"games": self.games, "wins": self.wins, "time": self.time.to_dict(),
+                "time_quantiles": self.time_quantiles.to_dict(),
+                "bbbv_rate": self.bbbv_rate.to_dict(), "click_rate": self.click_rate.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.games = data["games"]
+        stats.wins = data["wins"]
+        stats.time = RunningMoments.from_dict(data["time"])
+        stats.time_quantiles = QuantileSketch.from_dict(data["time_quantiles"])
+        stats.bbbv_rate = RunningMoments.from_dict(data["bbbv_rate"])
+        stats.click_rate = RunningMoments.from_dict(data["click_rate"])
+        return stats
+
+
+class SessionStats:
+    # 按难度(行, 列, 雷数)分组；record接受与StatsStore.record相同的结果字典
+    def __init__(self):
+        self.difficulties = {}
+
+    def record(self, result):
+        key = (result["rows"], result["cols"], result["mines"])
+        stats = self.difficulties.get(key)
+        if stats is None:
+            stats = self.difficulties[key] = DifficultyStats()
+        stats.record(result)
+
+    def merge(self, other):
+        for key, stats in other.difficulties.items():
+            if key in self.difficulties:
+                self.difficulties[key].merge(stats)
+            else:
+                self.difficulties[key] = DifficultyStats.from_dict(stats.to_dict())
+        return self
+
+    @property
+    def games(self):
+        return sum(stats.games for stats in self.difficulties.values())
+
+    @property
+    def wins(self):
+        return sum(stats.wins for stats in self.difficulties.values())
+
+    def summary(self):
+        return {key: stats.summary() for key, stats in self.difficulties.items()}
+
+    def to_json(self):
+        return json.dumps([[list(key), stats.to_dict()] for key, stats in self.difficulties.items()])
+
+    @classmethod
+    def from_json(cls, text):
+        session = cls()
+        for key, data in json.loads(text):
+            session.difficulties[tuple(key)] = DifficultyStats.from_dict(data)
+        return session
+
+
+def simulate(seed, games=250000):
+    # 模拟一个进程里跑的机器人对局，返回序列化的统计和原始用时(只用于核对误差)
+    rng = random.Random(seed)
+    session = SessionStats()
+    times = []
+    for _ in range(games):
+        won = rng.random() < 0.4
+        duration = rng.lognormvariate(4, 0.6)
+        session.record({"rows": 16, "cols": 30, "mines": 99, "won": won, "time": duration,
+                        "clicks": rng.randint(50, 400), "bbbv": rng.randint(100, 250)})
+        if won:
+            times.append(duration)
+    return session.to_json(), times
+
+
+def benchmark(workers=4, games=250000):
+    start = time.perf_counter()
+    with ProcessPoolExecutor() as pool:
+        parts = list(pool.map(simulate, range(workers), [games] * workers))
+    elapsed = time.perf_counter() - start
+    session = SessionStats()
+    times = []
+    for text, part_times in parts:
+        session.merge(SessionStats.from_json(text))
+        times.extend(part_times)
+    times.sort()
+    summary = session.summary()[(16, 30, 99)]
+    print(f"{workers} 个进程共 {workers * games} 局: {elapsed:.2f} s "
+          f"({elapsed / (workers * games) * 1e6:.2f} µs/局，含进程启动)，"
+          f"每个进程传回 {len(parts[0][0]) / 1024:.1f} KB")
+    for name, q in (("median_time", 0.5), ("p90_time", 0.9)):
+        exact = times[int(q * (len(times) - 1))]
+        print(f"  {name}: 草图 {summary[name]:.2f} s, 精确 {exact:.2f} s, "
+              f"相对误差 {abs(summary[name] - exact) / exact:.2%}")
+    mean = sum(times) / len(times)
+    print(f"  mean_time: {summary['mean_time']:.4f} s, 精确 {mean:.4f} s; "
+          f"胜率 {summary['win_rate']:.2%}; 3BV/s {summary['bbbv_per_second']:.3f}; "
+          f"点击/s {summary['clicks_per_second']:.3f}")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
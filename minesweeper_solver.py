@@ -0,0 +1,778 @@
+import sys
+import threading
+import time
+from functools import lru_cache
+from math import comb
+
+from minesweeper_core import HIDDEN, OPENED, FLAGGED
+
+# 精确的地雷概率计算
+# 1. 已揭开的数字给出约束：周围未知格子中的雷数 = 数字 - 周围旗子数
+# 2. 边界(与数字相邻的未知格)按共享约束拆成互不相关的连通分量
+# 3. 每个分量内，约束集合完全相同的格子可互换，合并为一类，只枚举每类放几个雷，
+#    用组合数 C(类大小, 雷数) 加权，避免逐格枚举
+# 4. 各分量按雷数分布做卷积，再乘上内部(不与数字相邻)格子的组合数 C(内部格数, 剩余雷数)
+# 旗子按玩家标记视为地雷，剩余雷数 = 总雷数 - 旗子数
+
+
+@lru_cache(maxsize=None)
+def binomial(n, k):
+    return comb(n, k) if 0 <= k <= n else 0
+
+
+def neighbors(rows, cols, r, c):
+    for nr in range(max(0, r - 1), min(rows, r + 2)):
+        for nc in range(max(0, c - 1), min(cols, c + 2)):
+            if nr != r or nc != c:
+                yield nr, nc
+
+
+def build_constraints(view):
+    # 返回 (约束列表[(需要雷数, 未知格子元组)], 全部未知格子列表, 旗子数)
+    rows, cols = len(view), len(view[0])
+    constraints = []
+    unknown = []
+    flags = 0
+    for r in range(rows):
+        for c in range(cols):
+            value = view[r][c]
+            if value is None:
+                unknown.append((r, c))
+            elif value == "F":
+                flags += 1
+            elif value > 0:
+                cells = []
+                need = value
+                for nr, nc in neighbors(rows, cols, r, c):
+                    neighbor = view[nr][nc]
+                    if neighbor is None:
+                        cells.append((nr, nc))
+                    elif neighbor == "F":
+                        need -= 1
+                if cells:
+                    constraints.append((need, tuple(cells)))
+    return constraints, unknown, flags
+
+
+def split_components(constraints):
+    # 通过共享格子把约束合并成连通分量，返回[(格子列表, 约束列表)]
+    parent = {}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    for _, cells in constraints:
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        root = find(cells[0])
+        for cell in cells[1:]:
+            other = find(cell)
+            if other != root:
+                parent[other] = root
+
+    groups = {}
+    for constraint in constraints:
+        root = find(constraint[1][0])
+        groups.setdefault(root, ([], []))[1].append(constraint)
+    for cell in parent:
+        groups[find(cell)][0].append(cell)
+    return list(groups.values())
+
+
+class AnalysisStopped(Exception):
+    pass
+
+
+class Budget:
+    # 分析的时间预算和取消标志；枚举过程中定期检查，超时或取消时抛出AnalysisStopped
+    def __init__(self, seconds, cancelled=None):
+        self.deadline = time.monotonic() + seconds
+        self.cancelled = cancelled or threading.Event()
+        self.ticks = 0
+
+    def tick(self):
+        self.ticks += 1
+        if self.ticks & 1023 == 0:
+            self.check()
+
+    def check(self):
+        if self.cancelled.is_set() or time.monotonic() > self.deadline:
+            raise AnalysisStopped
+
+
+class Component:
+    # 一个边界分量的枚举结果：
+    #   totals[k]        分量内恰好k个雷的(加权)方案数
+    #   class_mines[k]   这些方案中每一类格子的雷数总和(加权)
+    def __init__(self, cells, constraints, budget=None, solve=True):
+        self.cells = cells
+        self.constraints = constraints
+        self.budget = budget
+        self.classes = []
+        self.totals = {}
+        self.class_mines = {}
+        # solve=False只记下格子和约束，留给ProbabilityTask在后台线程求解
+        self.solved = False
+        if solve:
+            self.solve()
+
+    def solve(self):
+        # 约束集合相同的格子归为一类
+        membership = {}
+        for index, (_, cells) in enumerate(self.constraints):
+            for cell in cells:
+                membership.setdefault(cell, []).append(index)
+        by_signature = {}
+        for cell in self.cells:
+            by_signature.setdefault(tuple(membership[cell]), []).append(cell)
+        classes = self.order_classes(list(by_signature.items()))
+        self.classes = [cells for _, cells in classes]
+
+        sizes = [len(cells) for cells in self.classes]
+        class_constraints = [signature for signature, _ in classes]
+        need = [n for n, _ in self.constraints]
+        free = [len(cells) for _, cells in self.constraints]
+        assignment = [0] * len(classes)
+        totals = self.totals
+        class_mines = self.class_mines
+        tick = self.budget.tick if self.budget is not None else None
+
+        def search(i, mines, weight):
+            if tick is not None:
+                tick()
+            if i == len(sizes):
+                totals[mines] = totals.get(mines, 0) + weight
+                row = class_mines.get(mines)
+                if row is None:
+                    row = class_mines[mines] = [0] * len(sizes)
+                for index, count in enumerate(assignment):
+                    if count:
+                        row[index] += weight * count
+                return
+            size = sizes[i]
+            touched = class_constraints[i]
+            low, high = 0, size
+            for index in touched:
+                # 该约束剩余需要的雷数必须能被本类和之后的格子满足
+                low = max(low, need[index] - (free[index] - size))
+                high = min(high, need[index])
+            if low > high:
+                return
+            for index in touched:
+                free[index] -= size
+            for count in range(low, high + 1):
+                for index in touched:
+                    need[index] -= count
+                assignment[i] = count
+                search(i + 1, mines + count, weight * binomial(size, count))
+                for index in touched:
+                    need[index] += count
+            assignment[i] = 0
+            for index in touched:
+                free[index] += size
+
+        search(0, 0, 1)
+        self.solved = True
+
+    def certain(self):
+        # 只看本分量的所有方案：从不为雷的格子必安全，始终为雷的格子必是雷
+        # 全局雷数只会排除更多方案，所以这里的结论总是成立
+        total = sum(self.totals.values())
+        # 约束互相矛盾(例如数字周围的旗子比数字还多)时没有任何方案，什么也推不出
+        if total == 0:
+            return [], []
+        safe, mines = [], []
+        for index, cells in enumerate(self.classes):
+            expected = sum(row[index] for row in self.class_mines.values())
+            if expected == 0:
+                safe.extend(cells)
+            elif expected == total * len(cells):
+                mines.extend(cells)
+        return safe, mines
+
+    def order_classes(self, classes):
+        # 按约束相邻关系广度优先排序，让约束尽早被完全赋值从而尽早剪枝
+        by_constraint = {}
+        for position, (signature, _) in enumerate(classes):
+            for index in signature:
+                by_constraint.setdefault(index, []).append(position)
+        ordered = []
+        seen = set()
+        for start in range(len(classes)):
+            if start in seen:
+                continue
+            seen.add(start)
+            queue = [start]
+            while queue:
+                position = queue.pop(0)
+                ordered.append(classes[position])
+                for index in classes[position][0]:
+                    for other in by_constraint[index]:
+                        if other not in seen:
+                            seen.add(other)
+                            queue.append(other)
+        return ordered
+
+
+def convolve(first, second):
+    result = {}
+    for a, wa in first.items():
+        for b, wb in second.items():
+            result[a + b] = result.get(a + b, 0) + wa * wb
+    return result
+
+
+def combine(components, interior, remaining):
+    # 合并各分量与内部格子，返回 {格子: 概率}；约束矛盾时返回空字典
+    count = len(components)
+    prefix = [{0: 1}]
+    for component in components:
+        prefix.append(convolve(prefix[-1], component.totals))
+    suffix = [{0: 1}]
+    for component in reversed(components):
+        suffix.append(convolve(suffix[-1], component.totals))
+    suffix.reverse()
+
+    everything = prefix[-1]
+    total = sum(weight * binomial(interior, remaining - mines)
+                for mines, weight in everything.items())
+    if total == 0:
+        return {}
+
+    probabilities = {}
+    for j, component in enumerate(components):
+        others = convolve(prefix[j], suffix[j + 1])
+        # 对分量j内雷数为k时，其余部分(其他分量+内部)的总权重
+        rest = {}
+        for k in component.totals:
+            rest[k] = sum(weight * binomial(interior, remaining - k - mines)
+                          for mines, weight in others.items())
+        for index, cells in enumerate(component.classes):
+            expected = sum(row[index] * rest[k] for k, row in component.class_mines.items())
+            probability = expected / (total * len(cells))
+            for cell in cells:
+                probabilities[cell] = probability
+
+    if interior:
+        # 每个内部格子是雷的方案数 = C(内部格数-1, 内部雷数-1)
+        interior_weight = sum(weight * binomial(interior - 1, remaining - mines - 1)
+                              for mines, weight in everything.items())
+        probabilities[None] = interior_weight / total
+    return probabilities
+
+
+def mine_probabilities(view, mines, budget=None):
+    # view: Board.view()的格式；返回每个未揭开且未插旗格子是雷的精确概率
+    constraints, unknown, flags = build_constraints(view)
+    components = [Component(cells, group, budget) for cells, group in split_components(constraints)]
+    frontier = {cell for component in components for cell in component.cells}
+    interior = len(unknown) - len(frontier)
+    probabilities = combine(components, interior, mines - flags)
+    if not probabilities:
+        return {}
+    interior_probability = probabilities.pop(None, 0.0)
+    for cell in unknown:
+        if cell not in frontier:
+            probabilities[cell] = interior_probability
+    return probabilities
+
+
+class FrontierAnalyzer:
+    # 增量边界分析：在多步之间保留数字约束、格子到约束的索引和分量的枚举结果
+    # 每步只把改变格子周围的数字约束标记为脏：
+    #   推理(deductions)只在脏约束及与其共享格子的约束组成的局部窗口内枚举，单步开销与棋盘大小无关
+    #   概率(probabilities)只重新求解包含脏约束的分量，其余分量复用上次结果
+    # 已推出的结论之后不会失效，格子被揭开或插旗后从结果集合中移除；
+    # 例外是拔掉旗子和悔棋：结论可能依赖插错的旗子或撤掉的数字，清空后重新推理
+    def __init__(self, rows, cols, mines):
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.view = [[None] * cols for _ in range(rows)]
+        self.unknown = rows * cols
+        self.flags = 0
+        self.constraints = {}   # 数字格 -> (需要雷数, 未知格子元组)
+        self.watchers = {}      # 未知格子 -> 约束中包含它的数字格集合
+        self.components = {}    # 分量编号 -> (Component, 数字格列表)
+        self.owner = {}         # 边界格子 -> 分量编号
+        self.safe = set()       # 可确定安全的未知格子
+        self.known_mines = set()  # 可确定是雷的未知格子
+        self.dirty = set()      # 约束需要重建的数字格
+        self.window_dirty = set()     # 需要重新做局部推理的数字格
+        self.component_dirty = set()  # 所在分量需要重新求解的数字格
+        self.retracted = False  # 有旗子被拔掉，已有结论要全部重新推理
+        self.next_id = 0
+        self.last = {}
+
+    def observe(self, cell, value):
+        # value与Board.view()一致：None未揭开，"F"旗子，数字为已揭开
+        r, c = cell
+        old = self.view[r][c]
+        if old == value:
+            return
+        self.unknown += (value is None) - (old is None)
+        self.flags += (value == "F") - (old == "F")
+        self.view[r][c] = value
+        if old == "F":
+            self.retracted = True
+        if value is not None:
+            self.safe.discard(cell)
+            self.known_mines.discard(cell)
+        # 撤销时数字格会重新变为未揭开，它的约束也要删除
+        if isinstance(value, int) and value > 0 or isinstance(old, int):
+            self.dirty.add(cell)
+        for neighbor in neighbors(self.rows, self.cols, r, c):
+            if isinstance(self.view[neighbor[0]][neighbor[1]], int):
+                self.dirty.add(neighbor)
+
+    def observe_board(self, board, cells):
+        for r, c in cells:
+            self.observe((r, c), self.visible(board, r, c))
+
+    def retract(self, board, cells):
+        # 悔棋后同步：信息变少时之前的结论可能依赖撤掉的数字或旗子，清空后对所有约束重新推理
+        self.observe_board(board, cells)
+        self.retracted = True
+
+    @staticmethod
+    def visible(board, r, c):
+        state = board.state[r][c]
+        if state == OPENED:
+            return board.grid[r][c]
+        return "F" if state == FLAGGED else None
+
+    def constraint(self, cell):
+        r, c = cell
+        need = self.view[r][c]
+        if not isinstance(need, int):
+            return None
+        cells = []
+        for nr, nc in neighbors(self.rows, self.cols, r, c):
+            neighbor = self.view[nr][nc]
+            if neighbor is None:
+                cells.append((nr, nc))
+            elif neighbor == "F":
+                need -= 1
+        return (need, tuple(cells)) if cells else None
+
+    def refresh(self):
+        # 重建脏约束并维护 格子 -> 约束 的索引
+        dirty, self.dirty = self.dirty, set()
+        for number in dirty:
+            old = self.constraints.pop(number, None)
+            if old is not None:
+                for cell in old[1]:
+                    watchers = self.watchers[cell]
+                    watchers.discard(number)
+                    if not watchers:
+                        del self.watchers[cell]
+            new = self.constraint(number)
+            if new is not None:
+                self.constraints[number] = new
+                for cell in new[1]:
+                    self.watchers.setdefault(cell, set()).add(number)
+                self.window_dirty.add(number)
+                self.component_dirty.add(number)
+        return len(dirty)
+
+    def window(self, number):
+        # 局部窗口：该约束及所有与它共享格子的约束
+        numbers = {number}
+        for cell in self.constraints[number][1]:
+            numbers.update(self.watchers[cell])
+        return [self.constraints[n] for n in numbers]
+
+    def deductions(self):
+        # 返回(必安全格子集合, 必是雷格子集合)
+        start = time.perf_counter()
+        dirty = self.refresh()
+        if self.retracted:
+            self.retracted = False
+            self.safe.clear()
+            self.known_mines.clear()
+            self.window_dirty.update(self.constraints)
+        windows, self.window_dirty = self.window_dirty, set()
+        cells = 0
+        for number in windows:
+            if number not in self.constraints:
+                continue
+            group = self.window(number)
+            window_cells = list({cell for _, group_cells in group for cell in group_cells})
+            safe, mines = Component(window_cells, group).certain()
+            self.safe.update(safe)
+            self.known_mines.update(mines)
+            cells += len(window_cells)
+        self.last = {"dirty": dirty, "windows": len(windows), "cells": cells,
+                     "seconds": time.perf_counter() - start}
+        return self.safe, self.known_mines
+
+    def probabilities(self):
+        # 返回(边界格子 -> 是雷概率, 内部格概率)；所有不在约束中的未知格共用同一个内部概率，
+        # 没有内部格或约束矛盾时内部概率为None
+        task = self.probability_task()
+        task.run()
+        self.install(task)
+        return task.probabilities, task.interior_probability
+
+    def probability_task(self):
+        # 在界面线程里更新约束和分量索引(不做枚举)，返回可以在后台线程运行的ProbabilityTask；
+        # 精确概率需要完整的分量，只重新求解包含脏约束的分量
+        self.refresh()
+        invalid = set()
+        stale, self.component_dirty = self.component_dirty, set()
+        affected = set()
+        for number in stale:
+            constraint = self.constraints.get(number)
+            if constraint is not None:
+                affected.add(number)
+                invalid.update(self.owner[cell] for cell in constraint[1] if cell in self.owner)
+        # 约束被删除(周围格子全部确定)的分量也要失效
+        for key, (component, numbers) in self.components.items():
+            if any(self.constraints.get(number) is None or number in stale for number in numbers):
+                invalid.add(key)
+        for key in invalid:
+            component, numbers = self.components.pop(key)
+            affected.update(number for number in numbers if number in self.constraints)
+            for cell in component.cells:
+                if self.owner.get(cell) == key:
+                    del self.owner[cell]
+
+        # 不同的数字格可能给出完全相同的约束，分量要记下所有来源，其中任何一个被删除时分量都要失效
+        numbers_of = {}
+        for number in affected:
+            numbers_of.setdefault(self.constraints[number], []).append(number)
+        for group_cells, group in split_components([self.constraints[n] for n in affected]):
+            key = self.next_id
+            self.next_id += 1
+            self.components[key] = (Component(group_cells, group, solve=False),
+                                    [number for constraint in dict.fromkeys(group)
+                                     for number in numbers_of[constraint]])
+            for cell in group_cells:
+                self.owner[cell] = key
+
+        # 上次后台求解被取消的分量还没有结果，和新分量一起重新求解
+        pending, solved = [], []
+        for key, (component, _) in self.components.items():
+            if component.solved:
+                solved.append(component)
+            else:
+                pending.append((key, component))
+        return ProbabilityTask(pending, solved, self.unknown - len(self.owner), self.mines - self.flags)
+
+    def install(self, task):
+        # 把任务里求解好的分量放回去，分量在此期间被作废或替换的就丢掉
+        for key, placeholder in task.pending:
+            component = task.results.get(key)
+            entry = self.components.get(key)
+            if component is not None and entry is not None and entry[0] is placeholder:
+                self.components[key] = (component, entry[1])
+
+    def is_interior(self, r, c):
+        return self.view[r][c] is None and (r, c) not in self.owner
+
+    def first_interior(self):
+        for r in range(self.rows):
+            row = self.view[r]
+            for c in range(self.cols):
+                if row[c] is None and (r, c) not in self.owner:
+                    return r, c
+        return None
+
+
+class ProbabilityTask:
+    # 概率计算中不读分析器状态的部分：求解新分量并合并；界面线程准备，后台线程run，结束后界面线程install
+    def __init__(self, pending, solved, interior, remaining):
+        self.pending = pending      # [(分量编号, 未求解的分量)]
+        self.solved = solved
+        self.interior = interior
+        self.remaining = remaining
+        self.results = {}           # 分量编号 -> 求解好的分量
+        self.probabilities = {}
+        self.interior_probability = None
+
+    def run(self, budget=None):
+        for key, placeholder in self.pending:
+            if budget is not None:
+                budget.check()
+            self.results[key] = Component(placeholder.cells, placeholder.constraints, budget)
+        components = self.solved + list(self.results.values())
+        probabilities = combine(components, self.interior, self.remaining)
+        self.interior_probability = probabilities.pop(None, None)
+        self.probabilities = probabilities
+        return self
+
+
+def player_moves(board, analyzer):
+    # 推理玩家的下一批操作[(操作, 行, 列)]：先标记必是雷的格子、揭开必安全的格子；推不出时揭开是雷概率最低的格子
+    # 出手前按棋盘重新核对这些格子周围两圈(结论所依赖的数字及数字周围的格子)，
+    # 分析器漏掉了更新时先同步、作废旧结论再重新推理，不按过期或矛盾的结论点击
+    if board.first_click:
+        return [("L", board.rows // 2, board.cols // 2)]
+    while True:
+        safe, mines = analyzer.deductions()
+        moves = [("R", r, c) for r, c in sorted(mines) if board.state[r][c] == HIDDEN]
+        moves += [("L", r, c) for r, c in sorted(safe) if board.state[r][c] == HIDDEN]
+        if not moves:
+            probabilities, interior = analyzer.probabilities()
+            candidates = [(p, cell) for cell, p in probabilities.items()]
+            if interior is not None:
+                candidates.append((interior, analyzer.first_interior()))
+            if not candidates:
+                return []
+            _, (r, c) = min(candidates)
+            moves = [("L", r, c)]
+        if not resync(board, analyzer, [(r, c) for _, r, c in moves]):
+            return moves
+
+
+def resync(board, analyzer, cells):
+    # 返回是否发现并修正了不一致
+    checked = set()
+    stale = False
+    for r, c in cells:
+        for nr in range(max(0, r - 2), min(board.rows, r + 3)):
+            for nc in range(max(0, c - 2), min(board.cols, c + 3)):
+                if (nr, nc) in checked:
+                    continue
+                checked.add((nr, nc))
+                value = analyzer.visible(board, nr, nc)
+                if analyzer.view[nr][nc] != value:
+                    analyzer.observe((nr, nc), value)
+                    stale = True
+    if stale:
+        analyzer.retracted = True
+    return stale
+
+
+class ProbabilitySearch:
+    # 在后台线程运行ProbabilityTask，与HintSearch一样由界面线程轮询done，超出预算或被取消时放弃
+    def __init__(self, task, seconds=1.0):
+        self.task = task
+        self.budget = Budget(seconds)
+        self.finished = False
+        self.done = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.budget.cancelled.set()
+
+    def run(self):
+        try:
+            self.task.run(self.budget)
+            self.finished = True
+        except AnalysisStopped:
+            pass
+        finally:
+            self.done = True
+
+
+class HintSearch:
+    # 在后台线程中寻找提示：先给出粗略估计，再计算精确概率
+    # best为目前最好的答案(格子, 是雷概率)，界面线程可随时读取；预算用完或被取消时停在当前最好答案
+    def __init__(self, view, mines, seconds=1.0):
+        self.view = view
+        self.mines = mines
+        self.budget = Budget(seconds)
+        self.best = None
+        self.exact = False
+        self.done = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.budget.cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self.budget.cancelled.is_set()
+
+    def run(self):
+        try:
+            self.best = self.estimate()
+            probabilities = mine_probabilities(self.view, self.mines, self.budget)
+            if probabilities:
+                cell = min(probabilities, key=probabilities.get)
+                self.best = (cell, probabilities[cell])
+                self.exact = True
+        except AnalysisStopped:
+            pass
+        finally:
+            self.done = True
+
+    def estimate(self):
+        # 粗略估计：边界格取所在约束中最高的 需要雷数/未知格数，内部格取平均密度
+        constraints, unknown, flags = build_constraints(self.view)
+        if not unknown:
+            return None
+        risk = {}
+        for need, cells in constraints:
+            if need < 0 or need > len(cells):
+                # 旗子插错导致约束矛盾，精确计算也没有结果，给不出可靠的提示
+                return None
+            ratio = need / len(cells)
+            for cell in cells:
+                if ratio > risk.get(cell, -1.0):
+                    risk[cell] = ratio
+            self.budget.tick()
+        density = (self.mines - flags) / len(unknown)
+        interior = next((cell for cell in unknown if cell not in risk), None)
+        best = min(risk.items(), key=lambda item: item[1], default=(None, 1.0))
+        if interior is not None and density < best[1]:
+            return interior, density
+        return best
+
+
+def check():
+    from minesweeper_core import Board
+    # 插错旗子的回归检查：矛盾的约束推不出结论；拔掉旗子后依赖它的结论全部作废
+    # 3x3棋盘，中间是1，其余格子未揭开
+    view = [[None] * 3 for _ in range(3)]
+    view[1][1] = 1
+    view[0][0] = view[0][1] = "F"
+    constraints, _, _ = build_constraints(view)
+    component = Component(list(constraints[0][1]), constraints)
+    assert component.certain() == ([], []), "1周围插了两面旗，不应有任何结论"
+
+    analyzer = FrontierAnalyzer(3, 3, 1)
+    analyzer.observe((1, 1), 1)
+    analyzer.observe((0, 0), "F")
+    analyzer.observe((0, 1), "F")
+    assert analyzer.deductions() == (set(), set())
+    analyzer.observe((0, 1), None)
+    safe, _ = analyzer.deductions()
+    assert len(safe) == 7, safe
+    analyzer.observe((0, 0), None)
+    assert analyzer.deductions() == (set(), set()), "拔旗后不应再报告依赖这面旗的安全格"
+
+    # 提示：插旗再拔旗后没有安全格，后台分析给出的最佳格子概率为1/8；旗子矛盾时不给提示
+    view[0][0] = view[0][1] = None
+    search = HintSearch(view, 1).start()
+    search.thread.join()
+    assert search.exact and abs(search.best[1] - 1 / 8) < 1e-9, search.best
+    view[0][0] = view[0][1] = "F"
+    search = HintSearch(view, 2).start()
+    search.thread.join()
+    assert search.best is None, search.best
+
+    # 增量概率：内部格共用一个概率，后台任务被取消后分量仍待求解，下次重新求解得到同样的结果
+    analyzer = FrontierAnalyzer(3, 3, 1)
+    analyzer.observe((1, 1), 1)
+    task = analyzer.probability_task()
+    search = ProbabilitySearch(task)
+    search.cancel()
+    search.start().thread.join()
+    assert not search.finished
+    analyzer.install(task)
+    probabilities, interior = analyzer.probabilities()
+    assert interior is None and all(abs(p - 1 / 8) < 1e-9 for p in probabilities.values()), probabilities
+    analyzer = FrontierAnalyzer(5, 5, 3)
+    analyzer.observe((0, 0), 1)
+    probabilities, interior = analyzer.probabilities()
+    expected = mine_probabilities(analyzer.view, 3)
+    assert all(abs(expected[cell] - p) < 1e-9 for cell, p in probabilities.items())
+    assert abs(expected[(4, 4)] - interior) < 1e-9 and analyzer.first_interior() == (0, 2)
+
+    # 自动游玩：分析器多记了一面棋盘上没有的旗子，核对后不能把右下角的雷当成安全格点开
+    board = Board(3, 3, 1)
+    board.load_layout("00001101*")
+    board.left_click(1, 1)
+    analyzer = FrontierAnalyzer(3, 3, 1)
+    analyzer.observe_board(board, [(1, 1)])
+    analyzer.observe((0, 0), "F")
+    moves = player_moves(board, analyzer)
+    assert ("L", 2, 2) not in moves, moves
+    for move, r, c in moves:
+        board.left_click(r, c)
+    assert board.status != "lost", moves
+    print("检查通过")
+
+
+def benchmark_incremental(sizes=((16, 30), (50, 50), (100, 100), (200, 200), (400, 400)),
+                          density=0.16, moves_per_board=300):
+    # 用推理出的安全格一路推进对局，对比增量分析和每步全盘重做局部推理的单步耗时
+    import random
+    from minesweeper_core import Board
+    print("棋盘          步数  增量(ms/步)  每步窗口数  全盘重算(ms/步)")
+    for rows, cols in sizes:
+        mines = int(rows * cols * density)
+        board = Board(rows, cols, mines, seed=rows)
+        analyzer = FrontierAnalyzer(rows, cols, mines)
+        rng = random.Random(rows)
+        analyzer.observe_board(board, board.left_click(rows // 2, cols // 2))
+        analyzer.deductions()
+        incremental = full = 0.0
+        windows = moves = samples = 0
+        while board.status == "playing" and moves < moves_per_board:
+            start = time.perf_counter()
+            safe, _ = analyzer.deductions()
+            incremental += time.perf_counter() - start
+            windows += analyzer.last["windows"]
+            if moves % 20 == 0:
+                # 对照组：每步从零建立约束并对所有约束做同样的局部推理，抽样计时
+                start = time.perf_counter()
+                fresh = FrontierAnalyzer(rows, cols, mines)
+                fresh.view = [row[:] for row in analyzer.view]
+                fresh.dirty = set(analyzer.constraints)
+                fresh.deductions()
+                full += time.perf_counter() - start
+                samples += 1
+            if safe:
+                cell = min(safe)
+            else:
+                # 没有确定安全的格子时，直接挑一个安全格推进(只为测试分析开销)
+                hidden = [(r, c) for r in range(rows) for c in range(cols)
+                          if board.state[r][c] == 0 and board.grid[r][c] != -1]
+                if not hidden:
+                    break
+                cell = rng.choice(hidden)
+            analyzer.observe_board(board, board.left_click(*cell))
+            moves += 1
+        print(f"{rows:>4}x{cols:<4} {moves:>7}  {incremental / moves * 1000:>10.2f}  "
+              f"{windows / moves:>10.1f}  {full / samples * 1000:>14.2f}")
+
+
+def benchmark(games=20, rows=16, cols=30, mines=99):
+    # 在困难棋盘上随机揭开若干安全格后计算概率，统计耗时
+    import random
+    from minesweeper_core import Board, MINE
+    worst = total = 0.0
+    count = 0
+    for seed in range(games):
+        board = Board(rows, cols, mines, seed)
+        rng = random.Random(seed)
+        board.left_click(rows // 2, cols // 2)
+        while board.status == "playing":
+            start = time.perf_counter()
+            probabilities = mine_probabilities(board.view(), mines)
+            elapsed = time.perf_counter() - start
+            worst = max(worst, elapsed)
+            total += elapsed
+            count += 1
+            safe = [cell for cell, p in probabilities.items()
+                    if board.grid[cell[0]][cell[1]] != MINE]
+            if not safe:
+                break
+            # 优先点最安全的格子，模拟正常对局进程
+            safe.sort(key=lambda cell: probabilities[cell])
+            board.left_click(*safe[min(len(safe) - 1, rng.randrange(3))])
+    print(f"{rows}x{cols} {mines}雷: {count} 次计算, 平均 {total / count * 1000:.1f} ms, "
+          f"最慢 {worst * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
+    if "--bench-incremental" in sys.argv:
+        benchmark_incremental()
+    if "--check" in sys.argv:
+        check()
@@ -0,0 +1,355 @@
+import math
+import random
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from minesweeper_core import Board, HIDDEN, OPENED, MINE
+from minesweeper_endless import chunk_seed
+
+# 超大自定义棋盘的稀疏分块存储
+# Board用两个 rows x cols 的嵌套列表保存数字和状态，每格是两个8字节的对象引用，
+# 1万x1万的棋盘光列表就要1.6 GB。这里把棋盘切成区块，只有访问到的区块才分配内存：
+#   每个区块的雷数   用二分树逐层按超几何分布拆分总雷数，每个节点的随机数由(种子, 区间)决定，
+#                    所以查询任意区块的雷数只需O(log 区块数)次抽样，不必为整张棋盘生成
+#   区块内雷的位置   由(种子, 区块坐标)的随机数在该区块内抽取，需要时随时重算
+#   数字和状态       区块第一次被读取时生成，各用一个bytearray，每格共2字节
+# 首次点击的格子从抽样中排除，保证第一下不踩雷，规则与Board完全一致
+
+CHUNK_SIZE = 64
+MINE_BYTE = 9
+# 超几何抽样改用正态近似的方差阈值
+NORMAL_VARIANCE = 10000
+
+
+def hypergeometric(rng, successes, population, draws):
+    # 从population个格子(其中successes个是雷)中不放回地取draws个，返回取到的雷数
+    # 从众数出发向两侧累加概率做逆变换抽样，步数约为标准差的量级
+    low = max(0, draws - (population - successes))
+    high = min(draws, successes)
+    if low == high:
+        return low
+    variance = (draws * successes / population * (population - successes) / population
+                * (population - draws) / max(1, population - 1))
+    if variance > NORMAL_VARIANCE:
+        # 方差很大时(上亿格子的顶层拆分)逐项累加太慢，改用正态近似，误差远小于一个标准差
+        mean = draws * successes / population
+        return min(high, max(low, round(rng.gauss(mean, math.sqrt(variance)))))
+    mode = min(high, max(low, (draws + 1) * (successes + 1) // (population + 2)))
+
+    def log_choose(n, k):
+        return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+    p_mode = math.exp(log_choose(successes, mode) + log_choose(population - successes, draws - mode)
+                      - log_choose(population, draws))
+    u = rng.random() - p_mode
+    if u <= 0:
+        return mode
+    up, p_up = mode, p_mode
+    down, p_down = mode, p_mode
+    while up < high or down > low:
+        if up < high:
+            p_up *= ((successes - up) * (draws - up)
+                     / ((up + 1) * (population - successes - draws + up + 1)))
+            up += 1
+            u -= p_up
+            if u <= 0:
+                return up
+        if down > low:
+            p_down *= (down * (population - successes - draws + down)
+                       / ((successes - down + 1) * (draws - down + 1)))
+            down -= 1
+            u -= p_down
+            if u <= 0:
+                return down
+    # 浮点误差导致概率和略小于1时落到众数
+    return mode
+
+
+class ChunkedRow:
+    __slots__ = ("read", "write", "r")
+
+    def __init__(self, read, write, r):
+        self.read = read
+        self.write = write
+        self.r = r
+
+    def __getitem__(self, c):
+        return self.read(self.r, c)
+
+    def __setitem__(self, c, value):
+        self.write(self.r, c, value)
+
+
+class ChunkedGrid:
+    # 兼容 board.grid[r][c] / board.state[r][c] 写法，界面、服务器和协议代码无需修改
+    __slots__ = ("read", "write")
+
+    def __init__(self, read, write=None):
+        self.read = read
+        self.write = write
+
+    def __getitem__(self, r):
+        return ChunkedRow(self.read, self.write, r)
+
+
+class SparseBoard(Board):
+    def __init__(self, rows=10, cols=10, mines=10, seed=None, chunk_size=CHUNK_SIZE,
+                 layout_limit=4096):
+        # 不调用Board.__init__，避免分配整张棋盘的嵌套列表
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.chunk_size = chunk_size
+        self.chunk_rows = -(-rows // chunk_size)
+        self.chunk_cols = -(-cols // chunk_size)
+        self.grid = ChunkedGrid(self.cell_value)
+        self.state = ChunkedGrid(self.cell_state, self.set_state)
+        self.values = {}
+        self.states = {}
+        self.counts = {}
+        # 雷的位置可以重算，只缓存最近用到的区块(生成相邻区块的数字时需要)
+        self.layouts = OrderedDict()
+        self.layout_limit = layout_limit
+        self.excluded = None
+        self.opened = 0
+        self.flags = 0
+        self.first_click = True
+        self.status = "playing"
+        self.exploded = None
+        self.clicks = 0
+        self._bbbv = None
+        self.labels = None
+        self.region_offsets = None
+
+    def generate_mines(self, exclude_r, exclude_c):
+        # 只记录排除的格子，雷在区块第一次被访问时才生成
+        self.excluded = (exclude_r, exclude_c)
+
+    def chunk_height(self, cr):
+        return min(self.chunk_size, self.rows - cr * self.chunk_size)
+
+    def chunk_width(self, cc):
+        return min(self.chunk_size, self.cols - cc * self.chunk_size)
+
+    def cells_before(self, index):
+        # 按行优先编号在index之前的所有区块中可以放雷的格子数
+        if index >= self.chunk_rows * self.chunk_cols:
+            total = self.rows * self.cols
+        else:
+            cr, cc = divmod(index, self.chunk_cols)
+            total = cr * self.chunk_size * self.cols + self.chunk_height(cr) * cc * self.chunk_size
+        if self.excluded is not None:
+            size = self.chunk_size
+            er, ec = self.excluded
+            if (er // size) * self.chunk_cols + ec // size < index:
+                total -= 1
+        return total
+
+    def chunk_mines(self, cr, cc):
+        index = cr * self.chunk_cols + cc
+        count = self.counts.get(index)
+        if count is None:
+            low, high, count = 0, self.chunk_rows * self.chunk_cols, self.mines
+            while high - low > 1:
+                mid = (low + high) // 2
+                rng = random.Random(chunk_seed(self.seed, low, high))
+                left = hypergeometric(rng, count, self.cells_before(high) - self.cells_before(low),
+                                      self.cells_before(mid) - self.cells_before(low))
+                if index < mid:
+                    high, count = mid, left
+                else:
+                    low, count = mid, count - left
+            self.counts[index] = count
+        return count
+
+    def layout(self, cr, cc):
+        # 区块内雷的编号(区块内 行*区块边长+列)
+        key = (cr, cc)
+        mines = self.layouts.get(key)
+        if mines is not None:
+            self.layouts.move_to_end(key)
+            return mines
+        size = self.chunk_size
+        height, width = self.chunk_height(cr), self.chunk_width(cc)
+        cells = [r * size + c for r in range(height) for c in range(width)]
+        er, ec = self.excluded
+        if er // size == cr and ec // size == cc:
+            cells.remove((er % size) * size + ec % size)
+        rng = random.Random(chunk_seed(~self.seed, cr, cc))
+        mines = rng.sample(cells, self.chunk_mines(cr, cc))
+        self.layouts[key] = mines
+        if len(self.layouts) > self.layout_limit:
+            self.layouts.popitem(last=False)
+        return mines
+
+    def materialize(self, cr, cc):
+        # 生成区块的数字：本区块和相邻区块的雷向本区块内的邻居计数
+        size = self.chunk_size
+        values = bytearray(size * size)
+        top, left = cr * size, cc * size
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                nr, nc = cr + dr, cc + dc
+                if not (0 <= nr < self.chunk_rows and 0 <= nc < self.chunk_cols):
+                    continue
+                for local in self.layout(nr, nc):
+                    r = nr * size + local // size - top
+                    c = nc * size + local % size - left
+                    if dr == 0 and dc == 0:
+                        values[local] = MINE_BYTE
+                    for rr in range(max(0, r - 1), min(size, r + 2)):
+                        for cc2 in range(max(0, c - 1), min(size, c + 2)):
+                            if values[rr * size + cc2] != MINE_BYTE:
+                                values[rr * size + cc2] += 1
+        self.values[(cr, cc)] = values
+        return values
+
+    def cell_value(self, r, c):
+        if self.excluded is None:
+            return 0
+        size = self.chunk_size
+        key = (r // size, c // size)
+        values = self.values.get(key)
+        if values is None:
+            values = self.materialize(*key)
+        value = values[(r % size) * size + c % size]
+        return MINE if value == MINE_BYTE else value
+
+    def cell_state(self, r, c):
+        size = self.chunk_size
+        states = self.states.get((r // size, c // size))
+        if states is None:
+            return HIDDEN
+        return states[(r % size) * size + c % size]
+
+    def set_state(self, r, c, value):
+        size = self.chunk_size
+        key = (r // size, c // size)
+        states = self.states.get(key)
+        if states is None:
+            states = self.states[key] = bytearray(size * size)
+        states[(r % size) * size + c % size] = value
+
+    def count_mines(self, r, c):
+        return sum(1 for nr, nc in self.neighbors(r, c) if self.cell_value(nr, nc) == MINE)
+
+    def bbbv(self):
+        # 稀疏棋盘不预先标记空白区域(那需要访问每个区块)，需要时再逐格遍历
+        if self._bbbv is None and not self.first_click:
+            marked = set()
+            count = 0
+            for r in range(self.rows):
+                for c in range(self.cols):
+                    if self.cell_value(r, c) != 0 or (r, c) in marked:
+                        continue
+                    count += 1
+                    marked.add((r, c))
+                    stack = [(r, c)]
+                    while stack:
+                        cell = stack.pop()
+                        for neighbor in self.neighbors(*cell):
+                            if neighbor not in marked:
+                                marked.add(neighbor)
+                                if self.cell_value(*neighbor) == 0:
+                                    stack.append(neighbor)
+            count += sum(1 for r in range(self.rows) for c in range(self.cols)
+                         if self.cell_value(r, c) > 0 and (r, c) not in marked)
+            self._bbbv = count
+        return self._bbbv
+
+    def openings(self):
+        # 同bbbv，不为整张稀疏棋盘标记空白区域
+        return None
+
+    def labels_ready(self):
+        return self.first_click or self._bbbv is not None
+
+    def grid_copy(self):
+        # 稀疏棋盘大到无法复制整张数字表，不在对局结束时统计3BV
+        return None
+
+    def reveal(self, r, c):
+        # 与Board.walk相同，直接调用存取方法，省去行代理对象
+        opened = []
+        stack = [(r, c)]
+        while stack:
+            r, c = stack.pop()
+            if self.cell_state(r, c) != HIDDEN:
+                continue
+            self.set_state(r, c, OPENED)
+            self.opened += 1
+            opened.append((r, c))
+            if self.cell_value(r, c) == 0:
+                stack.extend(self.neighbors(r, c))
+        return opened
+
+    def memory(self):
+        # 已分配的区块数据字节数(不含字典本身)
+        cells = self.chunk_size * self.chunk_size
+        return {"value_chunks": len(self.values), "state_chunks": len(self.states),
+                "bytes": (len(self.values) + len(self.states)) * cells}
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def traced(function):
+    # tracemalloc会明显拖慢执行，内存和耗时分开测
+    tracemalloc.start()
+    function()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current
+
+
+def benchmark():
+    rows = cols = 1000
+    mines = rows * cols // 6
+    rng = random.Random(0)
+    cells = [(rng.randrange(rows), rng.randrange(cols)) for _ in range(200000)]
+    print(f"{rows}x{cols}, {mines}雷")
+    for name, cls in (("嵌套列表 Board", Board), ("稀疏分块 SparseBoard", SparseBoard)):
+        board = None
+
+        def build():
+            nonlocal board
+            board = cls(rows, cols, mines, seed=1)
+            board.left_click(rows // 2, cols // 2)
+
+        build_time = timed(build)
+        memory = traced(build)
+        print(f"  {name}: 创建+首次点击 {build_time * 1000:.0f} ms, {memory / (rows * cols):.2f} 字节/格")
+
+        def read_all(read):
+            for r, c in cells:
+                read(r, c)
+
+        grid = board.grid
+        cold = timed(lambda: read_all(lambda r, c: grid[r][c]))
+        warm = timed(lambda: read_all(lambda r, c: grid[r][c]))
+        line = f"    随机读取 grid[r][c]: 首次 {cold / len(cells) * 1e9:.0f} ns/次, 之后 {warm / len(cells) * 1e9:.0f} ns/次"
+        if cls is SparseBoard:
+            direct = timed(lambda: read_all(board.cell_value))
+            line += (f", cell_value(r, c) {direct / len(cells) * 1e9:.0f} ns/次"
+                     f"\n    全部区块生成后: {board.memory()['bytes'] / (rows * cols):.2f} 字节/格(区块数据)")
+        print(line)
+
+    rows = cols = 100000
+    mines = rows * cols // 6
+    board = SparseBoard(rows, cols, mines, seed=1)
+    click_time = timed(lambda: board.left_click(rows // 2, cols // 2))
+    print(f"{rows}x{cols}, {mines}雷 (嵌套列表约需 {rows * cols * 16 / 2**30:.0f} GB): "
+          f"首次点击 {click_time * 1000:.1f} ms, 揭开 {board.opened} 格, "
+          f"生成 {board.memory()['value_chunks']} 个数字区块 ({board.memory()['bytes'] // 1024} KB)")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
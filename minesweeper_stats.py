@@ -0,0 +1,147 @@
+import os
+import queue
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from minesweeper_core import data_path
+
+# 对局统计存储：每局结束后写入本地SQLite
+# 写入由后台线程批量提交，界面线程只做一次队列put，不会拖慢结束对话框
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    rows INTEGER NOT NULL,
+    cols INTEGER NOT NULL,
+    mines INTEGER NOT NULL,
+    seed INTEGER,
+    duration REAL NOT NULL,
+    clicks INTEGER NOT NULL,
+    bbbv INTEGER,
+    won INTEGER NOT NULL,
+    openings INTEGER
+);
+-- 按难度查询最佳时间：等值条件在前，duration在最后，可直接按索引顺序取前N条
+CREATE INDEX IF NOT EXISTS games_best ON games (rows, cols, mines, won, duration);
+"""
+# 最近N局按主键倒序读取，不需要额外索引
+
+COLUMNS = ("finished_at", "rows", "cols", "mines", "seed", "duration", "clicks", "bbbv", "won",
+           "openings")
+
+
+class StatsStore:
+    def __init__(self, path=None, batch_size=256, flush_interval=0.5):
+        self.path = path or data_path("stats.db")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue()
+        self.closed = False
+
+        connection = self.connect()
+        connection.executescript(SCHEMA)
+        # 旧版本创建的数据库没有openings列
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(games)")}
+        if "openings" not in columns:
+            connection.execute("ALTER TABLE games ADD COLUMN openings INTEGER")
+        connection.close()
+        self.reader = self.connect()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL模式下读写互不阻塞
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def record(self, result):
+        # 可在任意线程调用，立即返回
+        row = (result.get("finished_at", time.time()), result["rows"], result["cols"],
+               result["mines"], result.get("seed"), result["time"],
+               result.get("clicks", 0), result.get("bbbv"), int(bool(result["won"])),
+               result.get("openings"))
+        self.pending.put(row)
+
+    def write_loop(self):
+        connection = self.connect()
+        insert = f"INSERT INTO games ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        running = True
+        while running:
+            batch = []
+            try:
+                item = self.pending.get()
+                deadline = time.monotonic() + self.flush_interval
+                # 攒够一批或到达时间间隔再提交，一次事务写入多局
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    item = self.pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                else:
+                    running = False
+            except queue.Empty:
+                pass
+            if batch:
+                with connection:
+                    connection.executemany(insert, batch)
+        connection.close()
+
+    def best_times(self, rows, cols, mines, limit=10):
+        return self.reader.execute(
+            "SELECT duration, clicks, bbbv, finished_at FROM games "
+            "WHERE rows = ? AND cols = ? AND mines = ? AND won = 1 "
+            "ORDER BY duration LIMIT ?", (rows, cols, mines, limit)).fetchall()
+
+    def recent(self, limit=10):
+        return self.reader.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM games ORDER BY id DESC LIMIT ?",
+            (limit,)).fetchall()
+
+    def close(self):
+        # 写完队列中剩余的记录后关闭
+        if self.closed:
+            return
+        self.closed = True
+        self.pending.put(None)
+        self.writer.join()
+        self.reader.close()
+
+
+def benchmark(count=1000000):
+    import random
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    store = StatsStore(path, batch_size=10000)
+    presets = [(9, 9, 10), (16, 16, 40), (16, 30, 99)]
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for i in range(count):
+        rows, cols, mines = presets[i % 3]
+        store.record({"finished_at": i, "rows": rows, "cols": cols, "mines": mines,
+                      "seed": i, "time": rng.uniform(5, 600), "clicks": rng.randint(10, 400),
+                      "bbbv": rng.randint(5, 250), "won": rng.random() < 0.4})
+    enqueue = time.perf_counter() - start
+    store.close()
+    print(f"写入 {count} 局: 入队 {enqueue:.2f} s, 总计 {time.perf_counter() - start:.2f} s "
+          f"(单次record {enqueue / count * 1e6:.2f} µs)")
+
+    store = StatsStore(path)
+    for name, query in (("最佳时间(困难)", lambda: store.best_times(16, 30, 99)),
+                        ("最近10局", lambda: store.recent(10))):
+        query()
+        runs = 1000
+        start = time.perf_counter()
+        for _ in range(runs):
+            query()
+        print(f"{name}: {(time.perf_counter() - start) / runs * 1000:.3f} ms/次")
+    store.close()
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
@@ -0,0 +1,255 @@
+import argparse
+import curses
+import locale
+import time
+
+from minesweeper_core import HIDDEN, OPENED, FLAGGED, MINE
+from minesweeper_preflight import MEMORY_BUDGET, TIME_BUDGET, OverBudget, plan
+
+# 终端版扫雷：通过SSH等没有图形界面的环境游玩，规则与图形界面共用minesweeper_core
+# 屏幕上只显示视口内的格子，光标移出视口时滚动
+# 每个屏幕位置记住当前显示的字符和属性，每步只重写发生变化的格子；
+# 一次读取缓冲区内所有按键后才刷新一次屏幕，慢速链路上连续按键不会逐个重绘
+
+CELL_WIDTH = 2
+# 按键重复时每次最多处理的按键数，避免一次处理太久没有反馈
+MAX_KEYS_PER_FRAME = 256
+
+GLYPHS = {None: ".", "F": "F", MINE: "*", 0: " "}
+# 与图形界面的COLOR_SCHEME大致对应的终端颜色
+COLORS = {
+    1: curses.COLOR_BLUE,
+    2: curses.COLOR_GREEN,
+    3: curses.COLOR_RED,
+    4: curses.COLOR_MAGENTA,
+    5: curses.COLOR_YELLOW,
+    6: curses.COLOR_CYAN,
+    7: curses.COLOR_RED,
+    8: curses.COLOR_WHITE,
+}
+MOVES = {
+    curses.KEY_UP: (-1, 0), ord("k"): (-1, 0),
+    curses.KEY_DOWN: (1, 0), ord("j"): (1, 0),
+    curses.KEY_LEFT: (0, -1), ord("h"): (0, -1),
+    curses.KEY_RIGHT: (0, 1), ord("l"): (0, 1),
+}
+
+
+class TerminalGame:
+    def __init__(self, screen, estimate):
+        # estimate为资源预估选出的方案，新开一局时按同样的存储方式建棋盘
+        self.screen = screen
+        self.estimate = estimate
+        self.board = estimate.build()
+        self.cursor = (self.board.rows // 2, self.board.cols // 2)
+        self.top = 0
+        self.left = 0
+        # 屏幕位置 -> 当前显示的(字符, 属性)
+        self.shown = {}
+        self.status_text = None
+        self.start_time = None
+        self.attrs = {}
+        self.resize()
+
+    def setup_colors(self):
+        if not curses.has_colors():
+            return
+        curses.start_color()
+        curses.use_default_colors()
+        for value, color in COLORS.items():
+            curses.init_pair(value, color, -1)
+            self.attrs[value] = curses.color_pair(value) | curses.A_BOLD
+
+    def resize(self):
+        height, width = self.screen.getmaxyx()
+        self.view_rows = max(1, min(self.board.rows, height - 1))
+        self.view_cols = max(1, min(self.board.cols, (width - 1) // CELL_WIDTH))
+        self.shown.clear()
+        self.status_text = None
+        self.screen.erase()
+        self.follow(force=True)
+
+    def glyph(self, r, c):
+        board = self.board
+        state = board.state[r][c]
+        if (r, c) == board.exploded:
+            return "*", curses.A_REVERSE
+        if state == OPENED:
+            value = board.grid[r][c]
+            return GLYPHS.get(value, str(value)), self.attrs.get(value, 0)
+        if board.status == "lost" and board.grid[r][c] == MINE:
+            # 踩雷后显示视口中的雷，滚动到别处时再按需显示
+            return "*", 0 if state == HIDDEN else curses.A_BOLD
+        if state == FLAGGED:
+            return "F", self.attrs.get(3, curses.A_BOLD)
+        return ".", curses.A_DIM
+
+    def draw_cell(self, r, c):
+        y = r - self.top + 1
+        x = (c - self.left) * CELL_WIDTH
+        if not (1 <= y <= self.view_rows and 0 <= c - self.left < self.view_cols):
+            return
+        glyph = self.glyph(r, c)
+        if self.shown.get((y, x)) != glyph:
+            self.shown[(y, x)] = glyph
+            self.screen.addstr(y, x, glyph[0], glyph[1])
+
+    def draw_view(self):
+        for r in range(self.top, self.top + self.view_rows):
+            for c in range(self.left, self.left + self.view_cols):
+                self.draw_cell(r, c)
+
+    def draw_cells(self, cells):
+        # 大面积展开时新揭开的格子可能远多于视口，直接按视口重画
+        if len(cells) > self.view_rows * self.view_cols:
+            self.draw_view()
+        else:
+            for r, c in cells:
+                self.draw_cell(r, c)
+
+    def draw_status(self):
+        board = self.board
+        elapsed = int(time.time() - self.start_time) if self.start_time else 0
+        marks = {"playing": "", "won": "  🎉 胜利！", "lost": "  💥 踩雷了"}
+        text = (f"🚩 {board.mines - board.flags}  ⏳ {elapsed // 60:02d}:{elapsed % 60:02d}  "
+                f"📍 ({self.cursor[0]}, {self.cursor[1]})  "
+                f"已揭开 {board.opened}/{board.rows * board.cols - board.mines}{marks[board.status]}")
+        if text != self.status_text:
+            self.status_text = text
+            width = self.screen.getmaxyx()[1]
+            self.screen.move(0, 0)
+            self.screen.clrtoeol()
+            self.screen.addnstr(0, 0, text, max(0, width - 1))
+
+    def follow(self, force=False):
+        # 光标离开视口时滚动，让光标回到视口内并保留几格余量
+        r, c = self.cursor
+        margin_r = min(3, self.view_rows // 4)
+        margin_c = min(3, self.view_cols // 4)
+        top, left = self.top, self.left
+        if r < top + margin_r:
+            top = r - margin_r
+        elif r >= top + self.view_rows - margin_r:
+            top = r - self.view_rows + margin_r + 1
+        if c < left + margin_c:
+            left = c - margin_c
+        elif c >= left + self.view_cols - margin_c:
+            left = c - self.view_cols + margin_c + 1
+        top = max(0, min(top, self.board.rows - self.view_rows))
+        left = max(0, min(left, self.board.cols - self.view_cols))
+        if force or (top, left) != (self.top, self.left):
+            self.top, self.left = top, left
+            self.draw_view()
+
+    def move(self, dr, dc):
+        r = max(0, min(self.board.rows - 1, self.cursor[0] + dr))
+        c = max(0, min(self.board.cols - 1, self.cursor[1] + dc))
+        self.cursor = (r, c)
+        self.follow()
+
+    def reveal(self):
+        if self.start_time is None:
+            self.start_time = time.time()
+        opened = self.board.left_click(*self.cursor)
+        if self.board.status == "lost":
+            self.draw_view()
+        else:
+            self.draw_cells(opened)
+
+    def flag(self):
+        if self.board.right_click(*self.cursor):
+            self.draw_cell(*self.cursor)
+
+    def click(self):
+        # 鼠标点击：左键揭开，右键插旗
+        try:
+            _, x, y, _, buttons = curses.getmouse()
+        except curses.error:
+            return
+        r, c = self.top + y - 1, self.left + x // CELL_WIDTH
+        if not (0 <= r - self.top < self.view_rows and 0 <= c - self.left < self.view_cols):
+            return
+        self.cursor = (r, c)
+        if buttons & curses.BUTTON1_CLICKED:
+            self.reveal()
+        elif buttons & curses.BUTTON3_CLICKED:
+            self.flag()
+
+    def handle(self, key):
+        # 返回False表示退出
+        if key in (ord("q"), 27):
+            return False
+        if key in MOVES:
+            self.move(*MOVES[key])
+        elif key in (ord("H"), ord("J"), ord("K"), ord("L")):
+            dr, dc = MOVES[ord(chr(key).lower())]
+            self.move(dr * self.view_rows, dc * self.view_cols)
+        elif key == curses.KEY_NPAGE:
+            self.move(self.view_rows, 0)
+        elif key == curses.KEY_PPAGE:
+            self.move(-self.view_rows, 0)
+        elif key in (ord(" "), ord("\n"), curses.KEY_ENTER):
+            self.reveal()
+        elif key == ord("f"):
+            self.flag()
+        elif key == ord("n"):
+            self.board = self.estimate.build()
+            self.start_time = None
+            self.shown.clear()
+            self.draw_view()
+        elif key == curses.KEY_MOUSE:
+            self.click()
+        elif key == curses.KEY_RESIZE:
+            self.resize()
+        return True
+
+    def place_cursor(self):
+        r, c = self.cursor
+        self.screen.move(r - self.top + 1, (c - self.left) * CELL_WIDTH)
+
+    def run(self):
+        self.setup_colors()
+        self.screen.keypad(True)
+        curses.mousemask(curses.BUTTON1_CLICKED | curses.BUTTON3_CLICKED)
+        running = True
+        while running:
+            self.draw_status()
+            self.place_cursor()
+            self.screen.refresh()
+            # 最多等待1秒以刷新计时器
+            self.screen.timeout(1000)
+            key = self.screen.getch()
+            self.screen.timeout(0)
+            handled = 0
+            while key != -1 and running:
+                running = self.handle(key)
+                handled += 1
+                key = self.screen.getch() if handled < MAX_KEYS_PER_FRAME else -1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="终端版扫雷")
+    parser.add_argument("--rows", type=int, default=16)
+    parser.add_argument("--cols", type=int, default=30)
+    parser.add_argument("--mines", type=int, default=99)
+    parser.add_argument("--memory-budget", type=float, default=MEMORY_BUDGET / 2**20,
+                        help="内存预算(MB)")
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET, help="开局耗时预算(秒)")
+    args = parser.parse_args()
+    # 与服务器的NEW命令相同的范围检查
+    if args.rows < 1 or args.cols < 1:
+        parser.error("行数和列数至少为1")
+    if not 0 < args.mines < args.rows * args.cols:
+        parser.error("地雷数必须大于0且小于总格子数")
+    # 按实测开销选出最省的存储方式(嵌套列表、延迟计数或稀疏分块)，超出预算时拒绝
+    try:
+        estimate = plan(args.rows, args.cols, args.mines, ("terminal",),
+                        args.memory_budget * 2**20, args.time_budget)
+    except OverBudget as e:
+        parser.error(str(e))
+    locale.setlocale(locale.LC_ALL, "")
+    curses.wrapper(lambda screen: TerminalGame(screen, estimate).run())
+
+
+if __name__ == "__main__":
+    main()